@@ -1 +1,7 @@
 # This file makes Python treat the directory as a package
+
+# Load the Celery app when Celery is installed so shared_task binds to it
+try:
+    from .celery import app as celery_app
+except ImportError:
+    celery_app = None
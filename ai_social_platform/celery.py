@@ -0,0 +1,15 @@
+"""
+Celery application for ai_social_platform.
+
+Only used when GENERATION_JOB_BACKEND = 'celery'.
+"""
+
+import os
+
+from celery import Celery
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ai_social_platform.settings')
+
+app = Celery('ai_social_platform')
+app.config_from_object('django.conf:settings', namespace='CELERY')
+app.autodiscover_tasks()
@@ -152,6 +152,23 @@ STATICFILES_DIRS = [
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Media storage: 'filesystem' keeps upload names as they are; 'content-addressed'
+# stores each distinct file once under <upload dir>/<aa>/<bb>/<sha256>.<ext> with
+# reference counts (core.storage). Run `manage.py migrate_media_storage` after
+# switching to move existing files into that layout.
+MEDIA_STORAGE_BACKEND = config('MEDIA_STORAGE_BACKEND', default='filesystem')
+STORAGES = {
+    'default': {
+        'BACKEND': (
+            'core.storage.ContentAddressedStorage' if MEDIA_STORAGE_BACKEND == 'content-addressed'
+            else 'django.core.files.storage.FileSystemStorage'
+        ),
+    },
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    },
+}
+
 # Ensure media directory exists
 os.makedirs(MEDIA_ROOT, exist_ok=True)
 os.makedirs(os.path.join(BASE_DIR, 'static'), exist_ok=True)
@@ -211,6 +228,11 @@ if not DEBUG:
     CSRF_COOKIE_SECURE = True
 
 # File Upload Settings
+# Streamed provider downloads are spooled here; keep it on the MEDIA_ROOT
+# filesystem so moving them into place is an atomic rename
+MEDIA_INGEST_TEMP_DIR = MEDIA_ROOT / '.ingest'
+# `manage.py reconcile_media --quarantine` moves orphaned files here
+MEDIA_QUARANTINE_DIR = MEDIA_ROOT / '.quarantine'
 FILE_UPLOAD_MAX_MEMORY_SIZE = 10 * 1024 * 1024  # 10MB
 DATA_UPLOAD_MAX_MEMORY_SIZE = 10 * 1024 * 1024  # 10MB
 
@@ -222,6 +244,103 @@ CACHES = {
     }
 }
 
+# Homepage cache (core.homepage_cache): site counters and the recent posts
+# fragment, dropped on GeneratedImage/StylePreset changes
+HOMEPAGE_STATS_TTL = config('HOMEPAGE_STATS_TTL', default=60, cast=int)
+HOMEPAGE_FRAGMENT_TTL = config('HOMEPAGE_FRAGMENT_TTL', default=60, cast=int)
+
+# Thumbnail variants for list pages (core.thumbnails); AVIF is skipped when
+# Pillow was built without it
+IMAGE_THUMBNAIL_WIDTHS = config('IMAGE_THUMBNAIL_WIDTHS', default='320,640', cast=lambda v: [int(s) for s in v.split(',') if s.strip()])
+IMAGE_THUMBNAIL_FORMATS = config('IMAGE_THUMBNAIL_FORMATS', default='webp,avif', cast=lambda v: [s.strip() for s in v.split(',') if s.strip()])
+
+# Image downloads (core.file_serving)
+# '' streams the file from Django; 'x-accel' hands it to nginx through an
+# `internal` location at DOWNLOAD_SENDFILE_PREFIX aliased to MEDIA_ROOT;
+# 'x-sendfile' for Apache mod_xsendfile or lighttpd
+DOWNLOAD_SENDFILE_BACKEND = config('DOWNLOAD_SENDFILE_BACKEND', default='')
+DOWNLOAD_SENDFILE_PREFIX = config('DOWNLOAD_SENDFILE_PREFIX', default='/protected-media/')
+
+# Append-only generation log in data_storage/ (core.file_storage); segments
+# rotate at this size, and only the newest MAX_SEGMENTS are kept
+GENERATION_LOG_MAX_BYTES = config('GENERATION_LOG_MAX_BYTES', default=10 * 1024 * 1024, cast=int)
+GENERATION_LOG_MAX_SEGMENTS = config('GENERATION_LOG_MAX_SEGMENTS', default=10, cast=int)
+
+# User preferences (core.preferences_store): 'file' (JSON per user) or 'sqlite'
+# (data_storage/preferences.sqlite3), cached in-process and in the default cache
+# above; cached copies are checked against the file or row version on every read
+PREFERENCES_BACKEND = config('PREFERENCES_BACKEND', default='file')
+PREFERENCES_LRU_SIZE = config('PREFERENCES_LRU_SIZE', default=1024, cast=int)
+PREFERENCES_LOCAL_TTL = config('PREFERENCES_LOCAL_TTL', default=300, cast=int)
+PREFERENCES_CACHE_TTL = config('PREFERENCES_CACHE_TTL', default=300, cast=int)
+
+# Image generation job queue
+# 'thread' = in-process worker pool, 'db' = `manage.py run_generation_worker`,
+# 'celery' = Celery worker (needs CELERY_BROKER_URL)
+GENERATION_JOB_BACKEND = config('GENERATION_JOB_BACKEND', default='thread')
+GENERATION_JOB_WORKERS = config('GENERATION_JOB_WORKERS', default=4, cast=int)
+# Jobs left behind by a restart: pending jobs older than REQUEUE_AFTER seconds are
+# dispatched again, and jobs not finished TIMEOUT seconds after they were queued or
+# started are failed. The sweep runs every SWEEP_INTERVAL seconds.
+GENERATION_JOB_REQUEUE_AFTER = config('GENERATION_JOB_REQUEUE_AFTER', default=60, cast=int)
+GENERATION_JOB_TIMEOUT = config('GENERATION_JOB_TIMEOUT', default=600, cast=int)
+GENERATION_JOB_SWEEP_INTERVAL = config('GENERATION_JOB_SWEEP_INTERVAL', default=60, cast=int)
+
+# Image provider fallback chain
+# 'sequential' tries providers one after another, 'race' also starts the next
+# provider after IMAGE_PROVIDER_HEDGE_DELAY seconds (0 = start all at once)
+IMAGE_PROVIDER_STRATEGY = config('IMAGE_PROVIDER_STRATEGY', default='sequential')
+IMAGE_PROVIDER_HEDGE_DELAY = config('IMAGE_PROVIDER_HEDGE_DELAY', default=5.0, cast=float)
+# Threads shared by all races in one process; losers keep theirs until they finish
+IMAGE_PROVIDER_RACE_WORKERS = config('IMAGE_PROVIDER_RACE_WORKERS', default=8, cast=int)
+
+# Animated mock videos (utils.frame_renderer)
+# Frames are rendered in batches in a process pool of VIDEO_RENDER_WORKERS
+# processes per web or job process (0 = one per CPU)
+VIDEO_RENDER_WORKERS = config('VIDEO_RENDER_WORKERS', default=2, cast=int)
+VIDEO_RENDER_BATCH_SIZE = config('VIDEO_RENDER_BATCH_SIZE', default=8, cast=int)
+VIDEO_MOCK_MAX_FRAMES = config('VIDEO_MOCK_MAX_FRAMES', default=240, cast=int)
+# The GIF fallback holds every palette frame in memory until it is encoded
+VIDEO_GIF_MAX_FRAMES = config('VIDEO_GIF_MAX_FRAMES', default=30, cast=int)
+# Container for mock videos when ffmpeg is installed: 'mp4' (H.264) or 'webm' (VP9);
+# without ffmpeg they are animated GIFs
+VIDEO_MOCK_FORMAT = config('VIDEO_MOCK_FORMAT', default='mp4')
+# ffmpeg executable (name on PATH or absolute path), probed once per process
+FFMPEG_BINARY = config('FFMPEG_BINARY', default='ffmpeg')
+
+# Celery Configuration
+CELERY_BROKER_URL = config('CELERY_BROKER_URL', default='redis://localhost:6379/0')
+CELERY_RESULT_BACKEND = config('CELERY_RESULT_BACKEND', default='redis://localhost:6379/0')
+
+# Generation result cache (files under MEDIA_ROOT/generation_cache/)
+# Only providers that return the same image for the same request belong here
+GENERATION_CACHE_ENABLED = config('GENERATION_CACHE_ENABLED', default=True, cast=bool)
+GENERATION_CACHE_PROVIDERS = config('GENERATION_CACHE_PROVIDERS', default='mock,pollinations', cast=lambda v: [s.strip() for s in v.split(',') if s.strip()])
+GENERATION_CACHE_TTL = config('GENERATION_CACHE_TTL', default=7 * 24 * 3600, cast=int)
+GENERATION_CACHE_MAX_BYTES = config('GENERATION_CACHE_MAX_BYTES', default=500 * 1024 * 1024, cast=int)
+
+# Shared provider HTTP client (core.http_client)
+PROVIDER_HTTP_CONNECT_TIMEOUT = config('PROVIDER_HTTP_CONNECT_TIMEOUT', default=5, cast=float)
+PROVIDER_HTTP_POOL_SIZE = config('PROVIDER_HTTP_POOL_SIZE', default=20, cast=int)
+# Retries apply to GET/HEAD, to POSTs that opt in with retry=True, and to connect timeouts
+PROVIDER_HTTP_MAX_RETRIES = config('PROVIDER_HTTP_MAX_RETRIES', default=2, cast=int)
+PROVIDER_HTTP_BACKOFF = config('PROVIDER_HTTP_BACKOFF', default=0.5, cast=float)
+# Max in-flight requests per provider in one process
+PROVIDER_HTTP_CONCURRENCY = {
+    'default': 8,
+    'huggingface': 4,
+    'replicate': 4,
+    'fal_ai': 2,
+}
+
+# Provider circuit breakers (state is kept in the default cache above;
+# use a shared backend such as Redis so all worker processes see it)
+CIRCUIT_BREAKER_FAILURE_THRESHOLD = config('CIRCUIT_BREAKER_FAILURE_THRESHOLD', default=3, cast=int)
+CIRCUIT_BREAKER_COOLDOWN = config('CIRCUIT_BREAKER_COOLDOWN', default=60, cast=int)
+# How long a half-open probe may run before another caller may probe (providers
+# with longer calls pass max_call_time to the decorator)
+CIRCUIT_BREAKER_PROBE_TIMEOUT = config('CIRCUIT_BREAKER_PROBE_TIMEOUT', default=300, cast=int)
+
 # Logging Configuration
 LOGGING = {
     'version': 1,
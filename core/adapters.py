@@ -1,7 +1,7 @@
 from allauth.account.adapter import DefaultAccountAdapter
 from allauth.socialaccount.adapter import DefaultSocialAccountAdapter
 from django.conf import settings
-import requests
+from .http_client import provider_http
 from io import BytesIO
 from django.core.files.base import ContentFile
 
@@ -55,7 +55,7 @@ class CustomSocialAccountAdapter(DefaultSocialAccountAdapter):
             # Handle profile picture
             if 'picture' in extra_data:
                 try:
-                    response = requests.get(extra_data['picture'])
+                    response = provider_http.get(extra_data['picture'], provider='avatars', timeout=15)
                     if response.status_code == 200:
                         img_content = ContentFile(response.content)
                         user.profile_picture.save(
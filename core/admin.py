@@ -1,6 +1,7 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
-from .models import CustomUser, Post, GeneratedImage, Comment, Like, StylePreset, Feedback
+from django.db.models import Count
+from .models import CustomUser, Post, GeneratedImage, GenerationJob, Comment, Like, StylePreset, Feedback, Hashtag, MediaBlob
 
 class CustomUserAdmin(UserAdmin):
     list_display = ('username', 'email', 'first_name', 'last_name', 'is_staff', 'date_joined')
@@ -19,7 +20,19 @@ class GeneratedImageAdmin(admin.ModelAdmin):
     list_display = ('id', 'user', 'prompt_preview', 'style_preset', 'generation_source', 'is_public', 'created_at')
     list_filter = ('style_preset', 'generation_source', 'is_public', 'created_at', 'user')
     search_fields = ('prompt', 'user__username')
-    readonly_fields = ('id', 'created_at')
+    readonly_fields = ('id', 'created_at', 'file_size', 'pixel_width', 'pixel_height', 'file_format', 'content_hash')
+    ordering = ('-created_at',)
+    
+    def prompt_preview(self, obj):
+        return obj.prompt[:50] + '...' if len(obj.prompt) > 50 else obj.prompt
+    prompt_preview.short_description = 'Prompt'
+
+@admin.register(GenerationJob)
+class GenerationJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'user', 'prompt_preview', 'status', 'created_at', 'finished_at')
+    list_filter = ('status', 'created_at')
+    search_fields = ('prompt', 'user__username')
+    readonly_fields = ('id', 'created_at', 'started_at', 'finished_at')
     ordering = ('-created_at',)
     
     def prompt_preview(self, obj):
@@ -28,10 +41,10 @@ class GeneratedImageAdmin(admin.ModelAdmin):
 
 @admin.register(Post)
 class PostAdmin(admin.ModelAdmin):
-    list_display = ('id', 'user', 'title_preview', 'is_public', 'created_at')
+    list_display = ('id', 'user', 'title_preview', 'is_public', 'likes_count', 'comments_count', 'created_at')
     list_filter = ('is_public', 'created_at', 'user')
     search_fields = ('title', 'description', 'user__username')
-    readonly_fields = ('id', 'created_at', 'updated_at')
+    readonly_fields = ('id', 'likes_count', 'comments_count', 'created_at', 'updated_at')
     ordering = ('-created_at',)
     
     def title_preview(self, obj):
@@ -68,6 +81,28 @@ class StylePresetAdmin(admin.ModelAdmin):
         return obj.description[:50] + '...' if len(obj.description) > 50 else obj.description
     description_preview.short_description = 'Description'
 
+@admin.register(Hashtag)
+class HashtagAdmin(admin.ModelAdmin):
+    list_display = ('name', 'image_count', 'created_at')
+    search_fields = ('name',)
+    readonly_fields = ('created_at',)
+    ordering = ('name',)
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(image_count=Count('image_links'))
+
+    def image_count(self, obj):
+        return obj.image_count
+    image_count.short_description = 'Images'
+    image_count.admin_order_field = 'image_count'
+
+@admin.register(MediaBlob)
+class MediaBlobAdmin(admin.ModelAdmin):
+    list_display = ('name', 'size', 'refcount', 'created_at')
+    search_fields = ('name', 'content_hash')
+    readonly_fields = ('name', 'content_hash', 'size', 'refcount', 'created_at')
+    ordering = ('-created_at',)
+
 @admin.register(Feedback)
 class FeedbackAdmin(admin.ModelAdmin):
     list_display = ('id', 'user', 'rating', 'message_preview', 'created_at')
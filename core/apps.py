@@ -5,5 +5,5 @@ class CoreConfig(AppConfig):
     name = 'core'
     
     def ready(self):
-        # Import signals if needed
-        pass
+        # Connect the signal handlers (social profile sync, homepage cache invalidation)
+        from . import signals  # noqa: F401
@@ -0,0 +1,66 @@
+"""
+Bounded parallel backfills over stored files.
+
+Management commands that read or rewrite one file per row (thumbnails, file
+metadata, the content-addressed migration) stream rows from a queryset
+iterator into a thread pool. bounded_map() keeps at most `workers *
+IN_FLIGHT_PER_WORKER` rows submitted at a time, so memory stays flat however
+many rows there are; Executor.map() would submit the whole iterator up front.
+Database writes stay on the calling thread.
+"""
+
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from itertools import islice
+
+from django.core.files.storage import default_storage
+
+IN_FLIGHT_PER_WORKER = 4
+PROGRESS_EVERY = 100
+
+
+def bounded_map(func, items, workers=4, in_flight_per_worker=IN_FLIGHT_PER_WORKER):
+    """Yield func(item) for every item, in completion order, with a bounded number of items in flight."""
+    workers = max(1, workers)
+    items = iter(items)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = {executor.submit(func, item) for item in islice(items, workers * in_flight_per_worker)}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for item in islice(items, len(done)):
+                pending.add(executor.submit(func, item))
+            for future in done:
+                yield future.result()
+
+
+def backfill_images(images, compute, apply, stdout, workers=4, storage=default_storage):
+    """
+    Run compute(file name) for each GeneratedImage in `images` in the pool,
+    then apply(image, result) on this thread.
+
+    Missing files and errors are reported and skipped. Returns (done,
+    missing, failed).
+    """
+    def process(image):
+        name = image.image.name
+        if not storage.exists(name):
+            return image, None, 'missing file'
+        try:
+            return image, compute(name), None
+        except Exception as e:
+            return image, None, str(e)
+
+    done = missing = failed = 0
+    for image, result, error in bounded_map(process, images.iterator(), workers):
+        if error == 'missing file':
+            missing += 1
+            stdout.write(f"  ⚠️ {image.image.name}: file not found")
+        elif error:
+            failed += 1
+            stdout.write(f"  ❌ {image.image.name}: {error}")
+        else:
+            apply(image, result)
+            done += 1
+            if done % PROGRESS_EVERY == 0:
+                stdout.write(f"  {done} image(s) done...")
+
+    return done, missing, failed
@@ -0,0 +1,182 @@
+"""
+Per-provider circuit breakers.
+
+State lives in the Django cache so every worker process shares it (use a
+shared cache backend such as Redis or Memcached in production; the default
+LocMemCache is per process). While a provider's circuit is open, calls fail
+immediately with CircuitOpenError so the fallback chain moves on to the next
+provider instead of waiting for another timeout.
+
+Counters are updated with cache.incr() and the open/probe markers with
+cache.add(), so concurrent workers never lose each other's updates.
+"""
+
+import functools
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a provider whose circuit is open."""
+
+
+class CircuitBreaker:
+    """Closed -> open after N consecutive failures -> half-open after a cooldown."""
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, name, failure_threshold=None, cooldown=None, max_call_time=None):
+        self.name = name
+        self.failure_threshold = failure_threshold or getattr(settings, 'CIRCUIT_BREAKER_FAILURE_THRESHOLD', 3)
+        self.cooldown = cooldown or getattr(settings, 'CIRCUIT_BREAKER_COOLDOWN', 60)
+        # A probe holds the half-open slot until it returns, so the lock must
+        # outlive the slowest call (it is released as soon as the call ends)
+        self.probe_timeout = max(
+            self.cooldown,
+            max_call_time or getattr(settings, 'CIRCUIT_BREAKER_PROBE_TIMEOUT', 300)
+        )
+        self.key_prefix = f'circuit_breaker:{name}'
+        self.probe_key = f'{self.key_prefix}:probe'
+        # Each field is its own cache key; counters only change through
+        # cache.incr(), so concurrent workers never overwrite each other's counts
+        self.keys = {
+            field: f'{self.key_prefix}:{field}'
+            for field in ('failures', 'opened_at', 'total_calls', 'total_failures', 'avg_latency_ms', 'last_error')
+        }
+
+    @property
+    def state_timeout(self):
+        # Keep entries around long enough to outlive several cooldowns
+        return max(self.cooldown * 10, 3600)
+
+    def _incr(self, field):
+        key = self.keys[field]
+        try:
+            return cache.incr(key)
+        except ValueError:
+            # Missing key: create it, unless another worker just did
+            if cache.add(key, 1, timeout=self.state_timeout):
+                return 1
+            return cache.incr(key)
+
+    def get_state(self):
+        """Return a snapshot of the shared state for this provider."""
+        values = cache.get_many(list(self.keys.values()))
+        state = {field: values.get(key) for field, key in self.keys.items()}
+        for field in ('failures', 'total_calls', 'total_failures'):
+            state[field] = state[field] or 0
+        state['last_error'] = state['last_error'] or ''
+
+        if state['opened_at'] is None:
+            state['state'] = self.CLOSED
+        elif time.time() - state['opened_at'] >= self.cooldown and cache.get(self.probe_key):
+            state['state'] = self.HALF_OPEN
+        else:
+            state['state'] = self.OPEN
+        return state
+
+    def allow_request(self):
+        """
+        Return (allowed, probe): whether the provider may be called right now,
+        and whether this call is the single half-open probe.
+        """
+        opened_at = cache.get(self.keys['opened_at'])
+
+        if opened_at is None:
+            return True, False
+
+        if time.time() - opened_at < self.cooldown:
+            return False, False
+
+        # Cooldown elapsed: let exactly one caller (across all processes) probe
+        allowed = cache.add(self.probe_key, 1, timeout=self.probe_timeout)
+        return allowed, allowed
+
+    def _record(self, latency):
+        self._incr('total_calls')
+        # A moving average; a lost update here only skews it slightly
+        latency_ms = round(latency * 1000, 1)
+        average = cache.get(self.keys['avg_latency_ms'])
+        if average is not None:
+            latency_ms = round(average * 0.8 + latency_ms * 0.2, 1)
+        cache.set(self.keys['avg_latency_ms'], latency_ms, timeout=self.state_timeout)
+
+    def record_success(self, latency, probe=False):
+        self._record(latency)
+        cache.set(self.keys['failures'], 0, timeout=self.state_timeout)
+        if cache.get(self.keys['opened_at']) is not None:
+            print(f"🟢 Circuit for {self.name} closed again")
+            cache.delete(self.keys['opened_at'])
+        if probe:
+            cache.delete(self.probe_key)
+
+    def record_failure(self, latency, error, probe=False):
+        self._record(latency)
+        failures = self._incr('failures')
+        self._incr('total_failures')
+        cache.set(self.keys['last_error'], str(error)[:200], timeout=self.state_timeout)
+
+        if probe:
+            # The probe failed: stay open for another cooldown
+            cache.set(self.keys['opened_at'], time.time(), timeout=self.state_timeout)
+            cache.delete(self.probe_key)
+        elif failures >= self.failure_threshold:
+            if cache.add(self.keys['opened_at'], time.time(), timeout=self.state_timeout):
+                print(f"🔴 Circuit for {self.name} opened after {failures} failure(s)")
+
+    def call(self, func, *args, **kwargs):
+        """Call func through the breaker, raising CircuitOpenError if the circuit is open."""
+        allowed, probe = self.allow_request()
+        if not allowed:
+            raise CircuitOpenError(f"{self.name} is temporarily unavailable (circuit open)")
+
+        start = time.monotonic()
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            self.record_failure(time.monotonic() - start, e, probe)
+            raise
+        self.record_success(time.monotonic() - start, probe)
+        return result
+
+    def reset(self):
+        cache.delete_many([*self.keys.values(), self.probe_key])
+
+
+# Breakers created by the decorator, by name, for dashboards
+_breakers = {}
+
+
+def get_circuit_breaker(name, max_call_time=None):
+    """Return the process-wide breaker object for a provider name."""
+    if name not in _breakers:
+        _breakers[name] = CircuitBreaker(name, max_call_time=max_call_time)
+    return _breakers[name]
+
+
+def get_all_circuit_breakers():
+    return dict(_breakers)
+
+
+def circuit_breaker(name, max_call_time=None):
+    """
+    Decorator that routes every call of a provider function through its breaker.
+
+    `max_call_time` is the longest the function can take in seconds
+    (timeouts, retries and waits added up); a half-open probe holds its lock
+    that long at most. Defaults to CIRCUIT_BREAKER_PROBE_TIMEOUT.
+    """
+    def decorator(func):
+        breaker = get_circuit_breaker(name, max_call_time)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            return breaker.call(func, *args, **kwargs)
+
+        wrapper.circuit_breaker = breaker
+        return wrapper
+    return decorator
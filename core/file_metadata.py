@@ -0,0 +1,63 @@
+"""
+Stored-file metadata for generated images.
+
+Byte size, pixel dimensions, format and SHA-256 are measured once, when the
+generation job stores the file, and kept on the GeneratedImage row. Pages and
+the service dashboard then read columns instead of stat()-ing or opening files
+(`width`/`height` are only what was requested from the provider).
+`manage.py backfill_file_metadata` measures rows saved before this existed.
+"""
+
+import hashlib
+import os
+
+from django.core.files.storage import default_storage
+from PIL import Image, UnidentifiedImageError
+
+CHUNK_SIZE = 64 * 1024
+
+METADATA_FIELDS = ('file_size', 'pixel_width', 'pixel_height', 'file_format', 'content_hash')
+
+
+def read_file_metadata(image_name, storage=default_storage, sha256=None):
+    """
+    Measure a stored file. Returns a dict keyed by METADATA_FIELDS.
+
+    Pass `sha256` when the hash is already known (media_ingest computes it
+    while downloading) to skip re-reading the file. Files Pillow cannot
+    identify keep null dimensions and take their format from the extension.
+    """
+    metadata = {'file_size': storage.size(image_name)}
+
+    with storage.open(image_name, 'rb') as f:
+        if sha256 is None:
+            digest = hashlib.sha256()
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+                digest.update(chunk)
+            sha256 = digest.hexdigest()
+            f.seek(0)
+        try:
+            # Only the header is parsed; pixel data is never decoded
+            with Image.open(f) as image:
+                metadata['pixel_width'], metadata['pixel_height'] = image.size
+                metadata['file_format'] = (image.format or '').lower()
+        except UnidentifiedImageError:
+            metadata['pixel_width'] = metadata['pixel_height'] = None
+            metadata['file_format'] = os.path.splitext(image_name)[1].lstrip('.').lower()
+
+    metadata['content_hash'] = sha256
+    return metadata
+
+
+def store_file_metadata(generated_image, storage=default_storage, sha256=None):
+    """
+    Measure a GeneratedImage's file and record it on the row.
+
+    Returns the metadata dict. The columns are written with a queryset
+    update(), which skips post_save handlers such as search indexing.
+    """
+    metadata = read_file_metadata(generated_image.image.name, storage, sha256)
+    type(generated_image).objects.filter(pk=generated_image.pk).update(**metadata)
+    for field, value in metadata.items():
+        setattr(generated_image, field, value)
+    return metadata
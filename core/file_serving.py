@@ -0,0 +1,154 @@
+"""
+Protected file downloads.
+
+serve_file() answers a download without reading the file into Python:
+
+- With DOWNLOAD_SENDFILE_BACKEND = 'x-accel' (nginx) or 'x-sendfile' (Apache
+  mod_xsendfile, lighttpd) the response is empty and the front-end server
+  sends the file itself, after Django has checked permissions.
+- Otherwise a FileResponse streams it. Under gunicorn/uWSGI a whole-file
+  response goes through wsgi.file_wrapper, i.e. sendfile(2).
+
+Either way the response carries an ETag and Last-Modified built from the
+file's stat, so repeat requests get 304s, and a single "Range: bytes=..."
+returns 206 Partial Content so interrupted downloads can resume.
+"""
+
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import content_disposition_header, http_date
+
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class RangeNotSatisfiable(ValueError):
+    """Raised for a Range header that lies entirely past the end of the file."""
+
+
+class FileRange:
+    """Read-only view of the next `length` bytes of an open file."""
+
+    def __init__(self, file, length):
+        self.file = file
+        self.remaining = length
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b''
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+def file_etag(stat):
+    return f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+
+
+def parse_range(header, size):
+    """
+    Return the inclusive (start, end) of a single byte range, or None to send
+    the whole file (no header, bad syntax, or several ranges).
+
+    Raises RangeNotSatisfiable when the range starts past the end of the file.
+    """
+    match = RANGE_RE.match((header or '').strip())
+    if not match or match.groups() == ('', ''):
+        return None
+
+    first, last = match.groups()
+    if not first:
+        # "bytes=-500" is the last 500 bytes
+        suffix = int(last)
+        if suffix == 0:
+            raise RangeNotSatisfiable(header)
+        return max(0, size - suffix), size - 1
+
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size:
+        raise RangeNotSatisfiable(header)
+    if end < start:
+        return None
+    return start, end
+
+
+def sendfile_response(path):
+    """Empty response telling the front-end server to send `path`, or None if not configured."""
+    backend = getattr(settings, 'DOWNLOAD_SENDFILE_BACKEND', '')
+
+    if backend == 'x-accel':
+        relative = os.path.relpath(path, settings.MEDIA_ROOT)
+        if relative.startswith('..'):
+            return None
+        response = HttpResponse()
+        prefix = getattr(settings, 'DOWNLOAD_SENDFILE_PREFIX', '/protected-media/')
+        response['X-Accel-Redirect'] = prefix.rstrip('/') + '/' + quote(relative.replace(os.sep, '/'))
+        return response
+
+    if backend == 'x-sendfile':
+        response = HttpResponse()
+        response['X-Sendfile'] = os.path.abspath(path)
+        return response
+
+    return None
+
+
+def serve_file(request, path, filename, content_type=None):
+    """Download response for the file at `path`, sent as attachment `filename`."""
+    stat = os.stat(path)
+    etag = file_etag(stat)
+    last_modified = http_date(stat.st_mtime)
+
+    response = get_conditional_response(request, etag=etag, last_modified=int(stat.st_mtime))
+    if response is None:
+        response = sendfile_response(path)
+
+    if response is None:
+        # If-Range: only resume when the client still has this version
+        if_range = request.headers.get('If-Range')
+        byte_range = None
+        if not if_range or if_range in (etag, last_modified):
+            try:
+                byte_range = parse_range(request.headers.get('Range'), stat.st_size)
+            except RangeNotSatisfiable:
+                response = HttpResponse(status=416)
+                response['Content-Range'] = f'bytes */{stat.st_size}'
+                return response
+
+        file = open(path, 'rb')
+        if byte_range:
+            start, end = byte_range
+            file.seek(start)
+            # The wrapper hides fileno(), so WSGI servers read it instead of
+            # sendfile()-ing the whole file from the start
+            response = FileResponse(FileRange(file, end - start + 1), content_type=content_type)
+            response.status_code = 206
+            response['Content-Range'] = f'bytes {start}-{end}/{stat.st_size}'
+            response['Content-Length'] = end - start + 1
+        else:
+            response = FileResponse(file, content_type=content_type)
+        response.block_size = DOWNLOAD_CHUNK_SIZE
+    elif response.status_code == 200 and content_type:
+        # Front-end servers keep the Content-Type set here
+        response['Content-Type'] = content_type
+
+    if response.status_code in (200, 206):
+        response['Content-Disposition'] = content_disposition_header(True, filename)
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    response['Last-Modified'] = last_modified
+    # Downloads are permission-checked, so only the browser may keep a copy
+    patch_cache_control(response, private=True)
+    return response
@@ -1,67 +1,218 @@
+"""
+File-based storage for non-critical data (data_storage/).
+
+The generation log is append-only JSON lines, split into numbered segments
+(generation_log.<n>.jsonl) that rotate at GENERATION_LOG_MAX_BYTES. Each
+write appends one line to the active segment and one "segment offset length"
+record to the user's index file (generation_index/<user_id>.idx), both under
+an exclusive flock, so concurrent workers never interleave writes and a write
+costs the same however long the log is. Reading a user's history follows
+their index straight to their lines without scanning the log.
+
+Only the newest GENERATION_LOG_MAX_SEGMENTS segments are kept: each rotation
+deletes older ones and rewrites the index files without their records.
+Locking uses fcntl.flock on POSIX and msvcrt.locking on Windows.
+
+User preferences are served by core.preferences_store.
+"""
+
 import json
 import os
+import re
+import tempfile
+import time
+from contextlib import contextmanager
 from datetime import datetime
 from django.conf import settings
 
+from .preferences_store import PreferencesStore
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+LOG_SEGMENT_RE = re.compile(r'^generation_log\.(\d+)\.jsonl$')
+
 class FileStorage:
     """Simple file-based storage for non-critical data."""
     
     def __init__(self):
         self.storage_dir = os.path.join(settings.BASE_DIR, 'data_storage')
         os.makedirs(self.storage_dir, exist_ok=True)
+        self.index_dir = os.path.join(self.storage_dir, 'generation_index')
+        self._segment = None
+        self.preferences = PreferencesStore(self.storage_dir)
     
-    def save_generation_log(self, user_id, prompt, image_path):
-        """Save image generation log to file."""
-        log_file = os.path.join(self.storage_dir, 'generation_log.json')
-        
-        # Load existing data
-        if os.path.exists(log_file):
-            with open(log_file, 'r') as f:
-                data = json.load(f)
-        else:
-            data = []
+    @property
+    def max_log_bytes(self):
+        return getattr(settings, 'GENERATION_LOG_MAX_BYTES', 10 * 1024 * 1024)
+    
+    @property
+    def max_log_segments(self):
+        return getattr(settings, 'GENERATION_LOG_MAX_SEGMENTS', 10)
+    
+    @contextmanager
+    def _log_lock(self):
+        """Exclusive lock shared by every process writing the generation log."""
+        with open(os.path.join(self.storage_dir, 'generation_log.lock'), 'a+b') as lock_file:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            else:
+                # Locks the file's first byte; LK_LOCK gives up after ~10 s, so keep trying
+                lock_file.seek(0)
+                while True:
+                    try:
+                        msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+                        break
+                    except OSError:
+                        time.sleep(0.1)
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+                else:
+                    lock_file.seek(0)
+                    msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+    
+    def _segment_path(self, segment):
+        return os.path.join(self.storage_dir, f'generation_log.{segment}.jsonl')
+    
+    def _index_path(self, user_id):
+        safe_id = re.sub(r'[^A-Za-z0-9_-]', '_', str(user_id))
+        return os.path.join(self.index_dir, f'{safe_id}.idx')
+    
+    def _segment_size(self, segment):
+        try:
+            return os.path.getsize(self._segment_path(segment))
+        except FileNotFoundError:
+            return None
+    
+    def _segments(self):
+        return sorted(int(m.group(1)) for m in map(LOG_SEGMENT_RE.match, os.listdir(self.storage_dir)) if m)
+    
+    def _active_segment(self):
+        """Segment to append to, rotating when it is full. Call with the lock held."""
+        segment = self._segment
+        size = self._segment_size(segment) if segment else None
+        if size is None or size >= self.max_log_bytes:
+            # First write in this process, or full (possibly already rotated by another worker)
+            segment = max(self._segments(), default=1)
+            size = self._segment_size(segment)
+            if size is not None and size >= self.max_log_bytes:
+                segment += 1
+                self._prune_segments(keep_from=segment - self.max_log_segments + 1)
+            self._segment = segment
+        return segment
+    
+    def _prune_segments(self, keep_from):
+        """Delete segments numbered below `keep_from` and their index records. Call with the lock held."""
+        expired = [segment for segment in self._segments() if segment < keep_from]
+        if not expired:
+            return
+        for segment in expired:
+            os.remove(self._segment_path(segment))
         
-        # Add new entry
+        if os.path.isdir(self.index_dir):
+            for name in os.listdir(self.index_dir):
+                if name.endswith('.idx'):
+                    self._compact_index(os.path.join(self.index_dir, name), keep_from)
+        print(f"🧹 Pruned {len(expired)} generation log segment(s)")
+    
+    def _compact_index(self, index_path, keep_from):
+        """Rewrite an index without records for deleted segments; readers see the old or new file whole."""
+        with open(index_path, 'r') as f:
+            # Whole records only; a torn line from a crashed writer is dropped
+            records = [
+                line for line in f
+                if line.endswith('\n') and len(line.split()) == 3 and int(line.split()[0]) >= keep_from
+            ]
+        if not records:
+            os.remove(index_path)
+            return
+        fd, temp_path = tempfile.mkstemp(dir=self.index_dir, suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            f.writelines(records)
+        os.replace(temp_path, index_path)
+    
+    def _append_entries(self, entries):
+        """Append log entries and their index records. Call with the lock held."""
+        for entry in entries:
+            segment = self._active_segment()
+            line = (json.dumps(entry) + '\n').encode('utf-8')
+            with open(self._segment_path(segment), 'ab') as log:
+                offset = log.tell()
+                log.write(line)
+            # The line is complete before the index points at it, so readers need no lock
+            os.makedirs(self.index_dir, exist_ok=True)
+            with open(self._index_path(entry['user_id']), 'a') as index:
+                index.write(f'{segment} {offset} {len(line)}\n')
+    
+    def _migrate_legacy_log(self):
+        """Import the old single-JSON-array log once. Call with the lock held."""
+        legacy_file = os.path.join(self.storage_dir, 'generation_log.json')
+        if os.path.exists(legacy_file):
+            with open(legacy_file, 'r') as f:
+                self._append_entries(json.load(f))
+            os.replace(legacy_file, legacy_file + '.migrated')
+    
+    def save_generation_log(self, user_id, prompt, image_path):
+        """Append an image generation to the log."""
         entry = {
             'user_id': str(user_id),
             'prompt': prompt,
             'image_path': image_path,
             'timestamp': datetime.now().isoformat()
         }
-        data.append(entry)
         
-        # Save back to file
-        with open(log_file, 'w') as f:
-            json.dump(data, f, indent=2)
+        with self._log_lock():
+            self._migrate_legacy_log()
+            self._append_entries([entry])
     
-    def get_user_generations(self, user_id):
-        """Get all generations for a user."""
-        log_file = os.path.join(self.storage_dir, 'generation_log.json')
+    def get_user_generations(self, user_id, limit=None):
+        """Get a user's generations, oldest first; only the last `limit` if given."""
+        if os.path.exists(os.path.join(self.storage_dir, 'generation_log.json')):
+            with self._log_lock():
+                self._migrate_legacy_log()
         
-        if not os.path.exists(log_file):
+        index_path = self._index_path(user_id)
+        if not os.path.exists(index_path):
             return []
         
-        with open(log_file, 'r') as f:
-            data = json.load(f)
+        with open(index_path, 'r') as f:
+            # A record still being written has no newline yet
+            records = [line.split() for line in f.read().split('\n')[:-1]]
+        records = [record for record in records if len(record) == 3]
+        if limit is not None:
+            records = records[-limit:] if limit > 0 else []
         
-        return [entry for entry in data if entry['user_id'] == str(user_id)]
+        entries = []
+        handles = {}
+        try:
+            for segment, offset, length in records:
+                if segment not in handles:
+                    path = self._segment_path(segment)
+                    handles[segment] = open(path, 'rb') if os.path.exists(path) else None
+                log = handles[segment]
+                if log is None:
+                    continue  # Segment pruned since the index was read
+                log.seek(int(offset))
+                entries.append(json.loads(log.read(int(length))))
+        finally:
+            for log in handles.values():
+                if log:
+                    log.close()
+        return entries
     
     def save_user_preferences(self, user_id, preferences):
-        """Save user preferences to file."""
-        prefs_file = os.path.join(self.storage_dir, f'user_{user_id}_prefs.json')
-        
-        with open(prefs_file, 'w') as f:
-            json.dump(preferences, f, indent=2)
+        """Save user preferences (written through to the cache tiers)."""
+        self.preferences.save(user_id, preferences)
     
     def get_user_preferences(self, user_id):
-        """Get user preferences from file."""
-        prefs_file = os.path.join(self.storage_dir, f'user_{user_id}_prefs.json')
-        
-        if not os.path.exists(prefs_file):
-            return {}
-        
-        with open(prefs_file, 'r') as f:
-            return json.load(f)
+        """Get user preferences, from memory when recently read."""
+        return self.preferences.get(user_id)
 
 # Global instance
 file_storage = FileStorage()
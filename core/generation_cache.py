@@ -0,0 +1,187 @@
+"""
+Generation result cache.
+
+Results are keyed by a SHA-256 of (full_prompt, style_preset, width, height,
+seed, provider). Cached images live under MEDIA_ROOT/generation_cache/ and are
+hard-linked into generated_images/ on a hit, so repeated requests cost neither
+an upstream call nor extra disk space. Entries expire after
+GENERATION_CACHE_TTL seconds and the least recently used ones are evicted once
+the cache grows past GENERATION_CACHE_MAX_BYTES.
+"""
+
+import hashlib
+import json
+import os
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from .models import GenerationCacheEntry
+
+CACHE_DIR = 'generation_cache'
+
+
+class GenerationCache:
+    """Content-addressed cache of provider results with LRU/TTL eviction."""
+
+    @property
+    def enabled(self):
+        return getattr(settings, 'GENERATION_CACHE_ENABLED', True)
+
+    @property
+    def ttl(self):
+        return getattr(settings, 'GENERATION_CACHE_TTL', 7 * 24 * 3600)
+
+    @property
+    def max_bytes(self):
+        return getattr(settings, 'GENERATION_CACHE_MAX_BYTES', 500 * 1024 * 1024)
+
+    def is_cacheable(self, provider):
+        """Only providers that return the same image for the same request are cached."""
+        return self.enabled and provider in getattr(settings, 'GENERATION_CACHE_PROVIDERS', ['mock'])
+
+    @staticmethod
+    def make_key(full_prompt, provider, style_preset=None, width=512, height=512, seed=None):
+        style_name = getattr(style_preset, 'name', style_preset)
+        raw = json.dumps([full_prompt, style_name, width, height, seed, provider])
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def count_miss(self):
+        """Record one miss, for callers that look up several keys per request."""
+        self._count('misses')
+
+    def _count(self, counter):
+        counter_key = f'generation_cache:{counter}'
+        cache.add(counter_key, 0, timeout=None)
+        try:
+            cache.incr(counter_key)
+        except ValueError:
+            cache.set(counter_key, 1, timeout=None)
+
+    def get(self, key, count_miss=True):
+        """
+        Return (File, metadata) for a live entry, or None on a miss.
+
+        Pass count_miss=False when one request may look up several keys, and
+        call count_miss() once if none of them hit.
+        """
+        entry = GenerationCacheEntry.objects.filter(key=key).first()
+
+        if entry and entry.created_at < timezone.now() - timedelta(seconds=self.ttl):
+            self._delete_entries([entry])
+            entry = None
+
+        if entry:
+            path = default_storage.path(entry.file_path)
+            if not os.path.exists(path):
+                entry.delete()
+                entry = None
+
+        if not entry:
+            if count_miss:
+                self._count('misses')
+            return None
+
+        GenerationCacheEntry.objects.filter(key=key).update(
+            hits=F('hits') + 1,
+            last_accessed_at=timezone.now()
+        )
+        self._count('hits')
+        print(f"♻️ Generation cache hit for {entry.provider} ({entry.key[:12]})")
+
+        image_file = File(open(path, 'rb'), name=os.path.basename(path))
+        image_file.cache_path = path
+        return image_file, dict(entry.metadata)
+
+    def put(self, key, provider, image_content, metadata):
+        """Store a provider result and evict entries over the TTL or byte budget."""
+        try:
+            name = f'{CACHE_DIR}/{key[:2]}/{key}.png'
+            if default_storage.exists(name):
+                default_storage.delete(name)
+
+            # Save a copy through a plain File wrapper: a streamed IngestedFile would
+            # otherwise be moved here, and the caller still needs it afterwards
+            image_content.seek(0)
+            stored_name = default_storage.save(name, File(image_content.file, name=os.path.basename(name)))
+            image_content.seek(0)
+
+            GenerationCacheEntry.objects.update_or_create(
+                key=key,
+                defaults={
+                    'provider': provider,
+                    'file_path': stored_name,
+                    'size': default_storage.size(stored_name),
+                    'metadata': metadata,
+                    'last_accessed_at': timezone.now(),
+                }
+            )
+            self.evict()
+        except Exception as e:
+            print(f"⚠️ Could not cache generation result: {e}")
+
+    def link_into_storage(self, cache_path, name):
+        """Hard-link a cached file to a new storage name. Returns the stored name, or None."""
+        if getattr(default_storage, 'reference_counted', False):
+            # The storage deduplicates the copy by content itself
+            return None
+        target_name = default_storage.get_available_name(name)
+        target_path = default_storage.path(target_name)
+        os.makedirs(os.path.dirname(target_path), exist_ok=True)
+        try:
+            os.link(cache_path, target_path)
+        except OSError as e:
+            print(f"⚠️ Hard link failed, copying instead: {e}")
+            return None
+        return target_name
+
+    def _delete_entries(self, entries):
+        for entry in entries:
+            try:
+                default_storage.delete(entry.file_path)
+            except Exception as e:
+                print(f"⚠️ Could not delete cached file {entry.file_path}: {e}")
+        GenerationCacheEntry.objects.filter(key__in=[entry.key for entry in entries]).delete()
+
+    def evict(self):
+        """Drop expired entries, then least recently used ones until under the byte budget."""
+        expired = list(GenerationCacheEntry.objects.filter(
+            created_at__lt=timezone.now() - timedelta(seconds=self.ttl)
+        ))
+        if expired:
+            self._delete_entries(expired)
+
+        total = GenerationCacheEntry.objects.aggregate(total=Sum('size'))['total'] or 0
+        if total <= self.max_bytes:
+            return
+
+        victims = []
+        for entry in GenerationCacheEntry.objects.order_by('last_accessed_at').only('key', 'file_path', 'size'):
+            if total <= self.max_bytes:
+                break
+            victims.append(entry)
+            total -= entry.size
+        self._delete_entries(victims)
+        print(f"🧹 Evicted {len(victims)} generation cache entries")
+
+    def stats(self):
+        totals = GenerationCacheEntry.objects.aggregate(total=Sum('size'))
+        return {
+            'entries': GenerationCacheEntry.objects.count(),
+            'bytes': totals['total'] or 0,
+            'max_bytes': self.max_bytes,
+            'hits': cache.get('generation_cache:hits', 0),
+            'misses': cache.get('generation_cache:misses', 0),
+        }
+
+    def clear(self):
+        self._delete_entries(list(GenerationCacheEntry.objects.all()))
+
+
+# Global instance
+generation_cache = GenerationCache()
@@ -0,0 +1,283 @@
+"""
+Image generation job queue.
+
+A POST to the generate page only creates a GenerationJob row; the slow
+provider fallback chain runs here, outside the request/response cycle.
+
+Backends (settings.GENERATION_JOB_BACKEND):
+    'thread' - in-process worker pool (default, works offline)
+    'db'     - jobs stay in the database until `manage.py run_generation_worker`
+               claims them
+    'celery' - jobs are handed to a Celery worker (core.tasks)
+
+Jobs are dispatched once, when their row commits, so a restart can strand
+them. sweep_stale_jobs() dispatches pending jobs again after
+GENERATION_JOB_REQUEUE_AFTER seconds and fails jobs that have not finished
+GENERATION_JOB_TIMEOUT seconds after they were queued (pending) or started
+(running). The 'thread' backend sweeps from a background thread, the 'db'
+worker between polls, and Celery through core.tasks.sweep_generation_jobs_task.
+"""
+
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from .models import GenerationJob, GeneratedImage
+from .hashtag_generator import HashtagGenerator
+from .generation_cache import generation_cache
+from .file_metadata import store_file_metadata
+from .thumbnails import create_thumbnails
+
+
+def claim_job(job_id):
+    """Atomically move a pending job to running. Returns False if another worker got it."""
+    claimed = GenerationJob.objects.filter(id=job_id, status='pending').update(
+        status='running',
+        started_at=timezone.now()
+    )
+    return claimed == 1
+
+
+def save_generated_image(job, image_content, source, metadata):
+    """Create the GeneratedImage for a finished job, store its file and hashtags."""
+    generated_image = GeneratedImage.objects.create(
+        user=job.user,
+        prompt=job.prompt,
+        style_preset=job.style_preset,
+        seed=job.seed,
+        width=job.width,
+        height=job.height,
+        is_public=True,
+        generation_source=source,
+        generation_metadata=metadata
+    )
+
+    file_name = f'generated_{generated_image.id}.png'
+    cache_path = getattr(image_content, 'cache_path', None)
+    linked_name = None
+    if cache_path:
+        # Cache hit: share the cached file's blocks instead of writing a copy
+        linked_name = generation_cache.link_into_storage(
+            cache_path,
+            generated_image.image.field.generate_filename(generated_image, file_name)
+        )
+
+    # Streamed downloads were hashed on the way in
+    sha256 = getattr(image_content, 'sha256', None)
+    try:
+        if linked_name:
+            generated_image.image.name = linked_name
+            generated_image.save(update_fields=['image'])
+        else:
+            generated_image.image.save(file_name, image_content, save=True)
+    finally:
+        # Releases the cache handle or the (already moved) streamed temp file
+        image_content.close()
+
+    try:
+        store_file_metadata(generated_image, sha256=sha256)
+    except Exception as metadata_error:
+        # Pages fall back to stat() until `manage.py backfill_file_metadata` runs
+        print(f"⚠️ File metadata failed: {metadata_error}")
+
+    try:
+        thumbnails = create_thumbnails(generated_image)
+        print(f"🖼️ Created thumbnails: {thumbnails}")
+    except Exception as thumbnail_error:
+        # Listings fall back to the original until `manage.py generate_thumbnails` runs
+        print(f"⚠️ Thumbnail generation failed: {thumbnail_error}")
+
+    try:
+        hashtags = HashtagGenerator.generate_hashtags(
+            prompt=job.prompt,
+            style_preset=job.style_preset.name if job.style_preset else None,
+            max_hashtags=15
+        )
+        generated_image.set_hashtags_list(hashtags)
+        generated_image.save(update_fields=['hashtags'])
+        print(f"✅ Generated {len(hashtags)} hashtags for image")
+    except Exception as hashtag_error:
+        print(f"⚠️ Hashtag generation failed: {hashtag_error}")
+
+    return generated_image
+
+
+def run_generation_job(job_id):
+    """Run the provider fallback chain for a job and record the outcome."""
+    from .views import generate_image_free_services_with_tracking
+
+    try:
+        if not claim_job(job_id):
+            print(f"⏭️ Generation job {job_id} already claimed, skipping")
+            return
+
+        job = GenerationJob.objects.select_related('user', 'style_preset').get(id=job_id)
+        style_suffix = job.style_preset.prompt_suffix if job.style_preset else ""
+
+        print(f"🛠️ Running generation job {job.id} for {job.user.username}")
+
+        try:
+            image_content, source, metadata = generate_image_free_services_with_tracking(
+                None,
+                job.prompt,
+                style_suffix,
+                style_preset=job.style_preset,
+                width=job.width,
+                height=job.height,
+                seed=job.seed
+            )
+            if not image_content:
+                raise Exception("Image generation returned no content")
+
+            generated_image = save_generated_image(job, image_content, source, metadata)
+
+            job.generated_image = generated_image
+            job.provider_errors = metadata.get('provider_errors', {})
+            job.status = 'succeeded'
+            print(f"💾 Job {job.id} saved image from {source} with ID: {generated_image.id}")
+        except Exception as e:
+            print(f"💥 Generation job {job.id} failed: {e}")
+            traceback.print_exc()
+            job.error = str(e)
+            job.status = 'failed'
+
+        job.finished_at = timezone.now()
+        job.save(update_fields=['generated_image', 'provider_errors', 'status', 'error', 'finished_at'])
+    finally:
+        close_old_connections()
+
+
+def sweep_stale_jobs(dispatch=None):
+    """
+    Requeue or fail jobs a worker lost track of.
+
+    Returns {'requeued': n, 'failed': n}. `dispatch` (default: the global
+    queue's) is called for each requeued job id; claim_job() makes a second
+    dispatch of a job still waiting in some worker harmless, and the 'thread'
+    backend skips jobs already waiting in its own pool.
+    """
+    dispatch = dispatch or generation_queue.dispatch
+    now = timezone.now()
+    timeout = timedelta(seconds=getattr(settings, 'GENERATION_JOB_TIMEOUT', 600))
+    requeue_after = timedelta(seconds=getattr(settings, 'GENERATION_JOB_REQUEUE_AFTER', 60))
+    error = f'Generation timed out after {int(timeout.total_seconds())} seconds. Please try again.'
+
+    failed = GenerationJob.objects.filter(status='running', started_at__lt=now - timeout).update(
+        status='failed', error=error, finished_at=now
+    )
+    failed += GenerationJob.objects.filter(status='pending', created_at__lt=now - timeout).update(
+        status='failed', error=error, finished_at=now
+    )
+
+    stale_ids = list(
+        GenerationJob.objects.filter(status='pending', created_at__lt=now - requeue_after)
+        .order_by('created_at')
+        .values_list('id', flat=True)
+    )
+    for job_id in stale_ids:
+        dispatch(job_id)
+
+    if failed or stale_ids:
+        print(f"🧹 Swept generation jobs: {len(stale_ids)} requeued, {failed} timed out")
+    return {'requeued': len(stale_ids), 'failed': failed}
+
+
+class GenerationJobQueue:
+    """Dispatches GenerationJob rows to the configured worker backend."""
+
+    def __init__(self):
+        self._executor = None
+        self._sweeper = None
+        # Job ids waiting in or running on this process's executor
+        self._submitted = set()
+        self._lock = threading.Lock()
+
+    @property
+    def backend(self):
+        return getattr(settings, 'GENERATION_JOB_BACKEND', 'thread')
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=getattr(settings, 'GENERATION_JOB_WORKERS', 4),
+                    thread_name_prefix='generation-job'
+                )
+            return self._executor
+
+    def start_sweeper(self):
+        """Start the periodic stale job sweep for the 'thread' backend (once per process)."""
+        if self.backend != 'thread':
+            return
+        with self._lock:
+            if self._sweeper is not None:
+                return
+            self._sweeper = threading.Thread(target=self._sweep_forever, name='generation-job-sweeper', daemon=True)
+            self._sweeper.start()
+
+    def _sweep_forever(self):
+        # The first pass picks up jobs stranded by the previous process
+        while True:
+            try:
+                sweep_stale_jobs(self.dispatch)
+            except Exception as e:
+                print(f"⚠️ Generation job sweep failed: {e}")
+            finally:
+                close_old_connections()
+            time.sleep(getattr(settings, 'GENERATION_JOB_SWEEP_INTERVAL', 60))
+
+    def enqueue(self, user, prompt, style_preset=None, seed=None, width=512, height=512):
+        """Create a pending job and dispatch it once the row is committed."""
+        job = GenerationJob.objects.create(
+            user=user,
+            prompt=prompt,
+            style_preset=style_preset,
+            seed=seed,
+            width=width,
+            height=height
+        )
+        transaction.on_commit(lambda: self.dispatch(job.id))
+        self.start_sweeper()
+        return job
+
+    def dispatch(self, job_id):
+        """Hand an existing pending job to the worker backend."""
+        backend = self.backend
+
+        if backend == 'celery':
+            from .tasks import run_generation_job_task
+            run_generation_job_task.delay(str(job_id))
+        elif backend == 'db':
+            # Picked up by `manage.py run_generation_worker`
+            pass
+        else:
+            # The sweeper requeues every old pending job each pass, including
+            # ones still queued here behind slow generations
+            key = str(job_id)
+            with self._lock:
+                if key in self._submitted:
+                    return
+                self._submitted.add(key)
+            try:
+                self._get_executor().submit(self._run_submitted, job_id)
+            except BaseException:
+                with self._lock:
+                    self._submitted.discard(key)
+                raise
+
+    def _run_submitted(self, job_id):
+        try:
+            run_generation_job(job_id)
+        finally:
+            with self._lock:
+                self._submitted.discard(str(job_id))
+
+
+# Global instance
+generation_queue = GenerationJobQueue()
@@ -0,0 +1,57 @@
+"""
+Homepage caching.
+
+The site counters and the active style presets are kept in the default cache
+with short TTLs, and home.html caches its rendered recent-posts fragment. The
+GeneratedImage and StylePreset signal handlers in core.signals drop these
+entries, so a new or deleted image shows up on the next request instead of
+after the TTL. A warm homepage hit runs no queries for any of this.
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+
+from .models import CustomUser, GeneratedImage, StylePreset
+
+STATS_CACHE_KEY = 'homepage:stats'
+STYLE_PRESETS_CACHE_KEY = 'homepage:style_presets'
+RECENT_POSTS_FRAGMENT = 'homepage_recent_posts'
+
+
+def get_stats_ttl():
+    return getattr(settings, 'HOMEPAGE_STATS_TTL', 60)
+
+
+def get_fragment_ttl():
+    return getattr(settings, 'HOMEPAGE_FRAGMENT_TTL', 60)
+
+
+def get_homepage_stats():
+    """Site-wide counters shown on the homepage."""
+    def compute():
+        image_stats = GeneratedImage.get_service_stats()
+        return {
+            'total_users': CustomUser.objects.count(),
+            'total_images': image_stats['total'],
+            'total_posts': image_stats['public'],
+            'total_styles': StylePreset.objects.filter(is_active=True).count(),
+        }
+
+    return cache.get_or_set(STATS_CACHE_KEY, compute, get_stats_ttl())
+
+
+def get_active_style_presets():
+    """Active style presets for the styles modal."""
+    return cache.get_or_set(
+        STYLE_PRESETS_CACHE_KEY,
+        lambda: list(StylePreset.objects.filter(is_active=True)),
+        get_stats_ttl() * 5
+    )
+
+
+def invalidate_homepage(styles=False):
+    keys = [STATS_CACHE_KEY, make_template_fragment_key(RECENT_POSTS_FRAGMENT)]
+    if styles:
+        keys.append(STYLE_PRESETS_CACHE_KEY)
+    cache.delete_many(keys)
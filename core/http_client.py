@@ -0,0 +1,164 @@
+"""
+Shared HTTP client for AI provider calls.
+
+All provider traffic goes through one requests.Session so TCP/TLS connections
+are pooled per host and kept alive between calls and polls. On top of that:
+
+- timeouts are (connect, read): PROVIDER_HTTP_CONNECT_TIMEOUT plus the read
+  timeout each caller already passes
+- connection failures and 429/502/504 responses are retried up to
+  PROVIDER_HTTP_MAX_RETRIES times with jittered exponential backoff, for
+  idempotent methods only unless the caller passes retry=True: a POST may
+  already have started a (billed) prediction when the connection drops or a
+  gateway times out. Connect timeouts never reached the provider, so they are
+  retried for every method
+- PROVIDER_HTTP_CONCURRENCY caps how many requests a provider may have in
+  flight from this process at once; a stream=True response keeps its slot
+  until its body has been read or it is closed
+"""
+
+import functools
+import random
+import threading
+import time
+import weakref
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+RETRY_STATUSES = {429, 502, 504}
+IDEMPOTENT_METHODS = {'GET', 'HEAD', 'OPTIONS'}
+
+
+class ProviderHTTPClient:
+    """Pooled, keep-alive HTTP client with retries and per-provider concurrency limits."""
+
+    def __init__(self):
+        self._session = None
+        self._semaphores = {}
+        self._lock = threading.Lock()
+
+    @property
+    def session(self):
+        with self._lock:
+            if self._session is None:
+                pool_size = getattr(settings, 'PROVIDER_HTTP_POOL_SIZE', 20)
+                adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+                session = requests.Session()
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                self._session = session
+            return self._session
+
+    def _semaphore(self, provider):
+        with self._lock:
+            if provider not in self._semaphores:
+                limits = getattr(settings, 'PROVIDER_HTTP_CONCURRENCY', {})
+                limit = limits.get(provider, limits.get('default', 8))
+                self._semaphores[provider] = threading.BoundedSemaphore(limit)
+            return self._semaphores[provider]
+
+    @staticmethod
+    def _release_when_done(response, semaphore):
+        """Keep a streamed response's concurrency slot until its body is consumed or it is closed."""
+        released = threading.Event()
+
+        def release():
+            if not released.is_set():
+                released.set()
+                semaphore.release()
+
+        # The wrappers reach the response through a weak reference: holding its
+        # bound methods would form a cycle, and the finalizer below would then
+        # only run at cyclic GC instead of as soon as the response is dropped
+        response_ref = weakref.ref(response)
+        response_class = type(response)
+
+        @functools.wraps(response_class.close)
+        def close_and_release():
+            try:
+                owner = response_ref()
+                if owner is not None:
+                    response_class.close(owner)
+            finally:
+                release()
+
+        @functools.wraps(response_class.iter_content)
+        def iter_content_and_release(*args, **kwargs):
+            # .content and .text read through here too
+            try:
+                owner = response_ref()
+                if owner is not None:
+                    yield from response_class.iter_content(owner, *args, **kwargs)
+            finally:
+                release()
+
+        response.close = close_and_release
+        response.iter_content = iter_content_and_release
+        # A response dropped unread still gives its slot back
+        weakref.finalize(response, release)
+
+    def _backoff(self, attempt):
+        base = getattr(settings, 'PROVIDER_HTTP_BACKOFF', 0.5)
+        return base * (2 ** attempt) * random.uniform(0.5, 1.5)
+
+    def request(self, method, url, provider='default', timeout=30, retry=None, **kwargs):
+        """
+        Send a request through the shared pool. `timeout` is the read timeout in seconds.
+
+        `retry` defaults to True for idempotent methods; pass retry=True only
+        for a POST whose endpoint is safe to repeat.
+        """
+        connect_timeout = getattr(settings, 'PROVIDER_HTTP_CONNECT_TIMEOUT', 5)
+        max_retries = getattr(settings, 'PROVIDER_HTTP_MAX_RETRIES', 2)
+        if retry is None:
+            retry = method.upper() in IDEMPOTENT_METHODS
+
+        attempt = 0
+        while True:
+            semaphore = self._semaphore(provider)
+            semaphore.acquire()
+            try:
+                response = self.session.request(
+                    method, url, timeout=(connect_timeout, timeout), **kwargs
+                )
+            except requests.exceptions.ConnectionError as e:
+                semaphore.release()
+                # Read timeouts are not retried: the provider already had its full time budget.
+                # Any other connection error may come after the request was sent.
+                connect_failed = isinstance(e, requests.exceptions.ConnectTimeout)
+                if not (retry or connect_failed) or attempt >= max_retries:
+                    raise
+                delay = self._backoff(attempt)
+                print(f"🔁 {provider} connection error, retrying in {delay:.1f}s: {e}")
+            except BaseException:
+                semaphore.release()
+                raise
+            else:
+                if kwargs.get('stream'):
+                    self._release_when_done(response, semaphore)
+                else:
+                    # Without stream=True the body has already been read
+                    semaphore.release()
+                if not retry or response.status_code not in RETRY_STATUSES or attempt >= max_retries:
+                    return response
+                delay = self._backoff(attempt)
+                retry_after = response.headers.get('Retry-After', '')
+                if retry_after.isdigit():
+                    delay = max(delay, min(int(retry_after), 30))
+                print(f"🔁 {provider} returned {response.status_code}, retrying in {delay:.1f}s")
+                response.close()
+
+            attempt += 1
+            time.sleep(delay)
+
+    def get(self, url, provider='default', timeout=30, retry=None, **kwargs):
+        return self.request('GET', url, provider=provider, timeout=timeout, retry=retry, **kwargs)
+
+    def post(self, url, provider='default', timeout=30, retry=None, **kwargs):
+        return self.request('POST', url, provider=provider, timeout=timeout, retry=retry, **kwargs)
+
+
+# Global instance
+provider_http = ProviderHTTPClient()
@@ -0,0 +1,83 @@
+"""
+Image deletion with deferred file cleanup.
+
+delete_images() removes GeneratedImage rows with a single queryset delete()
+inside a transaction. Only once that commits are their files (the original
+plus its thumbnail variants) removed, on a background thread, so a request
+deleting hundreds of images does not wait on the filesystem and a rolled back
+delete never loses files. GeneratedImage.delete() defers its files the same
+way.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+
+from .thumbnails import variant_names
+
+# One thread is enough: deletes are cheap, they just should not block requests.
+# Pending cleanups finish before the interpreter exits.
+_cleanup_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='media-cleanup')
+
+
+def stored_file_names(image_name, thumbnails):
+    """Every storage name belonging to one image: the original and its variants."""
+    if not image_name:
+        return []
+    return [image_name, *variant_names(image_name, thumbnails)]
+
+
+def delete_files(names, storage=default_storage):
+    """Delete stored files, skipping missing ones. Returns (deleted, failed)."""
+    deleted = failed = 0
+    for name in names:
+        try:
+            if storage.exists(name):
+                storage.delete(name)
+                deleted += 1
+        except Exception as e:
+            failed += 1
+            print(f"⚠️ Could not delete file {name}: {e}")
+    if deleted or failed:
+        print(f"🗑️ Cleaned up {deleted} file(s), {failed} failure(s)")
+    return deleted, failed
+
+
+def delete_files_on_commit(names, storage=default_storage):
+    """Queue files for background deletion once the current transaction commits."""
+    names = list(names)
+    if names:
+        transaction.on_commit(lambda: _cleanup_executor.submit(_cleanup, names, storage))
+
+
+def _cleanup(names, storage):
+    try:
+        delete_files(names, storage)
+    finally:
+        # Storages may touch the database (reference counts) from this thread
+        close_old_connections()
+
+
+def delete_images(queryset, storage=default_storage):
+    """
+    Delete the GeneratedImage rows in `queryset` and, after commit, their files.
+
+    Returns counts: {'images': rows deleted, 'related': cascaded rows,
+    'files': file names queued for cleanup}.
+    """
+    model = queryset.model
+    with transaction.atomic():
+        rows = list(queryset.order_by().values_list('image', 'thumbnails'))
+        deleted, per_model = queryset.delete()
+        images = per_model.get(model._meta.label, 0)
+
+        names = [name for image_name, thumbnails in rows for name in stored_file_names(image_name, thumbnails)]
+        if not getattr(storage, 'reference_counted', False):
+            # Never remove a file another (surviving) row still points at
+            still_used = set(model.objects.filter(image__in=names).values_list('image', flat=True))
+            names = [name for name in dict.fromkeys(names) if name not in still_used]
+        # A reference-counted storage needs one delete per row, duplicates included
+        delete_files_on_commit(names, storage)
+
+    return {'images': images, 'related': deleted - images, 'files': len(names)}
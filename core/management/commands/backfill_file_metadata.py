@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from core.backfill import backfill_images
+from core.file_metadata import read_file_metadata
+from core.models import GeneratedImage
+
+class Command(BaseCommand):
+    help = 'Record file size, pixel dimensions, format and content hash for generated images that lack them'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Re-measure every image')
+        parser.add_argument('--workers', type=int, default=4, help='Files to read concurrently')
+        parser.add_argument('--limit', type=int, default=0, help='Stop after this many images (0 = all)')
+
+    def handle(self, *args, **options):
+        self.stdout.write("=== Backfilling image file metadata ===")
+
+        images = GeneratedImage.objects.exclude(image='').order_by('created_at').only('id', 'image')
+        if not options['force']:
+            images = images.filter(file_size__isnull=True)
+        if options['limit']:
+            images = images[:options['limit']]
+
+        def save_metadata(image, metadata):
+            GeneratedImage.objects.filter(pk=image.pk).update(**metadata)
+
+        measured, missing, failed = backfill_images(
+            images, read_file_metadata, save_metadata, self.stdout, workers=options['workers']
+        )
+
+        self.stdout.write(f"✅ Metadata recorded for {measured} image(s)")
+        if missing or failed:
+            self.stdout.write(f"📊 {missing} missing file(s), {failed} failure(s)")
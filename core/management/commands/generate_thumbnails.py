@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+
+from core.backfill import backfill_images
+from core.models import GeneratedImage
+from core.thumbnails import get_thumbnail_formats, get_thumbnail_widths, write_thumbnails
+
+class Command(BaseCommand):
+    help = 'Create WebP/AVIF thumbnail variants for generated images that do not have them yet'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Regenerate variants for every image')
+        parser.add_argument('--workers', type=int, default=4, help='Images to encode concurrently')
+        parser.add_argument('--limit', type=int, default=0, help='Stop after this many images (0 = all)')
+
+    def handle(self, *args, **options):
+        self.stdout.write("=== Generating image thumbnails ===")
+        self.stdout.write(f"Widths: {get_thumbnail_widths()}  Formats: {get_thumbnail_formats()}")
+
+        images = GeneratedImage.objects.exclude(image='').order_by('created_at').only('id', 'image', 'thumbnails')
+        if not options['force']:
+            images = images.filter(thumbnails={})
+        if options['limit']:
+            images = images[:options['limit']]
+
+        def save_thumbnails(image, thumbnails):
+            GeneratedImage.objects.filter(pk=image.pk).update(thumbnails=thumbnails)
+
+        # Pillow releases the GIL while resizing and encoding
+        created, missing, failed = backfill_images(
+            images, write_thumbnails, save_thumbnails, self.stdout, workers=options['workers']
+        )
+
+        self.stdout.write(f"✅ Thumbnails created for {created} image(s)")
+        if missing or failed:
+            self.stdout.write(f"📊 {missing} missing file(s), {failed} failure(s)")
@@ -0,0 +1,115 @@
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.backfill import bounded_map
+from core.models import CustomUser, GeneratedImage, GenerationCacheEntry
+from core.storage import ContentAddressedStorage, hash_file
+from core.thumbnails import variant_name
+
+# (model, file name column, whether rows carry thumbnail variants)
+TARGETS = [
+    (GeneratedImage, 'image', True),
+    (CustomUser, 'profile_picture', False),
+    (GenerationCacheEntry, 'file_path', False),
+]
+
+class Command(BaseCommand):
+    help = 'Move existing media files into the content-addressed, deduplicated layout of core.storage'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Only report what would move and the space deduplication saves')
+        parser.add_argument('--workers', type=int, default=4, help='Files to hash concurrently')
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        storage = ContentAddressedStorage()
+
+        self.stdout.write("=== Migrating media to content-addressed storage ===")
+        if not getattr(default_storage, 'reference_counted', False):
+            self.stdout.write("⚠️  MEDIA_STORAGE_BACKEND is not 'content-addressed': new files keep plain names until you switch")
+
+        # Legacy name -> blob name, so rows sharing a file share the blob too
+        adopted = {}
+        blob_sizes = {}
+        moved = shared = duplicates = missing = failed = 0
+        saved_bytes = 0
+
+        def process(row):
+            name = row[1]
+            if name in adopted:
+                return row, None, None
+            if not storage.exists(name):
+                return row, None, 'missing file'
+            try:
+                with storage.open(name, 'rb') as f:
+                    return row, hash_file(f), None
+            except Exception as e:
+                return row, None, str(e)
+
+        for model, field, has_variants in TARGETS:
+            columns = ['pk', field] + (['thumbnails'] if has_variants else [])
+            queryset = model.objects.exclude(**{field: ''}).exclude(**{f'{field}__isnull': True}).values_list(*columns)
+            rows = (row for row in queryset.iterator() if storage.parse_name(row[1]) is None)
+            self.stdout.write(f"{model.__name__}.{field}: migrating...")
+
+            # Hashing runs in the pool; files are moved and rows updated here.
+            # Rows sharing a file are told apart here too, whichever hashes first.
+            for row, digest, error in bounded_map(process, rows, options['workers']):
+                pk, name = row[0], row[1]
+
+                if name in adopted:
+                    shared += 1
+                    if not dry_run:
+                        with transaction.atomic():
+                            storage.add_reference(adopted[name])
+                            model.objects.filter(pk=pk).update(**{field: adopted[name]})
+                    continue
+                if error == 'missing file':
+                    missing += 1
+                    self.stdout.write(f"  ⚠️ {name}: file not found")
+                    continue
+                if error:
+                    failed += 1
+                    self.stdout.write(f"  ❌ {name}: {error}")
+                    continue
+
+                blob_name = storage.blob_name(name, digest)
+                size = storage.size(name)
+                if blob_name in blob_sizes or storage.exists(blob_name):
+                    duplicates += 1
+                    saved_bytes += size
+                blob_sizes[blob_name] = size
+
+                if dry_run:
+                    adopted[name] = blob_name
+                    continue
+
+                try:
+                    with transaction.atomic():
+                        adopted[name] = storage.adopt(name, digest)
+                        model.objects.filter(pk=pk).update(**{field: adopted[name]})
+                    moved += 1
+                except Exception as e:
+                    failed += 1
+                    self.stdout.write(f"  ❌ {name}: {e}")
+                    continue
+
+                # Thumbnail variants follow their original
+                thumbnails = row[2] if has_variants else {}
+                for fmt, widths in thumbnails.items():
+                    for width in widths:
+                        variant, target = variant_name(name, width, fmt), variant_name(adopted[name], width, fmt)
+                        if storage.exists(variant):
+                            storage.move(variant, target, replace=not storage.exists(target))
+
+                if moved % 100 == 0:
+                    self.stdout.write(f"  {moved} file(s) moved...")
+
+        if dry_run:
+            self.stdout.write(f"🔍 Dry run: {len(adopted)} file(s) would move into {len(blob_sizes)} blob(s)")
+        else:
+            self.stdout.write(f"✅ Moved {moved} file(s) into {len(blob_sizes)} blob(s); {shared} row(s) shared an already migrated file")
+        self.stdout.write(f"📦 {duplicates} duplicate(s), {saved_bytes / (1024 * 1024):.1f} MB reclaimed by deduplication")
+        if missing or failed:
+            self.stdout.write(f"📊 {missing} missing file(s), {failed} failure(s)")
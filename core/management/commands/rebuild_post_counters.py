@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F, Q
+
+from core.models import Post
+
+class Command(BaseCommand):
+    help = 'Recompute Post.likes_count and Post.comments_count from the Like and Comment tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report posts whose stored counters are out of step',
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write("=== Rebuilding post counters ===")
+
+        drifted = Post.with_actual_counts().filter(
+            ~Q(likes_count=F('actual_likes')) | ~Q(comments_count=F('actual_comments'))
+        )
+
+        found = 0
+        for post in drifted.only('id', 'title', 'likes_count', 'comments_count'):
+            found += 1
+            self.stdout.write(
+                f"  {str(post.id)[:8]}... likes {post.likes_count} -> {post.actual_likes}, "
+                f"comments {post.comments_count} -> {post.actual_comments}"
+            )
+
+        if not found:
+            self.stdout.write("✅ All post counters are correct")
+            return
+
+        if options['dry_run']:
+            self.stdout.write(f"📊 {found} post(s) would be updated")
+            return
+
+        with transaction.atomic():
+            updated = Post.rebuild_counters(Post.objects.filter(pk__in=drifted.values('pk')))
+
+        self.stdout.write(f"✅ Rebuilt counters for {updated} post(s)")
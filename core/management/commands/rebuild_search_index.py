@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from core import search
+
+class Command(BaseCommand):
+    help = 'Rebuild the SQLite FTS5 prompt search index from the public images'
+
+    def handle(self, *args, **options):
+        self.stdout.write("=== Rebuilding prompt search index ===")
+
+        if connection.vendor != 'sqlite':
+            self.stdout.write(f"ℹ️ {connection.vendor} searches through its GIN index; nothing to rebuild")
+            return
+
+        indexed = search.rebuild_index()
+        self.stdout.write(f"✅ Indexed {indexed} public image(s)")
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+
+from core.media_reconciler import DEFAULT_MIN_AGE, media_reconciler
+
+class Command(BaseCommand):
+    help = 'Find media files no database row refers to, and delete or quarantine them'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Only report orphans and reclaimable space')
+        parser.add_argument('--quarantine', action='store_true', help='Move orphans under MEDIA_QUARANTINE_DIR instead of deleting them')
+        parser.add_argument('--min-age', type=int, default=DEFAULT_MIN_AGE, help='Skip files changed within this many seconds')
+        parser.add_argument('--dir', action='append', dest='directories', help='Only reconcile this MEDIA_ROOT subdirectory (repeatable)')
+        parser.add_argument('--workers', type=int, default=4, help='Files to remove concurrently')
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        self.stdout.write("=== Reconciling media files ===")
+        self.stdout.write(f"Media root: {media_reconciler.media_root}")
+
+        report = media_reconciler.run(
+            dry_run=dry_run,
+            quarantine=options['quarantine'],
+            min_age=options['min_age'],
+            directories=options['directories'],
+            workers=options['workers']
+        )
+
+        for directory, totals in sorted(report['by_dir'].items()):
+            self.stdout.write(f"  {directory:<24} {totals['files']:>6} file(s) {totals['bytes'] / 1024:>10.1f} KB")
+
+        reclaimable = f"{report['orphans']} orphaned file(s), {report['bytes'] / (1024 * 1024):.1f} MB"
+        if dry_run:
+            self.stdout.write(f"🔍 Dry run: {reclaimable} reclaimable")
+            return
+
+        for name, error in report['failed']:
+            self.stdout.write(f"  ❌ {name}: {error}")
+        if report['quarantine_dir']:
+            self.stdout.write(f"📦 Quarantined {report['removed']} of {reclaimable} in {report['quarantine_dir']}")
+        else:
+            self.stdout.write(f"🗑️ Deleted {report['removed']} of {reclaimable}")
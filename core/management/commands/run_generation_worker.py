@@ -0,0 +1,56 @@
+from django.core.management.base import BaseCommand
+from django.conf import settings
+from django.db import close_old_connections
+from concurrent.futures import ThreadPoolExecutor
+import time
+
+from core.models import GenerationJob
+from core.generation_jobs import run_generation_job, sweep_stale_jobs
+
+class Command(BaseCommand):
+    help = 'Process pending image generation jobs from the database'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4, help='Number of jobs to run concurrently')
+        parser.add_argument('--poll-interval', type=float, default=1.0, help='Seconds to wait when the queue is empty')
+        parser.add_argument('--once', action='store_true', help='Drain the current queue and exit')
+
+    def handle(self, *args, **options):
+        workers = options['workers']
+        poll_interval = options['poll_interval']
+        sweep_interval = settings.GENERATION_JOB_SWEEP_INTERVAL
+
+        self.stdout.write(f"🛠️ Generation worker started with {workers} worker(s)")
+
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='generation-worker') as executor:
+            in_flight = set()
+            next_sweep = 0
+            while True:
+                # Fails jobs whose worker died mid-run; pending ones are picked up below anyway
+                if time.monotonic() >= next_sweep:
+                    sweep_stale_jobs(dispatch=lambda job_id: None)
+                    next_sweep = time.monotonic() + sweep_interval
+
+                in_flight = {future for future in in_flight if not future.done()}
+                free_slots = workers - len(in_flight)
+
+                job_ids = []
+                if free_slots > 0:
+                    job_ids = list(
+                        GenerationJob.objects.filter(status='pending')
+                        .order_by('created_at')
+                        .values_list('id', flat=True)[:free_slots]
+                    )
+                    close_old_connections()
+
+                # run_generation_job claims each job atomically, so several
+                # worker processes can share the same table
+                for job_id in job_ids:
+                    in_flight.add(executor.submit(run_generation_job, job_id))
+
+                if not job_ids:
+                    if options['once'] and not in_flight:
+                        break
+                    time.sleep(poll_interval)
+
+        self.stdout.write("✅ Generation worker stopped")
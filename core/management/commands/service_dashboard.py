@@ -1,4 +1,5 @@
 from django.core.management.base import BaseCommand
+from django.db.models import Avg, Count, Q
 from core.models import GeneratedImage
 from django.utils import timezone
 from datetime import timedelta
@@ -18,7 +19,9 @@ class Command(BaseCommand):
         
         try:
             from core.views import generate_image_free_services_with_tracking
-            image_content, source, metadata = generate_image_free_services_with_tracking("test")
+            # A live probe: cached results would report a provider as up without calling it
+            image_content, source, metadata = generate_image_free_services_with_tracking(None, "test", use_cache=False)
+            image_content.close()
             
             if source == 'mock':
                 self.stdout.write("🔴 All external APIs are DOWN - using fallback")
@@ -29,27 +32,69 @@ class Command(BaseCommand):
         except Exception as e:
             self.stdout.write(f"🔴 Error testing services: {e}")
         
+        # Circuit breaker state shared across workers
+        self.stdout.write("\n🔌 PROVIDER CIRCUIT BREAKERS")
+        self.stdout.write("-" * 30)
+
+        from core.circuit_breaker import get_all_circuit_breakers
+        import core.services.huggingface_service  # registers the Replicate/HF breakers
+        import utils.real_video_generator  # registers the video provider breakers
+
+        icons = {'closed': '🟢', 'half_open': '🟡', 'open': '🔴'}
+        for name, breaker in sorted(get_all_circuit_breakers().items()):
+            state = breaker.get_state()
+            latency = f"{state['avg_latency_ms']:.0f} ms" if state['avg_latency_ms'] is not None else "n/a"
+            self.stdout.write(
+                f"{icons.get(state['state'], '⚪')} {name:<22} {state['state']:<9} "
+                f"failures: {state['failures']}/{breaker.failure_threshold}  avg latency: {latency}"
+            )
+            if state['last_error']:
+                self.stdout.write(f"     last error: {state['last_error']}")
+
+        # Generation result cache
+        self.stdout.write("\n♻️ GENERATION CACHE")
+        self.stdout.write("-" * 30)
+
+        from core.generation_cache import generation_cache
+        cache_stats = generation_cache.stats()
+        lookups = cache_stats['hits'] + cache_stats['misses']
+        hit_rate = (cache_stats['hits'] / lookups * 100) if lookups else 0
+        self.stdout.write(
+            f"Entries: {cache_stats['entries']}  "
+            f"Size: {cache_stats['bytes'] / 1024 / 1024:.1f} / {cache_stats['max_bytes'] / 1024 / 1024:.0f} MB"
+        )
+        self.stdout.write(f"Hits: {cache_stats['hits']}  Misses: {cache_stats['misses']}  Hit rate: {hit_rate:.1f}%")
+
+        # Video encoding capabilities (probed once per process)
+        self.stdout.write("\n🎞️ VIDEO ENCODING")
+        self.stdout.write("-" * 30)
+
+        from utils.ffmpeg_capabilities import ffmpeg_capabilities
+        from utils.video_generator import select_ffmpeg_encoder
+        ffmpeg = ffmpeg_capabilities.probe()
+        if ffmpeg['available']:
+            encoder = select_ffmpeg_encoder()
+            self.stdout.write(f"🟢 ffmpeg {ffmpeg['version']} at {ffmpeg['path']}")
+            self.stdout.write(f"Encoders: {', '.join(ffmpeg['encoders']) or 'none'}")
+            if encoder:
+                self.stdout.write(f"Mock videos: {encoder['format'].upper()} via {encoder['encoder']}")
+            else:
+                self.stdout.write("Mock videos: animated GIF (no supported video encoder)")
+        else:
+            self.stdout.write(f"🔴 ffmpeg unavailable ({ffmpeg['error']}) - mock videos fall back to GIF")
+
         # Historical statistics
         self.stdout.write("\n📊 HISTORICAL STATISTICS")
         self.stdout.write("-" * 30)
         
-        total_images = GeneratedImage.objects.count()
+        overall = GeneratedImage.get_service_stats()
+        total_images = overall['total']
         self.stdout.write(f"Total images generated: {total_images}")
         
         if total_images > 0:
             # Service breakdown
-            service_stats = {}
-            for image in GeneratedImage.objects.all():
-                source = image.generation_source
-                if source not in service_stats:
-                    service_stats[source] = {
-                        'count': 0,
-                        'display_name': image.get_service_display_name()
-                    }
-                service_stats[source]['count'] += 1
-            
             self.stdout.write("\nService Usage:")
-            for source, stats in service_stats.items():
+            for source, stats in overall['services'].items():
                 percentage = (stats['count'] / total_images) * 100
                 bar = "█" * int(percentage / 5)  # Simple bar chart
                 self.stdout.write(f"  {stats['display_name']:<20} {stats['count']:>3} ({percentage:>5.1f}%) {bar}")
@@ -59,23 +104,15 @@ class Command(BaseCommand):
         self.stdout.write("-" * 30)
         
         yesterday = timezone.now() - timedelta(days=1)
-        recent_images = GeneratedImage.objects.filter(created_at__gte=yesterday).order_by('-created_at')
+        recent = GeneratedImage.get_service_stats(GeneratedImage.objects.filter(created_at__gte=yesterday))
         
-        if recent_images:
-            self.stdout.write(f"Images generated: {recent_images.count()}")
-            
-            recent_services = {}
-            for image in recent_images:
-                source = image.generation_source
-                if source not in recent_services:
-                    recent_services[source] = 0
-                recent_services[source] += 1
+        if recent['total']:
+            self.stdout.write(f"Images generated: {recent['total']}")
             
             self.stdout.write("Services used:")
-            for source, count in recent_services.items():
-                display_name = GeneratedImage.SERVICE_CHOICES
-                name = next((choice[1] for choice in display_name if choice[0] == source), source)
-                self.stdout.write(f"  {name}: {count} images")
+            for source, stats in recent['services'].items():
+                name = next((choice[1] for choice in GeneratedImage.SERVICE_CHOICES if choice[0] == source), source)
+                self.stdout.write(f"  {name}: {stats['count']} images")
         else:
             self.stdout.write("No images generated in the last 24 hours")
         
@@ -84,20 +121,29 @@ class Command(BaseCommand):
         self.stdout.write("-" * 30)
         
         if total_images > 0:
-            # Average file sizes by service
+            # Average file sizes by service, from the stored file_size column
+            sizes = {
+                row['generation_source']: row
+                for row in GeneratedImage.objects.order_by().values('generation_source').annotate(
+                    avg_size=Avg('file_size'), unmeasured=Count('id', filter=Q(file_size__isnull=True))
+                )
+            }
+            unmeasured = 0
             for source_code, source_name in GeneratedImage.SERVICE_CHOICES:
-                images = GeneratedImage.objects.filter(generation_source=source_code)
-                if images.exists():
-                    total_size = sum(img.get_file_size_kb() for img in images)
-                    avg_size = total_size / images.count()
+                row = sizes.get(source_code)
+                if row:
+                    unmeasured += row['unmeasured']
+                    avg_size = (row['avg_size'] or 0) / 1024
                     self.stdout.write(f"{source_name:<20} Avg size: {avg_size:>6.1f} KB")
+            if unmeasured:
+                self.stdout.write(f"⚠️  {unmeasured} image(s) not measured yet - run `manage.py backfill_file_metadata`")
         
         # Recommendations
         self.stdout.write("\n💡 RECOMMENDATIONS")
         self.stdout.write("-" * 30)
         
         if total_images > 0:
-            mock_count = GeneratedImage.objects.filter(generation_source='mock').count()
+            mock_count = overall['services'].get('mock', {}).get('count', 0)
             mock_percentage = (mock_count / total_images) * 100
             
             if mock_percentage > 50:
@@ -107,7 +153,7 @@ class Command(BaseCommand):
             else:
                 self.stdout.write("✅ Good API reliability - low fallback usage")
             
-            pollinations_count = GeneratedImage.objects.filter(generation_source='pollinations').count()
+            pollinations_count = overall['services'].get('pollinations', {}).get('count', 0)
             if pollinations_count > total_images * 0.8:
                 self.stdout.write("✅ Pollinations AI is your most reliable service")
         
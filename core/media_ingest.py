@@ -0,0 +1,70 @@
+"""
+Streaming ingest for provider downloads.
+
+Responses are read in chunks (requested with stream=True) into a temp file
+under MEDIA_INGEST_TEMP_DIR while the size and SHA-256 are computed on the
+fly. The returned IngestedFile exposes temporary_file_path(), so
+FileSystemStorage moves it into MEDIA_ROOT with a rename instead of copying
+it, and peak memory per download stays at one chunk whatever the file size.
+"""
+
+import hashlib
+import os
+import tempfile
+
+from django.conf import settings
+from django.core.files import File
+
+CHUNK_SIZE = 64 * 1024
+
+
+def get_ingest_temp_dir():
+    """Temp dir on the same filesystem as MEDIA_ROOT so the final move is a rename."""
+    temp_dir = getattr(settings, 'MEDIA_INGEST_TEMP_DIR', None) or os.path.join(settings.MEDIA_ROOT, '.ingest')
+    os.makedirs(temp_dir, exist_ok=True)
+    return str(temp_dir)
+
+
+class IngestedFile(File):
+    """A downloaded file spooled to disk, with its size and content hash."""
+
+    def __init__(self, name):
+        file = tempfile.NamedTemporaryFile(suffix='.ingest', dir=get_ingest_temp_dir())
+        super().__init__(file, name)
+        self.sha256 = None
+
+    def temporary_file_path(self):
+        """Lets FileSystemStorage move the file into place instead of copying it."""
+        return self.file.name
+
+    def close(self):
+        try:
+            return self.file.close()
+        except FileNotFoundError:
+            # The storage already moved the temp file into MEDIA_ROOT
+            pass
+
+
+def ingest_response(response, name, chunk_size=CHUNK_SIZE):
+    """Stream a requests response (sent with stream=True) into an IngestedFile."""
+    ingested = IngestedFile(name)
+    digest = hashlib.sha256()
+    size = 0
+
+    try:
+        for chunk in response.iter_content(chunk_size=chunk_size):
+            if chunk:
+                ingested.write(chunk)
+                digest.update(chunk)
+                size += len(chunk)
+        ingested.flush()
+        ingested.seek(0)
+    except Exception:
+        ingested.close()
+        raise
+    finally:
+        response.close()
+
+    ingested.size = size
+    ingested.sha256 = digest.hexdigest()
+    return ingested
@@ -0,0 +1,166 @@
+"""
+Orphaned media reconciliation.
+
+Files under MEDIA_ROOT that no database row points at (images whose rows were
+deleted without their files, videos and video thumbnails left from before
+their model was removed, stale thumbnail variants) are found by streaming an
+os.scandir walk against the set of referenced storage names, which is built
+from every FileField column plus each GeneratedImage's thumbnail variants,
+read in chunks. Orphans are deleted or moved under MEDIA_QUARANTINE_DIR in a
+thread pool.
+
+Directories with their own lifecycle (the ingest spool, the generation cache,
+the quarantine itself) are never touched, and files younger than `min_age`
+are skipped so a generation that is saving its file right now is not mistaken
+for an orphan. Run it with `manage.py reconcile_media` from cron, or schedule
+core.tasks.reconcile_media_task with Celery beat.
+"""
+
+import os
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.apps import apps
+from django.conf import settings
+from django.db import models
+
+from .thumbnails import variant_names
+
+CHUNK_SIZE = 2000
+DEFAULT_MIN_AGE = 3600
+
+# Top-level MEDIA_ROOT entries owned by other subsystems
+EXCLUDED_DIRS = {'.ingest', 'generation_cache'}
+
+
+def get_quarantine_dir():
+    return str(getattr(settings, 'MEDIA_QUARANTINE_DIR', None) or os.path.join(settings.MEDIA_ROOT, '.quarantine'))
+
+
+def referenced_names(chunk_size=CHUNK_SIZE):
+    """Set of every storage name a database row refers to."""
+    from .models import GeneratedImage
+
+    names = set()
+    for model in apps.get_models():
+        for field in model._meta.get_fields():
+            if isinstance(field, models.FileField) and field.concrete:
+                values = model._default_manager.exclude(**{field.name: ''}).exclude(**{f'{field.name}__isnull': True})
+                names.update(values.values_list(field.name, flat=True).iterator(chunk_size=chunk_size))
+
+    rows = GeneratedImage.objects.exclude(thumbnails={}).values_list('image', 'thumbnails')
+    for image_name, thumbnails in rows.iterator(chunk_size=chunk_size):
+        names.update(variant_names(image_name, thumbnails))
+
+    return names
+
+
+def scan_files(root, excluded=()):
+    """
+    Yield (relative name, size, last change) for every file under `root`.
+
+    The last change includes ctime: a cached file hard-linked into place keeps
+    its old mtime, but the link itself bumps ctime.
+    """
+    stack = ['']
+    while stack:
+        relative_dir = stack.pop()
+        try:
+            with os.scandir(os.path.join(root, relative_dir)) as entries:
+                for entry in entries:
+                    name = f"{relative_dir}/{entry.name}" if relative_dir else entry.name
+                    if entry.is_dir(follow_symlinks=False):
+                        if name not in excluded:
+                            stack.append(name)
+                    elif entry.is_file(follow_symlinks=False):
+                        stat = entry.stat(follow_symlinks=False)
+                        yield name, stat.st_size, max(stat.st_mtime, stat.st_ctime)
+        except FileNotFoundError:
+            continue
+
+
+class MediaReconciler:
+    """Finds and removes (or quarantines) media files no row refers to."""
+
+    def __init__(self, media_root=None):
+        self._media_root = media_root
+
+    @property
+    def media_root(self):
+        return str(self._media_root or settings.MEDIA_ROOT)
+
+    def excluded_dirs(self):
+        excluded = set(EXCLUDED_DIRS)
+        quarantine = os.path.relpath(get_quarantine_dir(), self.media_root)
+        if not quarantine.startswith('..'):
+            excluded.add(quarantine.replace(os.sep, '/'))
+        return excluded
+
+    def find_orphans(self, min_age=DEFAULT_MIN_AGE, directories=None):
+        """Yield (name, size) for unreferenced files, optionally only under `directories`."""
+        referenced = referenced_names()
+        cutoff = time.time() - min_age
+        prefixes = tuple(d.strip('/') + '/' for d in directories or ())
+
+        for name, size, changed in scan_files(self.media_root, self.excluded_dirs()):
+            if prefixes and not name.startswith(prefixes):
+                continue
+            if name not in referenced and changed < cutoff:
+                yield name, size
+
+    def remove(self, name, quarantine_dir=None):
+        """Delete one orphan, or move it to `quarantine_dir` keeping its relative path."""
+        path = os.path.join(self.media_root, name)
+        if quarantine_dir:
+            target = os.path.join(quarantine_dir, name)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            # A rename on the same filesystem, a copy otherwise
+            shutil.move(path, target)
+        else:
+            os.remove(path)
+
+    def run(self, dry_run=True, quarantine=False, min_age=DEFAULT_MIN_AGE, directories=None, workers=4):
+        """
+        Reconcile MEDIA_ROOT against the database.
+
+        Returns a report: orphan count and bytes overall and per top-level
+        directory, how many were removed, and failures as (name, error).
+        """
+        report = {'orphans': 0, 'bytes': 0, 'by_dir': {}, 'removed': 0, 'failed': [], 'quarantine_dir': None}
+        orphans = []
+        for name, size in self.find_orphans(min_age, directories):
+            top = name.split('/', 1)[0] if '/' in name else '.'
+            totals = report['by_dir'].setdefault(top, {'files': 0, 'bytes': 0})
+            totals['files'] += 1
+            totals['bytes'] += size
+            report['orphans'] += 1
+            report['bytes'] += size
+            orphans.append(name)
+
+        if dry_run or not orphans:
+            return report
+
+        quarantine_dir = None
+        if quarantine:
+            quarantine_dir = os.path.join(get_quarantine_dir(), time.strftime('%Y%m%d-%H%M%S'))
+            report['quarantine_dir'] = quarantine_dir
+
+        def process(name):
+            try:
+                self.remove(name, quarantine_dir)
+                return name, None
+            except OSError as e:
+                return name, str(e)
+
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            for name, error in executor.map(process, orphans):
+                if error:
+                    report['failed'].append((name, error))
+                else:
+                    report['removed'] += 1
+
+        return report
+
+
+media_reconciler = MediaReconciler()
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.4 on 2026-10-16 22:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_generationjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GenerationCacheEntry',
+            fields=[
+                ('key', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('provider', models.CharField(choices=[('pollinations', 'Pollinations AI'), ('huggingface', 'Hugging Face'), ('deepai', 'DeepAI'), ('mock', 'Mock Generator'), ('replicate', 'Replicate'), ('unknown', 'Unknown')], max_length=20)),
+                ('file_path', models.CharField(help_text='Cached image path relative to MEDIA_ROOT', max_length=255)),
+                ('size', models.PositiveIntegerField(default=0)),
+                ('metadata', models.JSONField(blank=True, default=dict)),
+                ('hits', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('last_accessed_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.4 on 2026-10-16 22:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_post_counters'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='generatedimage',
+            index=models.Index(condition=models.Q(('is_public', True)), fields=['-created_at', '-id'], name='gi_public_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='generatedimage',
+            index=models.Index(condition=models.Q(('is_public', True)), fields=['user', '-created_at'], name='gi_user_public_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='generatedimage',
+            index=models.Index(fields=['user', '-created_at', '-id'], name='gi_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='generatedimage',
+            index=models.Index(fields=['generation_source', 'created_at'], name='gi_source_created_idx'),
+        ),
+    ]
@@ -0,0 +1,71 @@
+# Generated by Django 5.2.4 on 2026-10-16 23:07
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_hashtags(apps, schema_editor):
+    GeneratedImage = apps.get_model('core', 'GeneratedImage')
+    Hashtag = apps.get_model('core', 'Hashtag')
+    GeneratedImageHashtag = apps.get_model('core', 'GeneratedImageHashtag')
+
+    # Same normalization as Hashtag.normalize()
+    image_tags = {}
+    for image_id, text in GeneratedImage.objects.exclude(hashtags__isnull=True).exclude(hashtags='').values_list('id', 'hashtags').iterator():
+        names = {tag.strip().lstrip('#').strip().lower()[:100] for tag in text.split(',')}
+        names.discard('')
+        if names:
+            image_tags[image_id] = names
+
+    all_names = set().union(*image_tags.values()) if image_tags else set()
+    Hashtag.objects.bulk_create([Hashtag(name=name) for name in all_names], ignore_conflicts=True, batch_size=500)
+    hashtag_ids = dict(Hashtag.objects.values_list('name', 'id'))
+
+    GeneratedImageHashtag.objects.bulk_create(
+        [
+            GeneratedImageHashtag(image_id=image_id, hashtag_id=hashtag_ids[name])
+            for image_id, names in image_tags.items()
+            for name in names
+        ],
+        ignore_conflicts=True,
+        batch_size=500
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_generatedimage_query_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Hashtag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='GeneratedImageHashtag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('image', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='hashtag_links', to='core.generatedimage')),
+                ('hashtag', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='image_links', to='core.hashtag')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='generatedimage',
+            name='tags',
+            field=models.ManyToManyField(blank=True, related_name='images', through='core.GeneratedImageHashtag', to='core.hashtag'),
+        ),
+        migrations.AddConstraint(
+            model_name='generatedimagehashtag',
+            constraint=models.UniqueConstraint(fields=('hashtag', 'image'), name='unique_hashtag_image'),
+        ),
+        migrations.RunPython(backfill_hashtags, migrations.RunPython.noop),
+    ]
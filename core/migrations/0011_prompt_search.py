@@ -0,0 +1,62 @@
+# Generated by Django 5.2.4 on 2026-10-16 23:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+FTS_TABLE = 'core_generatedimage_fts'
+PG_INDEX_NAME = 'gi_prompt_search_idx'
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        # Same statements as core.search.rebuild_index()
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+            f"prompt, hashtags, tokenize = 'unicode61 remove_diacritics 2')"
+        )
+        schema_editor.execute(
+            "INSERT INTO core_searchdocument (image_id) "
+            "SELECT id FROM core_generatedimage WHERE is_public ORDER BY created_at"
+        )
+        schema_editor.execute(
+            f"INSERT INTO {FTS_TABLE} (rowid, prompt, hashtags) "
+            "SELECT d.id, i.prompt, COALESCE(i.hashtags, '') "
+            "FROM core_searchdocument d JOIN core_generatedimage i ON i.id = d.image_id"
+        )
+    elif vendor == 'postgresql':
+        from django.contrib.postgres.indexes import GinIndex
+        from django.contrib.postgres.search import SearchVector
+
+        # Must match core.search.search_vector()
+        GeneratedImage = apps.get_model('core', 'GeneratedImage')
+        schema_editor.add_index(
+            GeneratedImage,
+            GinIndex(SearchVector('prompt', 'hashtags', config='english'), name=PG_INDEX_NAME)
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+    elif vendor == 'postgresql':
+        schema_editor.execute(f"DROP INDEX IF EXISTS {PG_INDEX_NAME}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_hashtag_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('image', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='search_document', to='core.generatedimage')),
+            ],
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -16,8 +16,7 @@ def home(request):
     # Get recent generations from file storage
     recent_images = []
     if request.user.is_authenticated:
-        user_generations = file_storage.get_user_generations(request.user.id)
-        recent_images = user_generations[-6:]  # Last 6 images
+        recent_images = file_storage.get_user_generations(request.user.id, limit=6)  # Last 6 images
     
     return render(request, 'core/simple_home.html', {
         'recent_images': recent_images
@@ -1,10 +1,14 @@
 import uuid
-from django.db import models
+from django.db import models, transaction
+from django.db.models.functions import Coalesce
 from django.contrib.auth.models import AbstractUser
 from django.core.validators import MinValueValidator, MaxValueValidator
 from PIL import Image
 import os
 
+from .image_deletion import delete_files_on_commit, stored_file_names
+from .thumbnails import variant_name
+
 class CustomUser(AbstractUser):
     """Extended User model with additional fields."""
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -72,9 +76,18 @@ class GeneratedImage(models.Model):
     prompt = models.TextField()
     style_preset = models.ForeignKey(StylePreset, on_delete=models.SET_NULL, null=True, blank=True)
     image = models.ImageField(upload_to='generated_images/')
+    # Downscaled copies written by core.thumbnails, as {format: [widths]}
+    thumbnails = models.JSONField(default=dict, blank=True)
     seed = models.IntegerField(null=True, blank=True)
     width = models.IntegerField(default=512)
     height = models.IntegerField(default=512)
+    # The stored file as measured by core.file_metadata (width/height above are
+    # what was requested); null until measured
+    file_size = models.PositiveBigIntegerField(null=True, blank=True)
+    pixel_width = models.PositiveIntegerField(null=True, blank=True)
+    pixel_height = models.PositiveIntegerField(null=True, blank=True)
+    file_format = models.CharField(max_length=10, blank=True)
+    content_hash = models.CharField(max_length=64, blank=True, db_index=True)
     is_public = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
     
@@ -98,48 +111,276 @@ class GeneratedImage(models.Model):
         null=True, 
         help_text="Generated hashtags for social sharing"
     )
+    # Normalized copy of `hashtags` for tag lookups, kept in step on save
+    tags = models.ManyToManyField(
+        'Hashtag',
+        through='GeneratedImageHashtag',
+        related_name='images',
+        blank=True
+    )
     
     def __str__(self):
         return f"Image by {self.user.username} - {self.prompt[:50]}"
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Home and the explore feed: public images, newest first (keyset on created_at, id).
+            # Partial, because Django compiles is_public=True to a bare WHERE "is_public",
+            # which SQLite can only match against an index condition, not a key column.
+            models.Index(
+                fields=['-created_at', '-id'], condition=models.Q(is_public=True),
+                name='gi_public_created_idx'
+            ),
+            # Profile and related-images strips: one user's public images
+            models.Index(
+                fields=['user', '-created_at'], condition=models.Q(is_public=True),
+                name='gi_user_public_created_idx'
+            ),
+            # Gallery pages and per-user service stats
+            models.Index(fields=['user', '-created_at', '-id'], name='gi_user_created_idx'),
+            # Dashboard breakdowns by service and time window
+            models.Index(fields=['generation_source', 'created_at'], name='gi_source_created_idx'),
+        ]
     
     def delete(self, *args, **kwargs):
-        # Delete the image file when the model instance is deleted
-        if self.image:
-            if os.path.isfile(self.image.path):
-                os.remove(self.image.path)
-        super().delete(*args, **kwargs)
+        # The file and its thumbnails go once the row deletion commits
+        with transaction.atomic():
+            result = super().delete(*args, **kwargs)
+            delete_files_on_commit(stored_file_names(self.image.name, self.thumbnails))
+        return result
+
+    def thumbnail_url(self, size=320, fmt='webp'):
+        """URL of the smallest `fmt` thumbnail at least `size` px wide (or the largest one).
+
+        Falls back to the original image until thumbnails have been made.
+        """
+        widths = (self.thumbnails or {}).get(fmt)
+        if not widths:
+            return self.image.url if self.image else ''
+        width = next((w for w in widths if w >= size), widths[-1])
+        return self.image.storage.url(variant_name(self.image.name, width, fmt))
+
+    def thumbnail_srcset(self, fmt='webp'):
+        """srcset value listing every `fmt` thumbnail, or '' if there are none."""
+        return ', '.join(
+            f"{self.image.storage.url(variant_name(self.image.name, width, fmt))} {width}w"
+            for width in (self.thumbnails or {}).get(fmt, [])
+        )
     
     def get_file_size_kb(self):
-        """Get file size in KB"""
+        """Get file size in KB (stat()s the file only for rows not yet measured)"""
+        if self.file_size is not None:
+            return round(self.file_size / 1024, 1)
         if self.image and hasattr(self.image, 'path') and os.path.exists(self.image.path):
             return round(os.path.getsize(self.image.path) / 1024, 1)
         return 0
+
+    def get_dimensions_display(self):
+        """Actual pixel size, or the requested size for rows not yet measured"""
+        if self.pixel_width and self.pixel_height:
+            return f"{self.pixel_width}×{self.pixel_height}"
+        return f"{self.width}×{self.height}"
     
+    SERVICE_DISPLAY_NAMES = {
+        'pollinations': 'Pollinations AI',
+        'huggingface': 'Hugging Face',
+        'deepai': 'DeepAI',
+        'mock': 'Mock Generator',
+        'replicate': 'Replicate',
+        'unknown': 'Unknown Service'
+    }
+
     def get_service_display_name(self):
         """Get human-readable service name"""
-        service_names = {
-            'pollinations': 'Pollinations AI',
-            'huggingface': 'Hugging Face',
-            'deepai': 'DeepAI',
-            'mock': 'Mock Generator',
-            'replicate': 'Replicate',
-            'unknown': 'Unknown Service'
-        }
-        return service_names.get(self.generation_source, 'Unknown Service')
+        return self.SERVICE_DISPLAY_NAMES.get(self.generation_source, 'Unknown Service')
+
+    @classmethod
+    def get_service_stats(cls, queryset=None):
+        """Total, public and per-source image counts for a queryset, in one query."""
+        if queryset is None:
+            queryset = cls.objects.all()
+
+        rows = (
+            queryset.order_by()
+            .values('generation_source')
+            .annotate(count=models.Count('id'), public=models.Count('id', filter=models.Q(is_public=True)))
+            .order_by('-count')
+        )
+
+        stats = {'total': 0, 'public': 0, 'services': {}}
+        for row in rows:
+            stats['total'] += row['count']
+            stats['public'] += row['public']
+            stats['services'][row['generation_source']] = {
+                'count': row['count'],
+                'public': row['public'],
+                'display_name': cls.SERVICE_DISPLAY_NAMES.get(row['generation_source'], 'Unknown Service'),
+            }
+        return stats
     
     def get_hashtags_list(self):
-        """Return hashtags as a list."""
-        if self.hashtags:
-            return [tag.strip() for tag in self.hashtags.split(',') if tag.strip()]
-        return []
+        """Return hashtags as a list (parsed once per value, templates call this repeatedly)."""
+        parsed = self.__dict__.get('_hashtags_parsed')
+        if parsed is None or parsed[0] != self.hashtags:
+            tags = [tag.strip() for tag in self.hashtags.split(',') if tag.strip()] if self.hashtags else []
+            parsed = self._hashtags_parsed = (self.hashtags, tags)
+        return parsed[1]
+
+    def get_hashtag_names(self):
+        """Normalized tag names, as used in /tag/<name>/ URLs."""
+        names = []
+        for tag in self.get_hashtags_list():
+            name = Hashtag.normalize(tag)
+            if name and name not in names:
+                names.append(name)
+        return names
     
     def set_hashtags_list(self, hashtag_list):
-        """Set hashtags from a list."""
+        """Set hashtags from a list. The tag index is updated when the image is saved."""
         self.hashtags = ', '.join(hashtag_list) if hashtag_list else ''
 
+    def sync_hashtag_index(self):
+        """Make the image's Hashtag links match the hashtags text."""
+        wanted = set(self.get_hashtag_names())
+        links = GeneratedImageHashtag.objects.filter(image=self)
+        current = dict(links.values_list('hashtag__name', 'hashtag_id'))
+
+        stale = [hashtag_id for name, hashtag_id in current.items() if name not in wanted]
+        if stale:
+            links.filter(hashtag_id__in=stale).delete()
+
+        missing = wanted - current.keys()
+        if missing:
+            Hashtag.objects.bulk_create([Hashtag(name=name) for name in missing], ignore_conflicts=True)
+            GeneratedImageHashtag.objects.bulk_create(
+                [GeneratedImageHashtag(image=self, hashtag=hashtag) for hashtag in Hashtag.objects.filter(name__in=missing)],
+                ignore_conflicts=True
+            )
+
+class Hashtag(models.Model):
+    """A normalized hashtag ("aiart" for "#AIArt"), linked to images through GeneratedImageHashtag."""
+    name = models.CharField(max_length=100, unique=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"#{self.name}"
+
+    class Meta:
+        ordering = ['name']
+
+    @staticmethod
+    def normalize(tag):
+        """Return the stored form of a tag: no leading '#', lowercase."""
+        return tag.strip().lstrip('#').strip().lower()[:100]
+
+    @classmethod
+    def popular(cls, limit=20):
+        """Most used tags on public images, annotated with image_count."""
+        return list(
+            cls.objects
+            .annotate(image_count=models.Count('image_links', filter=models.Q(image_links__image__is_public=True)))
+            .filter(image_count__gt=0)
+            .order_by('-image_count', 'name')[:limit]
+        )
+
+class GeneratedImageHashtag(models.Model):
+    """Tag -> image link; the (hashtag, image) unique index is what tag pages read."""
+    # The unique constraint below leads with hashtag, so no separate index is needed
+    hashtag = models.ForeignKey(Hashtag, on_delete=models.CASCADE, related_name='image_links', db_index=False)
+    image = models.ForeignKey(GeneratedImage, on_delete=models.CASCADE, related_name='hashtag_links')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['hashtag', 'image'], name='unique_hashtag_image'),
+        ]
+
+    def __str__(self):
+        return f"#{self.hashtag.name} -> {self.image_id}"
+
+class SearchDocument(models.Model):
+    """A public image's row in the prompt search index (see core.search).
+
+    Its integer id is the FTS5 rowid: GeneratedImage's UUID key has no stable
+    rowid of its own.
+    """
+    image = models.OneToOneField(GeneratedImage, on_delete=models.CASCADE, related_name='search_document')
+
+    def __str__(self):
+        return f"Search document {self.pk} -> {self.image_id}"
+
+class MediaBlob(models.Model):
+    """A file stored once per content hash by core.storage.ContentAddressedStorage.
+
+    `refcount` is how many saves returned this name and have not been deleted.
+    """
+    name = models.CharField(max_length=255, primary_key=True)
+    content_hash = models.CharField(max_length=64, db_index=True)
+    size = models.PositiveBigIntegerField(default=0)
+    refcount = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.name} ({self.refcount} refs)"
+
+class GenerationJob(models.Model):
+    """Queued image generation request processed outside the web request."""
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('succeeded', 'Succeeded'),
+        ('failed', 'Failed'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='generation_jobs')
+    prompt = models.TextField()
+    style_preset = models.ForeignKey(StylePreset, on_delete=models.SET_NULL, null=True, blank=True)
+    seed = models.IntegerField(null=True, blank=True)
+    width = models.IntegerField(default=512)
+    height = models.IntegerField(default=512)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending', db_index=True)
+    generated_image = models.ForeignKey(
+        GeneratedImage,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='generation_jobs'
+    )
+    error = models.TextField(blank=True)
+    provider_errors = models.JSONField(
+        default=dict,
+        blank=True,
+        help_text="Errors reported by providers that were tried before the one that succeeded"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Job {self.id} ({self.status}) - {self.prompt[:50]}"
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def is_finished(self):
+        """Return True once the job has either succeeded or failed."""
+        return self.status in ('succeeded', 'failed')
+
+class GenerationCacheEntry(models.Model):
+    """Cached provider result, keyed by a hash of the generation parameters."""
+    key = models.CharField(max_length=64, primary_key=True)
+    provider = models.CharField(max_length=20, choices=GeneratedImage.SERVICE_CHOICES)
+    file_path = models.CharField(max_length=255, help_text="Cached image path relative to MEDIA_ROOT")
+    size = models.PositiveIntegerField(default=0)
+    metadata = models.JSONField(default=dict, blank=True)
+    hits = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_accessed_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f"{self.provider} cache entry {self.key[:12]} ({self.size} bytes)"
+
 class Post(models.Model):
     """Social media posts containing generated images."""
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -149,6 +390,10 @@ class Post(models.Model):
     description = models.TextField(blank=True)
     tags = models.CharField(max_length=500, blank=True, help_text="Comma-separated tags")
     is_public = models.BooleanField(default=True)
+    # Denormalized counters, kept in step by the Like/Comment signal handlers;
+    # `manage.py rebuild_post_counters` repairs any drift
+    likes_count = models.PositiveIntegerField(default=0)
+    comments_count = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -166,11 +411,51 @@ class Post(models.Model):
     
     def like_count(self):
         """Return the number of likes for this post."""
-        return self.likes.count()
+        return self.likes_count
     
     def comment_count(self):
         """Return the number of comments for this post."""
-        return self.comments.count()
+        return self.comments_count
+
+    @classmethod
+    def adjust_counter(cls, post_id, field, delta):
+        """Atomically add `delta` to a counter column without reading it first."""
+        posts = cls.objects.filter(pk=post_id)
+        if delta < 0:
+            # Never go below zero if a row was already out of step
+            posts = posts.filter(**{f'{field}__gte': -delta})
+        posts.update(**{field: models.F(field) + delta})
+
+    @staticmethod
+    def _actual_count(model):
+        """Subquery counting `model` rows that point at the outer post."""
+        return Coalesce(
+            models.Subquery(
+                model.objects.filter(post=models.OuterRef('pk'))
+                .order_by()
+                .values('post')
+                .annotate(total=models.Count('pk'))
+                .values('total')
+            ),
+            0
+        )
+
+    @classmethod
+    def with_actual_counts(cls):
+        """Posts annotated with like/comment counts computed from the related tables."""
+        return cls.objects.annotate(
+            actual_likes=cls._actual_count(Like),
+            actual_comments=cls._actual_count(Comment)
+        )
+
+    @classmethod
+    def rebuild_counters(cls, queryset=None):
+        """Recompute the stored counters in a single UPDATE. Returns the rows updated."""
+        queryset = cls.objects.all() if queryset is None else queryset
+        return queryset.update(
+            likes_count=cls._actual_count(Like),
+            comments_count=cls._actual_count(Comment)
+        )
 
 class Like(models.Model):
     """Like model for posts."""
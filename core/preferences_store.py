@@ -0,0 +1,230 @@
+"""
+Per-user preferences with read-through caching.
+
+Lookups go through three tiers:
+
+1. an in-process LRU (PREFERENCES_LRU_SIZE users, entries dropped after
+   PREFERENCES_LOCAL_TTL seconds);
+2. the default Django cache (PREFERENCES_CACHE_TTL seconds), shared by all
+   workers when it is Redis or Memcached;
+3. the backend: one JSON file per user in data_storage/ ('file'), or a
+   key/value table in data_storage/preferences.sqlite3 ('sqlite').
+
+Cached entries carry the backend version they were read at (the file's
+inode, mtime and size, or a counter column in SQLite), and every lookup
+checks it with one stat() or primary-key SELECT before trusting them. A save
+in any process is therefore seen by the next read everywhere, whatever the
+cache backend; the tiers only save re-reading and parsing the data. Saves
+write through all three. Files are replaced with an atomic rename, so a
+reader never sees half a file.
+"""
+
+import copy
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+
+CACHE_KEY_PREFIX = 'prefs'
+
+
+class LRUCache:
+    """Thread-safe in-process LRU whose entries expire after `ttl` seconds."""
+
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class FilePreferencesBackend:
+    """user_<id>_prefs.json files, replaced atomically on save."""
+
+    def __init__(self, storage_dir):
+        self.storage_dir = storage_dir
+
+    def _path(self, user_id):
+        return os.path.join(self.storage_dir, f'user_{user_id}_prefs.json')
+
+    @staticmethod
+    def _stat_version(stat):
+        # Every save renames a new file into place, so the inode changes too
+        return f'{stat.st_ino}:{stat.st_mtime_ns}:{stat.st_size}'
+
+    def version(self, user_id):
+        """Version of the stored preferences, None if there are none."""
+        try:
+            return self._stat_version(os.stat(self._path(user_id)))
+        except FileNotFoundError:
+            return None
+
+    def load(self, user_id):
+        """(preferences, version) read together."""
+        try:
+            with open(self._path(user_id), 'r') as f:
+                return json.load(f), self._stat_version(os.fstat(f.fileno()))
+        except FileNotFoundError:
+            return {}, None
+
+    def save(self, user_id, preferences):
+        """Store preferences and return their new version."""
+        # Write a temp file beside the target, then rename over it
+        fd, temp_path = tempfile.mkstemp(dir=self.storage_dir, prefix=f'.user_{user_id}_', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(preferences, f, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, self._path(user_id))
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        return self.version(user_id)
+
+
+class SQLitePreferencesBackend:
+    """Key/value table in a standalone SQLite file, one connection per thread."""
+
+    def __init__(self, storage_dir):
+        self.path = os.path.join(storage_dir, 'preferences.sqlite3')
+        self._local = threading.local()
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=10)
+            # WAL lets readers in other workers proceed while one writes
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS preferences '
+                '(user_id TEXT PRIMARY KEY, data TEXT NOT NULL, version INTEGER NOT NULL DEFAULT 1)'
+            )
+            columns = [row[1] for row in connection.execute('PRAGMA table_info(preferences)')]
+            if 'version' not in columns:
+                # Tables created before versioning
+                with connection:
+                    connection.execute('ALTER TABLE preferences ADD COLUMN version INTEGER NOT NULL DEFAULT 1')
+            self._local.connection = connection
+        return connection
+
+    def version(self, user_id):
+        """Version of the stored preferences, None if there are none."""
+        row = self._connection().execute(
+            'SELECT version FROM preferences WHERE user_id = ?', (str(user_id),)
+        ).fetchone()
+        return row[0] if row else None
+
+    def load(self, user_id):
+        """(preferences, version) read together."""
+        row = self._connection().execute(
+            'SELECT data, version FROM preferences WHERE user_id = ?', (str(user_id),)
+        ).fetchone()
+        return (json.loads(row[0]), row[1]) if row else ({}, None)
+
+    def save(self, user_id, preferences):
+        """Store preferences and return their new version."""
+        connection = self._connection()
+        with connection:
+            connection.execute(
+                'INSERT INTO preferences (user_id, data) VALUES (?, ?) '
+                'ON CONFLICT(user_id) DO UPDATE SET data = excluded.data, version = version + 1',
+                (str(user_id), json.dumps(preferences))
+            )
+            # Same transaction, so this is the version just written
+            return connection.execute(
+                'SELECT version FROM preferences WHERE user_id = ?', (str(user_id),)
+            ).fetchone()[0]
+
+
+BACKENDS = {
+    'file': FilePreferencesBackend,
+    'sqlite': SQLitePreferencesBackend,
+}
+
+
+class PreferencesStore:
+    """Read-through, write-through preferences over an LRU, the Django cache and a backend."""
+
+    def __init__(self, storage_dir, backend=None):
+        backend = backend or getattr(settings, 'PREFERENCES_BACKEND', 'file')
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown PREFERENCES_BACKEND: {backend}")
+        self.backend = BACKENDS[backend](storage_dir)
+        self.local = LRUCache(
+            getattr(settings, 'PREFERENCES_LRU_SIZE', 1024),
+            getattr(settings, 'PREFERENCES_LOCAL_TTL', 300)
+        )
+
+    @property
+    def cache_ttl(self):
+        return getattr(settings, 'PREFERENCES_CACHE_TTL', 300)
+
+    @staticmethod
+    def cache_key(user_id):
+        return f'{CACHE_KEY_PREFIX}:{user_id}'
+
+    def get(self, user_id):
+        """A user's preferences ({} if none). The caller gets its own copy."""
+        key = self.cache_key(user_id)
+        version = self.backend.version(user_id)
+
+        # Cached entries are (version, preferences); a stale version means
+        # another process saved since
+        entry = self.local.get(key)
+        if entry is None or entry[0] != version:
+            entry = cache.get(key)
+            if entry is None or entry[0] != version:
+                preferences, version = self.backend.load(user_id)
+                entry = (version, preferences)
+                cache.set(key, entry, self.cache_ttl)
+            self.local.set(key, entry)
+        return copy.deepcopy(entry[1])
+
+    def save(self, user_id, preferences):
+        """Store preferences and refresh both cache tiers."""
+        preferences = copy.deepcopy(preferences)
+        entry = (self.backend.save(user_id, preferences), preferences)
+        key = self.cache_key(user_id)
+        cache.set(key, entry, self.cache_ttl)
+        self.local.set(key, entry)
+
+    def invalidate(self, user_id):
+        """Drop cached copies, e.g. after editing the backend by hand."""
+        key = self.cache_key(user_id)
+        cache.delete(key)
+        self.local.delete(key)
@@ -0,0 +1,187 @@
+"""
+Prompt search.
+
+On SQLite, the prompts and hashtags of public images are indexed in the FTS5
+table core_generatedimage_fts, keyed by each image's SearchDocument id. The
+GeneratedImage post_save and SearchDocument post_delete handlers in
+core.signals keep it in step, and `manage.py rebuild_search_index` rebuilds
+it after bulk updates that skip signals. Every match is ranked by bm25, ties
+newest first (documents are added oldest first, so rowid order is roughly
+recency), and FTS5 sorts and pages inside the virtual table. Searches by
+hashtag alone skip FTS and read the hashtag index, newest first.
+
+On PostgreSQL the same search runs against a tsvector expression with a GIN
+index (migration 0011), so nothing needs syncing. Other databases fall back
+to icontains scans.
+"""
+
+import re
+
+from django.db import connection, transaction
+
+from .feed import public_feed_queryset
+from .models import GeneratedImage, Hashtag, SearchDocument
+
+FTS_TABLE = 'core_generatedimage_fts'
+SEARCH_PAGE_SIZE = 24
+SEARCH_MAX_TERMS = 10
+SEARCH_CONFIG = 'english'
+
+# Saves that touch none of these leave the search document as it is
+INDEXED_FIELDS = {'prompt', 'hashtags', 'is_public'}
+
+TOKEN_RE = re.compile(r'#?\w+')
+WORD_RE = re.compile(r'\w+')
+
+
+def parse_query(text, tags=()):
+    """Split a search string into (terms, tags); '#word' tokens become tag filters."""
+    terms, tag_names = [], []
+    for token in TOKEN_RE.findall(text or ''):
+        if token.startswith('#'):
+            tags = [*tags, token]
+        elif token.lower() not in terms:
+            terms.append(token.lower())
+
+    for tag in tags:
+        name = Hashtag.normalize(tag)
+        if name and name not in tag_names:
+            tag_names.append(name)
+
+    return terms[:SEARCH_MAX_TERMS], tag_names[:SEARCH_MAX_TERMS]
+
+
+def search_vector():
+    """The PostgreSQL document; migration 0011 indexes exactly this expression."""
+    from django.contrib.postgres.search import SearchVector
+    return SearchVector('prompt', 'hashtags', config=SEARCH_CONFIG)
+
+
+def fts_match_expression(terms, tags):
+    """FTS5 query: every term (the last one also as a prefix) and every tag in the hashtags column."""
+    def quoted(text):
+        return '"' + text.replace('"', '""') + '"'
+
+    parts = [quoted(term) for term in terms]
+    if terms and len(terms[-1]) >= 3:
+        # Search-as-you-type: "sun" also finds "sunset"
+        parts[-1] += '*'
+    parts += [f'hashtags : {quoted(tag)}' for tag in tags]
+    return ' AND '.join(parts)
+
+
+def tsquery_expression(terms, tags):
+    """PostgreSQL raw tsquery equivalent of fts_match_expression()."""
+    parts = list(terms)
+    if terms and len(terms[-1]) >= 3:
+        parts[-1] += ':*'
+    parts += [' <-> '.join(WORD_RE.findall(tag)) for tag in tags if WORD_RE.search(tag)]
+    return ' & '.join(f'({part})' for part in parts)
+
+
+def _sqlite_ranked_ids(terms, tags, offset, limit):
+    with connection.cursor() as cursor:
+        # FTS5 ranks the whole match set and returns just this page, which is
+        # then joined back to the images
+        cursor.execute(
+            f"SELECT d.image_id FROM ("
+            f"  SELECT rowid, rank FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s"
+            f"  ORDER BY rank, rowid DESC LIMIT %s OFFSET %s"
+            f") AS hits JOIN {SearchDocument._meta.db_table} d ON d.id = hits.rowid "
+            f"ORDER BY hits.rank, hits.rowid DESC",
+            [fts_match_expression(terms, tags), limit, offset]
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def search_images(text, tags=(), page=1, page_size=SEARCH_PAGE_SIZE):
+    """
+    Return (images, has_next) for one page of public images matching `text`.
+
+    Images are feed-card rows (see core.feed) in rank order, or newest first
+    when only hashtags were given. `tags` and any '#word' in `text` restrict
+    results to images carrying those hashtags.
+    """
+    terms, tag_names = parse_query(text, tags)
+    if not terms and not tag_names:
+        return [], False
+
+    offset = (max(1, page) - 1) * page_size
+    queryset = public_feed_queryset()
+
+    if not terms:
+        for name in tag_names:
+            queryset = queryset.filter(hashtag_links__hashtag__name=name)
+    elif connection.vendor == 'sqlite':
+        ids = _sqlite_ranked_ids(terms, tag_names, offset, page_size + 1)
+        has_next = len(ids) > page_size
+        ids = [GeneratedImage._meta.pk.to_python(image_id) for image_id in ids[:page_size]]
+        # Documents left behind by bulk updates are dropped here by the is_public filter
+        by_id = {image.pk: image for image in queryset.filter(pk__in=ids)}
+        return [by_id[image_id] for image_id in ids if image_id in by_id], has_next
+    elif connection.vendor == 'postgresql':
+        from django.contrib.postgres.search import SearchQuery, SearchRank
+        query = SearchQuery(tsquery_expression(terms, tag_names), search_type='raw', config=SEARCH_CONFIG)
+        queryset = (
+            queryset.annotate(search=search_vector(), rank=SearchRank(search_vector(), query))
+            .filter(search=query)
+            .order_by('-rank', '-created_at', '-id')
+        )
+    else:
+        for term in terms:
+            queryset = queryset.filter(prompt__icontains=term)
+        for name in tag_names:
+            queryset = queryset.filter(hashtag_links__hashtag__name=name)
+
+    images = list(queryset[offset:offset + page_size + 1])
+    return images[:page_size], len(images) > page_size
+
+
+def index_image(image, update_fields=None):
+    """Add, refresh or drop an image's search document after it is saved."""
+    if connection.vendor != 'sqlite':
+        return
+    if update_fields is not None and not INDEXED_FIELDS.intersection(update_fields):
+        return
+
+    if not image.is_public:
+        # The SearchDocument post_delete handler removes the FTS row
+        for document in SearchDocument.objects.filter(image_id=image.pk):
+            document.delete()
+        return
+
+    with transaction.atomic():
+        document, _ = SearchDocument.objects.get_or_create(image_id=image.pk)
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [document.pk])
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE} (rowid, prompt, hashtags) VALUES (%s, %s, %s)",
+                [document.pk, image.prompt, image.hashtags or '']
+            )
+
+
+def remove_document(document_id):
+    """Drop a deleted SearchDocument's FTS row."""
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [document_id])
+
+
+def rebuild_index():
+    """Re-index every public image from scratch. Returns the number of documents."""
+    if connection.vendor != 'sqlite':
+        return 0
+
+    documents = SearchDocument._meta.db_table
+    images = GeneratedImage._meta.db_table
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE}")
+        cursor.execute(f"DELETE FROM {documents}")
+        cursor.execute(f"INSERT INTO {documents} (image_id) SELECT id FROM {images} WHERE is_public ORDER BY created_at")
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE} (rowid, prompt, hashtags) "
+            f"SELECT d.id, i.prompt, COALESCE(i.hashtags, '') FROM {documents} d JOIN {images} i ON i.id = d.image_id"
+        )
+        cursor.execute(f"SELECT COUNT(*) FROM {documents}")
+        return cursor.fetchone()[0]
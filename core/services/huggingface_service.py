@@ -1,4 +1,3 @@
-import requests
 import json
 import os
 from django.conf import settings
@@ -7,6 +6,11 @@ from PIL import Image, ImageDraw, ImageFont
 import io
 import random
 
+from core.circuit_breaker import circuit_breaker
+from core.http_client import provider_http
+from core.media_ingest import ingest_response
+from core.gradient_renderer import vertical_gradient_image
+
 def generate_image(prompt, style_suffix=""):
     """
     Generate an image using AI services with fallback options.
@@ -38,6 +42,7 @@ def generate_image(prompt, style_suffix=""):
     print("All APIs failed, using mock generator.")
     return generate_mock_image(full_prompt)
 
+@circuit_breaker('replicate')
 def generate_with_replicate(prompt, api_token):
     """Generate image using Replicate API"""
     try:
@@ -67,11 +72,13 @@ def generate_with_replicate(prompt, api_token):
             print(f"Replicate generated image URL: {image_url}")
             
             # Download the image
-            response = requests.get(image_url, timeout=30)
+            response = provider_http.get(image_url, provider='replicate', timeout=30, stream=True)
+            if not response.ok:
+                response.close()
             response.raise_for_status()
             
-            # Create Django file
-            image_content = ContentFile(response.content)
+            # Stream the download into a temp file
+            image_content = ingest_response(response, name='replicate_image.png')
             print("✅ Replicate image generation successful!")
             return image_content
         else:
@@ -82,6 +89,7 @@ def generate_with_replicate(prompt, api_token):
     except Exception as e:
         raise Exception(f"Replicate API failed: {str(e)}")
 
+@circuit_breaker('huggingface_inference')
 def generate_with_huggingface(prompt, api_token):
     """Generate image using Hugging Face API"""
     try:
@@ -101,14 +109,15 @@ def generate_with_huggingface(prompt, api_token):
             }
         }
         
-        response = requests.post(API_URL, headers=headers, json=payload, timeout=60)
+        response = provider_http.post(API_URL, provider='huggingface', headers=headers, json=payload, timeout=60, stream=True)
         
         if response.status_code == 200:
-            # Create Django file from response content
-            image_content = ContentFile(response.content)
+            # Stream the response into a temp file
+            image_content = ingest_response(response, name='huggingface_image.png')
             print("✅ Hugging Face image generation successful!")
             return image_content
         else:
+            response.close()
             raise Exception(f"Hugging Face API failed: {response.status_code}")
             
     except Exception as e:
@@ -121,8 +130,6 @@ def generate_mock_image(prompt):
         
         # Create a colorful gradient background
         width, height = 512, 512
-        image = Image.new('RGB', (width, height))
-        draw = ImageDraw.Draw(image)
         
         # Create gradient background
         colors = [
@@ -136,12 +143,9 @@ def generate_mock_image(prompt):
         
         color = random.choice(colors)
         
-        # Create gradient
-        for y in range(height):
-            r = int(color[0] * (1 - y/height) + 50 * (y/height))
-            g = int(color[1] * (1 - y/height) + 50 * (y/height))
-            b = int(color[2] * (1 - y/height) + 50 * (y/height))
-            draw.line([(0, y), (width, y)], fill=(r, g, b))
+        # Create gradient fading to dark grey
+        image = vertical_gradient_image(width, height, [color, (50, 50, 50)])
+        draw = ImageDraw.Draw(image)
         
         # Add some decorative elements
         for _ in range(20):
@@ -255,8 +259,9 @@ def test_connection():
     try:
         hf_token = getattr(settings, 'HUGGINGFACE_API_TOKEN', None)
         if hf_token and hf_token.strip():
-            response = requests.get(
+            response = provider_http.get(
                 "https://huggingface.co/api/whoami",
+                provider='huggingface',
                 headers={"Authorization": f"Bearer {hf_token}"},
                 timeout=10
             )
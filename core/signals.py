@@ -1,7 +1,10 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from allauth.socialaccount.models import SocialAccount
-import requests
+from .http_client import provider_http
+from .homepage_cache import invalidate_homepage
+from .models import GeneratedImage, StylePreset, Post, Like, Comment, SearchDocument
+from . import search
 from io import BytesIO
 from django.core.files.base import ContentFile
 
@@ -18,7 +21,7 @@ def update_user_profile_from_social(sender, instance, created, **kwargs):
     if instance.provider == 'google' and 'picture' in extra_data:
         try:
             # Download profile picture from Google
-            response = requests.get(extra_data['picture'])
+            response = provider_http.get(extra_data['picture'], provider='avatars', timeout=15)
             if response.status_code == 200:
                 # Save the image to the user's profile
                 img_content = ContentFile(response.content)
@@ -29,3 +32,47 @@ def update_user_profile_from_social(sender, instance, created, **kwargs):
                 )
         except Exception as e:
             print(f"Error downloading Google profile picture: {e}")
+
+@receiver(post_save, sender=GeneratedImage)
+@receiver(post_delete, sender=GeneratedImage)
+def invalidate_homepage_on_image_change(sender, instance, **kwargs):
+    """New, edited or deleted images change the homepage counters and recent posts"""
+    invalidate_homepage()
+
+@receiver(post_save, sender=GeneratedImage)
+def sync_image_hashtags(sender, instance, created, update_fields=None, **kwargs):
+    """Keep the Hashtag links in step whenever the hashtags text may have changed"""
+    if created or update_fields is None or 'hashtags' in update_fields:
+        instance.sync_hashtag_index()
+
+@receiver(post_save, sender=GeneratedImage)
+def update_search_index(sender, instance, update_fields=None, **kwargs):
+    search.index_image(instance, update_fields)
+
+@receiver(post_delete, sender=SearchDocument)
+def remove_search_document(sender, instance, **kwargs):
+    """Also runs when a deleted image cascades to its document"""
+    search.remove_document(instance.pk)
+
+@receiver(post_save, sender=StylePreset)
+@receiver(post_delete, sender=StylePreset)
+def invalidate_homepage_on_style_change(sender, instance, **kwargs):
+    invalidate_homepage(styles=True)
+
+@receiver(post_save, sender=Like)
+def increment_likes_count(sender, instance, created, **kwargs):
+    if created:
+        Post.adjust_counter(instance.post_id, 'likes_count', 1)
+
+@receiver(post_delete, sender=Like)
+def decrement_likes_count(sender, instance, **kwargs):
+    Post.adjust_counter(instance.post_id, 'likes_count', -1)
+
+@receiver(post_save, sender=Comment)
+def increment_comments_count(sender, instance, created, **kwargs):
+    if created:
+        Post.adjust_counter(instance.post_id, 'comments_count', 1)
+
+@receiver(post_delete, sender=Comment)
+def decrement_comments_count(sender, instance, **kwargs):
+    Post.adjust_counter(instance.post_id, 'comments_count', -1)
@@ -0,0 +1,167 @@
+"""
+Content-addressed media storage.
+
+ContentAddressedStorage (MEDIA_STORAGE_BACKEND = 'content-addressed') stores
+every saved file once per content hash, sharded two levels deep under the
+directory it was saved to:
+
+    generated_images/generated_<uuid>.png
+        -> generated_images/3f/a2/3fa2...e9.png
+
+so no directory grows past a few thousand entries, and identical images
+(e.g. the same seeded prompt) share one file. A MediaBlob row per file counts
+the saves that returned its name; delete() drops one reference and removes
+the file with the last. FileFields work unchanged: they keep whatever name
+save() returns.
+
+Files derived from a blob, such as thumbnail variants (<hash>.w320.webp), are
+written at exactly the name asked for through save_derived_file(), and are
+only deleted once their blob is gone. Names outside this layout, e.g. files
+saved before switching, behave as in FileSystemStorage until
+`manage.py migrate_media_storage` moves them in.
+"""
+
+import hashlib
+import os
+import re
+import uuid
+
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+from django.db.models import F
+
+BLOB_NAME_RE = re.compile(r'^(?P<dir>(?:.+/)?)(?P<a>[0-9a-f]{2})/(?P<b>[0-9a-f]{2})/(?P<hash>[0-9a-f]{64})(?P<rest>.*)$')
+
+
+def save_derived_file(storage, name, content):
+    """Write a file derived from a stored one (e.g. a thumbnail) at exactly `name`, replacing any previous version."""
+    if hasattr(storage, 'save_derived'):
+        return storage.save_derived(name, content)
+    if storage.exists(name):
+        storage.delete(name)
+    return storage.save(name, content)
+
+
+def hash_file(file):
+    """SHA-256 of a Django File, read in chunks."""
+    digest = hashlib.sha256()
+    for chunk in file.chunks():
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """FileSystemStorage that shards by content hash and deduplicates with reference counts."""
+
+    # Callers deleting files on behalf of several rows must delete once per row
+    reference_counted = True
+
+    def blob_name(self, name, digest):
+        """Sharded name for content `digest` saved under `name`'s directory."""
+        directory = os.path.dirname(name)
+        extension = os.path.splitext(name)[1].lower()
+        blob = f"{digest[:2]}/{digest[2:4]}/{digest}{extension}"
+        return f"{directory}/{blob}" if directory else blob
+
+    def parse_name(self, name):
+        """(blob prefix, hash) for a name inside the sharded layout, else None."""
+        match = BLOB_NAME_RE.match(name or '')
+        if not match:
+            return None
+        digest = match.group('hash')
+        if match.group('a') != digest[:2] or match.group('b') != digest[2:4]:
+            return None
+        return f"{match.group('dir')}{match.group('a')}/{match.group('b')}/{digest}", digest
+
+    def get_available_name(self, name, max_length=None):
+        # _save() picks the real name from the content, so there is nothing to probe
+        return name
+
+    def _write(self, name, content):
+        """Write `content` to `name` via a temp file and rename, replacing any existing file."""
+        temp_name = super()._save(f"{name}.{uuid.uuid4().hex}.tmp", content)
+        os.replace(self.path(temp_name), self.path(name))
+
+    def _save(self, name, content):
+        from .models import MediaBlob
+
+        # Streamed downloads (core.media_ingest) were hashed on the way in
+        digest = getattr(content, 'sha256', None) or hash_file(content)
+        name = self.blob_name(name, digest)
+
+        with transaction.atomic():
+            blob, created = MediaBlob.objects.select_for_update().get_or_create(
+                name=name,
+                defaults={'content_hash': digest, 'size': content.size, 'refcount': 1}
+            )
+            if not created:
+                MediaBlob.objects.filter(pk=name).update(refcount=F('refcount') + 1)
+            if created or not self.exists(name):
+                self._write(name, content)
+        return name
+
+    def save_derived(self, name, content):
+        self._write(name, content)
+        return name
+
+    def add_reference(self, name):
+        """Count one more reference to an existing blob (e.g. a copied row)."""
+        from .models import MediaBlob
+        return MediaBlob.objects.filter(pk=name).update(refcount=F('refcount') + 1) == 1
+
+    def adopt(self, name, digest=None):
+        """
+        Move an existing plain file into the sharded layout and return its new
+        name, holding one reference. A file whose content is already stored is
+        removed in favour of the stored copy.
+        """
+        from .models import MediaBlob
+
+        if digest is None:
+            with self.open(name, 'rb') as f:
+                digest = hash_file(f)
+        blob_name = self.blob_name(name, digest)
+        if blob_name == name:
+            return name
+
+        with transaction.atomic():
+            blob, created = MediaBlob.objects.select_for_update().get_or_create(
+                name=blob_name,
+                defaults={'content_hash': digest, 'size': self.size(name), 'refcount': 1}
+            )
+            if not created:
+                MediaBlob.objects.filter(pk=blob_name).update(refcount=F('refcount') + 1)
+            self.move(name, blob_name, replace=created or not self.exists(blob_name))
+        return blob_name
+
+    def move(self, name, target, replace=True):
+        """Rename `name` to `target`, or just delete it when `replace` is False (target kept)."""
+        if replace:
+            os.makedirs(os.path.dirname(self.path(target)), exist_ok=True)
+            os.replace(self.path(name), self.path(target))
+        else:
+            os.remove(self.path(name))
+
+    def delete(self, name):
+        from .models import MediaBlob
+
+        parsed = self.parse_name(name)
+        if parsed is None:
+            return super().delete(name)
+
+        prefix, digest = parsed
+        with transaction.atomic():
+            blob = MediaBlob.objects.select_for_update().filter(pk=name).first()
+            if blob is None:
+                # A derived file: it goes with the last reference to its blob
+                if MediaBlob.objects.filter(content_hash=digest, name__startswith=prefix).exists():
+                    return
+                return super().delete(name)
+
+            if blob.refcount > 1:
+                MediaBlob.objects.filter(pk=name).update(refcount=F('refcount') - 1)
+                return
+            blob.delete()
+            # Removed before commit, so a concurrent save of the same content
+            # (blocked on the row) writes a fresh file afterwards
+            super().delete(name)
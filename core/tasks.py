@@ -0,0 +1,20 @@
+from celery import shared_task
+
+from .generation_jobs import run_generation_job, sweep_stale_jobs
+from .media_reconciler import media_reconciler
+
+@shared_task(ignore_result=True)
+def run_generation_job_task(job_id):
+    """Celery entry point for the image generation job queue."""
+    run_generation_job(job_id)
+
+@shared_task(ignore_result=True)
+def sweep_generation_jobs_task():
+    """Requeue or fail stranded generation jobs; schedule it with Celery beat."""
+    sweep_stale_jobs()
+
+@shared_task(ignore_result=True)
+def reconcile_media_task(quarantine=True):
+    """Periodic orphaned-media cleanup; schedule it with Celery beat."""
+    report = media_reconciler.run(dry_run=False, quarantine=quarantine)
+    print(f"🧹 Media reconcile: {report['removed']} of {report['orphans']} orphan(s) removed, {len(report['failed'])} failure(s)")
@@ -0,0 +1,15 @@
+from django import template
+
+register = template.Library()
+
+
+@register.filter
+def thumbnail_url(image, size=''):
+    """{{ image|thumbnail_url:640 }} - see GeneratedImage.thumbnail_url"""
+    return image.thumbnail_url(int(size)) if size else image.thumbnail_url()
+
+
+@register.filter
+def thumbnail_srcset(image, fmt='webp'):
+    """{{ image|thumbnail_srcset:'avif' }} - see GeneratedImage.thumbnail_srcset"""
+    return image.thumbnail_srcset(fmt)
@@ -0,0 +1,72 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase
+
+from core.circuit_breaker import CircuitBreaker, CircuitOpenError
+
+
+def fail():
+    raise ValueError('provider down')
+
+
+class CircuitBreakerTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.breaker = CircuitBreaker('test_provider', failure_threshold=2, cooldown=60)
+
+    def call(self, func, breaker=None):
+        try:
+            return (breaker or self.breaker).call(func)
+        except ValueError:
+            return None
+
+    def test_opens_after_consecutive_failures(self):
+        self.call(fail)
+        self.assertEqual(self.breaker.get_state()['state'], 'closed')
+        self.call(fail)
+        self.assertEqual(self.breaker.get_state()['state'], 'open')
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.call(lambda: 'never called')
+
+    def test_success_resets_the_failure_count(self):
+        self.call(fail)
+        self.assertEqual(self.breaker.call(lambda: 'ok'), 'ok')
+        self.call(fail)
+        state = self.breaker.get_state()
+        self.assertEqual((state['state'], state['failures'], state['total_calls']), ('closed', 1, 3))
+
+    def test_one_probe_after_cooldown(self):
+        self.call(fail)
+        self.call(fail)
+        later = time.time() + 61
+        with mock.patch('core.circuit_breaker.time.time', return_value=later):
+            self.assertEqual(self.breaker.allow_request(), (True, True))
+            self.assertEqual(self.breaker.get_state()['state'], 'half_open')
+            # A second caller is turned away while the probe runs
+            self.assertEqual(self.breaker.allow_request(), (False, False))
+            self.breaker.record_success(0.1, probe=True)
+        self.assertEqual(self.breaker.get_state()['state'], 'closed')
+
+    def test_failed_probe_reopens(self):
+        self.call(fail)
+        self.call(fail)
+        later = time.time() + 61
+        with mock.patch('core.circuit_breaker.time.time', return_value=later):
+            self.call(fail)
+            self.assertEqual(self.breaker.allow_request(), (False, False))
+        self.assertEqual(self.breaker.get_state()['state'], 'open')
+
+    def test_probe_lock_outlives_the_slowest_call(self):
+        breaker = CircuitBreaker('slow_provider', cooldown=60, max_call_time=200)
+        self.assertEqual(breaker.probe_timeout, 200)
+        self.assertGreaterEqual(CircuitBreaker('fast_provider', cooldown=60).probe_timeout, 60)
+
+    def test_concurrent_failures_are_all_counted(self):
+        breaker = CircuitBreaker('busy_provider', failure_threshold=1000, cooldown=60)
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(lambda _: self.call(fail, breaker), range(200)))
+        state = breaker.get_state()
+        self.assertEqual((state['failures'], state['total_failures'], state['total_calls']), (200, 200, 200))
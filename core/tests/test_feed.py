@@ -0,0 +1,80 @@
+from datetime import timedelta
+
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from core.feed import InvalidCursor, decode_cursor, encode_cursor, get_feed_page
+from core.models import CustomUser, GeneratedImage
+
+
+class KeysetFeedTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user(username='feeder', email='feeder@example.com', password='x')
+        now = timezone.now()
+        cls.images = []
+        for i in range(7):
+            image = GeneratedImage.objects.create(user=cls.user, prompt=f'image {i}', image=f'generated_images/{i}.png')
+            # Two pairs share a timestamp, so ties must be broken by id
+            created_at = now - timedelta(minutes=i // 2 if i < 4 else i)
+            GeneratedImage.objects.filter(pk=image.pk).update(created_at=created_at)
+            cls.images.append(image)
+        private = GeneratedImage.objects.create(user=cls.user, prompt='private', image='generated_images/p.png', is_public=False)
+        cls.private_id = private.pk
+
+        cls.expected = list(
+            GeneratedImage.objects.filter(is_public=True).order_by('-created_at', '-id').values_list('pk', flat=True)
+        )
+
+    def walk(self, page_size):
+        seen, cursor, pages = [], None, 0
+        while True:
+            posts, cursor = get_feed_page(cursor, page_size)
+            seen.extend(post.pk for post in posts)
+            pages += 1
+            if cursor is None:
+                return seen, pages
+
+    def test_pages_cover_the_feed_in_order_without_repeats(self):
+        for page_size in (1, 2, 3, 7):
+            seen, pages = self.walk(page_size)
+            self.assertEqual(seen, self.expected, page_size)
+            self.assertEqual(pages, -(-len(self.expected) // page_size))
+
+    def test_private_images_are_excluded(self):
+        seen, _ = self.walk(3)
+        self.assertNotIn(self.private_id, seen)
+
+    def test_last_full_page_has_no_cursor(self):
+        posts, cursor = get_feed_page(page_size=len(self.expected))
+        self.assertEqual(len(posts), len(self.expected))
+        self.assertIsNone(cursor)
+
+    def test_cursor_round_trip(self):
+        image = GeneratedImage.objects.get(pk=self.expected[2])
+        self.assertEqual(decode_cursor(encode_cursor(image)), (image.created_at, image.pk))
+
+    def test_new_images_do_not_shift_later_pages(self):
+        first, cursor = get_feed_page(page_size=3)
+        GeneratedImage.objects.create(user=self.user, prompt='newest', image='generated_images/new.png')
+        second, _ = get_feed_page(cursor, page_size=3)
+        self.assertEqual([post.pk for post in second], self.expected[3:6])
+
+    def test_invalid_cursor(self):
+        for cursor in ('not-a-cursor', encode_cursor(GeneratedImage(created_at=timezone.now()))[:-4], '!!!'):
+            with self.assertRaises(InvalidCursor):
+                get_feed_page(cursor)
+
+    def test_feed_endpoint_rejects_bad_cursor(self):
+        response = self.client.get(reverse('explore_feed'), {'cursor': 'garbage'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_feed_endpoint_pages(self):
+        response = self.client.get(reverse('explore_feed'), {'page_size': 4})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual([item['id'] for item in data['items']], [str(pk) for pk in self.expected[:4]])
+
+        response = self.client.get(reverse('explore_feed'), {'page_size': 4, 'cursor': data['next_cursor']})
+        self.assertEqual([item['id'] for item in response.json()['items']], [str(pk) for pk in self.expected[4:]])
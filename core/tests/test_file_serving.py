@@ -0,0 +1,107 @@
+import os
+import shutil
+import tempfile
+
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from core.file_serving import RangeNotSatisfiable, parse_range, serve_file
+
+CONTENT = b'0123456789abcdefghij'
+
+
+class ParseRangeTests(SimpleTestCase):
+    def test_single_ranges(self):
+        self.assertEqual(parse_range('bytes=2-5', 20), (2, 5))
+        self.assertEqual(parse_range('bytes=15-', 20), (15, 19))
+        self.assertEqual(parse_range('bytes=-4', 20), (16, 19))
+        self.assertEqual(parse_range('bytes=10-99', 20), (10, 19))
+
+    def test_whole_file_cases(self):
+        for header in (None, '', 'bytes=-', 'items=0-1', 'bytes=0-1,4-5', 'bytes=5-2'):
+            self.assertIsNone(parse_range(header, 20), header)
+
+    def test_unsatisfiable(self):
+        with self.assertRaises(RangeNotSatisfiable):
+            parse_range('bytes=20-', 20)
+        with self.assertRaises(RangeNotSatisfiable):
+            parse_range('bytes=-0', 20)
+
+
+@override_settings(DOWNLOAD_SENDFILE_BACKEND='')
+class ServeFileTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+        self.path = os.path.join(self.directory, 'image.png')
+        with open(self.path, 'wb') as f:
+            f.write(CONTENT)
+        self.factory = RequestFactory()
+
+    def serve(self, **headers):
+        response = serve_file(self.factory.get('/download/', headers=headers), self.path, 'image.png', 'image/png')
+        self.addCleanup(response.close)
+        return response
+
+    def body(self, response):
+        return b''.join(response.streaming_content) if response.streaming else response.content
+
+    def test_full_download(self):
+        response = self.serve()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.body(response), CONTENT)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertIn('attachment', response['Content-Disposition'])
+        self.assertIn('private', response['Cache-Control'])
+        self.assertTrue(response['ETag'])
+        self.assertTrue(response['Last-Modified'])
+
+    def test_if_none_match_returns_304(self):
+        etag = self.serve()['ETag']
+        response = self.serve(if_none_match=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_if_modified_since_returns_304(self):
+        last_modified = self.serve()['Last-Modified']
+        self.assertEqual(self.serve(if_modified_since=last_modified).status_code, 304)
+
+    def test_changed_file_gets_a_new_etag(self):
+        etag = self.serve()['ETag']
+        with open(self.path, 'ab') as f:
+            f.write(b'more')
+        response = self.serve(if_none_match=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_range_returns_206(self):
+        response = self.serve(range='bytes=2-5')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(self.body(response), CONTENT[2:6])
+        self.assertEqual(response['Content-Range'], f'bytes 2-5/{len(CONTENT)}')
+        self.assertEqual(response['Content-Length'], '4')
+
+    def test_suffix_range(self):
+        response = self.serve(range='bytes=-3')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(self.body(response), CONTENT[-3:])
+
+    def test_range_past_the_end_returns_416(self):
+        response = self.serve(range=f'bytes={len(CONTENT)}-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], f'bytes */{len(CONTENT)}')
+
+    def test_if_range_honours_only_the_current_version(self):
+        etag = self.serve()['ETag']
+        self.assertEqual(self.serve(range='bytes=0-1', if_range=etag).status_code, 206)
+
+        response = self.serve(range='bytes=0-1', if_range='"stale"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.body(response), CONTENT)
+
+    @override_settings(DOWNLOAD_SENDFILE_BACKEND='x-accel', DOWNLOAD_SENDFILE_PREFIX='/protected-media/')
+    def test_x_accel_redirect_under_media_root(self):
+        with override_settings(MEDIA_ROOT=self.directory):
+            response = self.serve()
+        self.assertEqual(response['X-Accel-Redirect'], '/protected-media/image.png')
+        self.assertEqual(response['Content-Type'], 'image/png')
+        self.assertEqual(response.content, b'')
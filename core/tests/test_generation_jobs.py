@@ -0,0 +1,91 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from core.generation_jobs import GenerationJobQueue, claim_job, sweep_stale_jobs
+from core.models import CustomUser, GenerationJob
+
+
+@override_settings(GENERATION_JOB_TIMEOUT=600, GENERATION_JOB_REQUEUE_AFTER=60)
+class SweepStaleJobsTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username='jobs', email='jobs@example.com', password='x')
+        self.dispatched = []
+
+    def job(self, status='pending', age=0, started_age=None):
+        job = GenerationJob.objects.create(user=self.user, prompt='a prompt', status=status)
+        now = timezone.now()
+        GenerationJob.objects.filter(pk=job.pk).update(
+            created_at=now - timedelta(seconds=age),
+            started_at=now - timedelta(seconds=started_age) if started_age is not None else None
+        )
+        return job
+
+    def sweep(self):
+        return sweep_stale_jobs(self.dispatched.append)
+
+    def test_stranded_pending_jobs_are_dispatched_again(self):
+        stranded = self.job(age=120)
+        fresh = self.job(age=5)
+
+        self.assertEqual(self.sweep(), {'requeued': 1, 'failed': 0})
+        self.assertEqual(self.dispatched, [stranded.pk])
+        fresh.refresh_from_db()
+        self.assertEqual(fresh.status, 'pending')
+
+    def test_jobs_past_the_timeout_are_failed(self):
+        running = self.job(status='running', age=900, started_age=700)
+        never_started = self.job(age=900)
+        healthy = self.job(status='running', age=200, started_age=100)
+
+        self.assertEqual(self.sweep()['failed'], 2)
+        for job in (running, never_started):
+            job.refresh_from_db()
+            self.assertEqual(job.status, 'failed')
+            self.assertIn('timed out', job.error)
+            self.assertIsNotNone(job.finished_at)
+        healthy.refresh_from_db()
+        self.assertEqual(healthy.status, 'running')
+        self.assertEqual(self.dispatched, [])
+
+    def test_a_requeued_job_runs_only_once(self):
+        job = self.job(age=120)
+        self.sweep()
+        self.assertTrue(claim_job(job.pk))
+        self.assertFalse(claim_job(job.pk))
+
+    def test_finished_jobs_are_left_alone(self):
+        self.job(status='succeeded', age=5000, started_age=5000)
+        self.job(status='failed', age=5000, started_age=5000)
+        self.assertEqual(self.sweep(), {'requeued': 0, 'failed': 0})
+
+
+class RecordingExecutor:
+    def __init__(self):
+        self.submitted = []
+
+    def submit(self, fn, *args):
+        self.submitted.append((fn, args))
+
+
+@override_settings(GENERATION_JOB_BACKEND='thread')
+class ThreadDispatchTests(TestCase):
+    def test_jobs_waiting_in_the_pool_are_not_submitted_again(self):
+        queue = GenerationJobQueue()
+        executor = queue._executor = RecordingExecutor()
+        user = CustomUser.objects.create_user(username='queued', email='queued@example.com', password='x')
+        job = GenerationJob.objects.create(user=user, prompt='a prompt')
+
+        queue.dispatch(job.pk)
+        queue.dispatch(job.pk)
+        self.assertEqual(len(executor.submitted), 1)
+
+        # Once it has run, a later dispatch goes through again
+        fn, args = executor.submitted[0]
+        with mock.patch('core.generation_jobs.run_generation_job') as run:
+            fn(*args)
+        run.assert_called_once_with(job.pk)
+        queue.dispatch(job.pk)
+        self.assertEqual(len(executor.submitted), 2)
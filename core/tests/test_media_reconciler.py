@@ -0,0 +1,108 @@
+import os
+import shutil
+import tempfile
+import time
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from core.media_reconciler import MediaReconciler
+from core.models import CustomUser, GeneratedImage
+
+
+class MediaReconcilerTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root, MEDIA_QUARANTINE_DIR=None)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        user = CustomUser.objects.create_user(username='owner', email='owner@example.com', password='x')
+        GeneratedImage.objects.create(
+            user=user,
+            prompt='kept',
+            image='generated_images/kept.png',
+            thumbnails={'webp': [320]}
+        )
+
+        self.referenced = ['generated_images/kept.png', 'generated_images/kept.w320.webp']
+        self.orphans = ['generated_images/orphan.png', 'videos/old.mp4']
+        self.owned_elsewhere = ['generation_cache/ab/abcd.png', '.ingest/tmp123.ingest']
+        for name in self.referenced + self.orphans + self.owned_elsewhere:
+            self.write(name, b'x' * 10, age=7200)
+        # Still being saved by a generation job
+        self.write('generated_images/fresh.png', b'x' * 10, age=0)
+
+        self.reconciler = MediaReconciler()
+
+    def write(self, name, content, age):
+        path = os.path.join(self.media_root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(content)
+        if age:
+            past = time.time() - age
+            os.utime(path, (past, past))
+
+    def exists(self, name):
+        return os.path.exists(os.path.join(self.media_root, name))
+
+    def run_reconciler(self, **kwargs):
+        # ctime cannot be backdated, so age checks use min_age=0 unless testing them
+        kwargs.setdefault('min_age', 0)
+        return self.reconciler.run(**kwargs)
+
+    def test_dry_run_reports_without_touching_files(self):
+        report = self.run_reconciler(dry_run=True)
+
+        self.assertEqual(report['orphans'], 3)
+        self.assertEqual(report['bytes'], 30)
+        self.assertEqual(report['by_dir']['generated_images']['files'], 2)
+        self.assertEqual(report['removed'], 0)
+        for name in self.referenced + self.orphans + self.owned_elsewhere:
+            self.assertTrue(self.exists(name), name)
+
+    def test_delete_removes_only_orphans(self):
+        report = self.run_reconciler(dry_run=False)
+
+        self.assertEqual(report['removed'], 3)
+        self.assertEqual(report['failed'], [])
+        for name in self.orphans + ['generated_images/fresh.png']:
+            self.assertFalse(self.exists(name), name)
+        for name in self.referenced + self.owned_elsewhere:
+            self.assertTrue(self.exists(name), name)
+
+    def test_quarantine_moves_orphans_and_keeps_their_paths(self):
+        report = self.run_reconciler(dry_run=False, quarantine=True)
+
+        self.assertEqual(report['removed'], 3)
+        for name in self.orphans:
+            self.assertFalse(self.exists(name))
+            self.assertTrue(os.path.exists(os.path.join(report['quarantine_dir'], name)))
+
+        # The quarantine is never reconciled itself
+        self.assertEqual(self.run_reconciler(dry_run=True)['orphans'], 0)
+
+    def test_min_age_skips_recent_files(self):
+        report = self.reconciler.run(dry_run=True, min_age=3600)
+        self.assertEqual(report['orphans'], 0)
+
+    def test_directory_filter(self):
+        report = self.run_reconciler(dry_run=False, directories=['videos'])
+        self.assertEqual(report['removed'], 1)
+        self.assertFalse(self.exists('videos/old.mp4'))
+        self.assertTrue(self.exists('generated_images/orphan.png'))
+
+    def test_command_dry_run_and_delete(self):
+        out = StringIO()
+        call_command('reconcile_media', '--dry-run', '--min-age', '0', stdout=out)
+        self.assertIn('Dry run: 3 orphaned file(s)', out.getvalue())
+        self.assertTrue(self.exists('generated_images/orphan.png'))
+
+        out = StringIO()
+        call_command('reconcile_media', '--min-age', '0', stdout=out)
+        self.assertIn('Deleted 3 of 3 orphaned file(s)', out.getvalue())
+        self.assertFalse(self.exists('generated_images/orphan.png'))
+        self.assertTrue(self.exists('generated_images/kept.png'))
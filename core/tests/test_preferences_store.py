@@ -0,0 +1,67 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+
+from django.core.cache import cache
+from django.test import SimpleTestCase
+
+from core.preferences_store import PreferencesStore
+
+
+class PreferencesStoreTests(SimpleTestCase):
+    backend = 'file'
+
+    def setUp(self):
+        cache.clear()
+        self.storage_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.storage_dir, ignore_errors=True)
+
+    def store(self):
+        return PreferencesStore(self.storage_dir, self.backend)
+
+    def test_missing_preferences_are_empty(self):
+        self.assertEqual(self.store().get(1), {})
+
+    def test_round_trip_returns_copies(self):
+        store = self.store()
+        store.save(1, {'theme': 'dark', 'tags': ['a']})
+        preferences = store.get(1)
+        preferences['tags'].append('b')
+        self.assertEqual(store.get(1), {'theme': 'dark', 'tags': ['a']})
+
+    def test_other_workers_see_a_save_on_their_next_read(self):
+        # Separate stores stand in for worker processes: each has its own LRU
+        # and both have already cached the old value
+        worker_a, worker_b = self.store(), self.store()
+        worker_a.save(1, {'theme': 'dark'})
+        self.assertEqual(worker_b.get(1), {'theme': 'dark'})
+
+        worker_b.save(1, {'theme': 'light'})
+        self.assertEqual(worker_a.get(1), {'theme': 'light'})
+
+        # Even when the shared cache tier is lost or per process
+        cache.clear()
+        worker_a.save(1, {'theme': 'blue'})
+        cache.clear()
+        self.assertEqual(worker_b.get(1), {'theme': 'blue'})
+
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            PreferencesStore(self.storage_dir, 'redis')
+
+
+class SQLitePreferencesStoreTests(PreferencesStoreTests):
+    backend = 'sqlite'
+
+    def test_tables_without_a_version_column_are_upgraded(self):
+        connection = sqlite3.connect(os.path.join(self.storage_dir, 'preferences.sqlite3'))
+        connection.execute('CREATE TABLE preferences (user_id TEXT PRIMARY KEY, data TEXT NOT NULL)')
+        connection.execute("INSERT INTO preferences VALUES ('1', '{\"theme\": \"old\"}')")
+        connection.commit()
+        connection.close()
+
+        store = self.store()
+        self.assertEqual(store.get(1), {'theme': 'old'})
+        store.save(1, {'theme': 'new'})
+        self.assertEqual(self.store().get(1), {'theme': 'new'})
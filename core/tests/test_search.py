@@ -0,0 +1,106 @@
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+
+from core.models import CustomUser, GeneratedImage
+from core.search import fts_match_expression, parse_query, rebuild_index, search_images
+
+
+class ParseQueryTests(TestCase):
+    def test_terms_and_tags(self):
+        self.assertEqual(parse_query('Sunset over #Beach sunset'), (['sunset', 'over'], ['beach']))
+        self.assertEqual(parse_query('city', tags=['NightLife']), (['city'], ['nightlife']))
+
+    def test_last_term_is_a_prefix(self):
+        self.assertEqual(fts_match_expression(['red', 'sun'], []), '"red" AND "sun"*')
+        self.assertEqual(fts_match_expression(['at'], ['beach']), '"at" AND hashtags : "beach"')
+
+
+class SearchPagingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        user = CustomUser.objects.create_user(username='searcher', email='searcher@example.com', password='x')
+        now = timezone.now()
+        cls.matches = []
+        for i in range(9):
+            image = GeneratedImage.objects.create(
+                user=user,
+                prompt=f'mountain lake number {i}',
+                image=f'generated_images/m{i}.png',
+                hashtags='#nature, #lake' if i % 2 else '#nature'
+            )
+            GeneratedImage.objects.filter(pk=image.pk).update(created_at=now - timedelta(minutes=i))
+            cls.matches.append(image.pk)
+        GeneratedImage.objects.create(user=user, prompt='city skyline', image='generated_images/c.png')
+        cls.private = GeneratedImage.objects.create(
+            user=user, prompt='mountain lake private', image='generated_images/p.png', is_public=False
+        ).pk
+
+    def collect(self, text, page_size, tags=()):
+        seen, page = [], 1
+        while True:
+            images, has_next = search_images(text, tags=tags, page=page, page_size=page_size)
+            seen.extend(image.pk for image in images)
+            if not has_next:
+                return seen, page
+            page += 1
+
+    def test_paging_returns_every_match_once(self):
+        for page_size in (1, 2, 4, 9):
+            seen, pages = self.collect('mountain lake', page_size)
+            self.assertCountEqual(seen, self.matches)
+            self.assertEqual(len(seen), len(set(seen)))
+            self.assertEqual(pages, -(-len(self.matches) // page_size))
+
+    def test_has_next_is_false_only_on_the_last_page(self):
+        images, has_next = search_images('mountain', page=2, page_size=4)
+        self.assertEqual(len(images), 4)
+        self.assertTrue(has_next)
+        images, has_next = search_images('mountain', page=3, page_size=4)
+        self.assertEqual(len(images), 1)
+        self.assertFalse(has_next)
+
+    def test_prefix_search(self):
+        seen, _ = self.collect('mount', 5)
+        self.assertCountEqual(seen, self.matches)
+
+    def test_private_and_unrelated_images_are_not_returned(self):
+        seen, _ = self.collect('lake', 3)
+        self.assertNotIn(self.private, seen)
+        self.assertEqual(search_images('skyline')[0][0].prompt, 'city skyline')
+
+    def test_tag_filters(self):
+        tagged = [pk for i, pk in enumerate(self.matches) if i % 2]
+        seen, _ = self.collect('mountain #lake', 2)
+        self.assertCountEqual(seen, tagged)
+
+        # Tags alone read the hashtag index, newest first
+        seen, _ = self.collect('', 2, tags=['lake'])
+        self.assertEqual(seen, tagged)
+
+    def test_rebuild_index_keeps_results(self):
+        self.assertEqual(rebuild_index(), len(self.matches) + 1)
+        seen, _ = self.collect('mountain lake', 4)
+        self.assertCountEqual(seen, self.matches)
+
+    def test_unpublished_images_drop_out(self):
+        image = GeneratedImage.objects.get(pk=self.matches[0])
+        image.is_public = False
+        image.save()
+        seen, _ = self.collect('mountain', 4)
+        self.assertNotIn(self.matches[0], seen)
+        self.assertEqual(len(seen), len(self.matches) - 1)
+
+    def test_results_are_ranked_by_relevance(self):
+        user = CustomUser.objects.get(username='searcher')
+        weak = GeneratedImage.objects.create(user=user, prompt='glacier', image='generated_images/g.png')
+        GeneratedImage.objects.filter(pk=weak.pk).update(created_at=timezone.now() - timedelta(days=365))
+        GeneratedImage.objects.create(user=user, prompt='glacier glacier over a glacier lake', image='generated_images/g2.png')
+
+        images, _ = search_images('glacier')
+        self.assertEqual(images[0].prompt, 'glacier glacier over a glacier lake')
+        self.assertEqual(images[1].pk, weak.pk)
+
+    def test_empty_query(self):
+        self.assertEqual(search_images('  '), ([], False))
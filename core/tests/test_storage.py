@@ -0,0 +1,89 @@
+import os
+import shutil
+import tempfile
+
+from django.core.files.base import ContentFile
+from django.test import TestCase
+
+from core.models import MediaBlob
+from core.storage import ContentAddressedStorage, save_derived_file
+
+
+class ContentAddressedStorageTests(TestCase):
+    def setUp(self):
+        self.location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.location, ignore_errors=True)
+        self.storage = ContentAddressedStorage(location=self.location)
+
+    def save(self, content, name='generated_images/generated_1.png'):
+        return self.storage.save(name, ContentFile(content))
+
+    def test_identical_content_shares_one_blob(self):
+        first = self.save(b'same bytes', 'generated_images/a.png')
+        second = self.save(b'same bytes', 'generated_images/b.png')
+
+        self.assertEqual(first, second)
+        self.assertIsNotNone(self.storage.parse_name(first))
+        self.assertEqual(MediaBlob.objects.get(pk=first).refcount, 2)
+        blob_dir = os.path.dirname(self.storage.path(first))
+        self.assertEqual(os.listdir(blob_dir), [os.path.basename(first)])
+
+    def test_different_content_gets_different_blobs(self):
+        self.assertNotEqual(self.save(b'one'), self.save(b'two'))
+        self.assertEqual(MediaBlob.objects.count(), 2)
+
+    def test_file_is_removed_with_the_last_reference(self):
+        name = self.save(b'shared')
+        self.save(b'shared')
+
+        self.storage.delete(name)
+        self.assertTrue(self.storage.exists(name))
+        self.assertEqual(MediaBlob.objects.get(pk=name).refcount, 1)
+
+        self.storage.delete(name)
+        self.assertFalse(self.storage.exists(name))
+        self.assertFalse(MediaBlob.objects.filter(pk=name).exists())
+
+    def test_derived_files_outlive_references_but_not_the_blob(self):
+        name = self.save(b'original')
+        self.save(b'original')
+        variant = name.replace('.png', '.w320.webp')
+        save_derived_file(self.storage, variant, ContentFile(b'thumbnail'))
+
+        self.storage.delete(variant)
+        self.assertTrue(self.storage.exists(variant))
+
+        self.storage.delete(name)
+        self.storage.delete(name)
+        self.storage.delete(variant)
+        self.assertFalse(self.storage.exists(variant))
+
+    def test_add_reference_counts_a_copied_row(self):
+        name = self.save(b'copied')
+        self.assertTrue(self.storage.add_reference(name))
+        self.assertEqual(MediaBlob.objects.get(pk=name).refcount, 2)
+        self.assertFalse(self.storage.add_reference('generated_images/missing.png'))
+
+    def test_adopt_moves_plain_files_and_merges_duplicates(self):
+        for legacy in ('generated_images/old_1.png', 'generated_images/old_2.png'):
+            os.makedirs(os.path.dirname(self.storage.path(legacy)), exist_ok=True)
+            with open(self.storage.path(legacy), 'wb') as f:
+                f.write(b'legacy bytes')
+
+        first = self.storage.adopt('generated_images/old_1.png')
+        second = self.storage.adopt('generated_images/old_2.png')
+
+        self.assertEqual(first, second)
+        self.assertTrue(self.storage.exists(first))
+        self.assertFalse(self.storage.exists('generated_images/old_1.png'))
+        self.assertFalse(self.storage.exists('generated_images/old_2.png'))
+        self.assertEqual(MediaBlob.objects.get(pk=first).refcount, 2)
+
+    def test_plain_names_delete_like_filesystem_storage(self):
+        os.makedirs(os.path.join(self.location, 'profile_pics'))
+        with open(os.path.join(self.location, 'profile_pics', 'me.png'), 'wb') as f:
+            f.write(b'avatar')
+
+        self.assertIsNone(self.storage.parse_name('profile_pics/me.png'))
+        self.storage.delete('profile_pics/me.png')
+        self.assertFalse(self.storage.exists('profile_pics/me.png'))
@@ -17,9 +17,14 @@ urlpatterns = [
     path('', views.home, name='home'),
     path('about/', views.about, name='about'),
     path('explore/', views.explore, name='explore'),
+    path('explore/feed/', views.explore_feed, name='explore_feed'),
+    path('search/', views.search, name='search'),
+    path('tag/<str:name>/', views.tag_browse, name='tag_browse'),
+    path('tag/<str:name>/feed/', views.tag_feed, name='tag_feed'),
     
     # User-related pages
     path('generate/', views.generate_image_view, name='generate_image'),
+    path('generate/jobs/<uuid:job_id>/', views.generation_job_status, name='generation_job_status'),
     path('gallery/', views.gallery, name='gallery'),
     path('profile/', views.profile_redirect, name='profile'),
     path('profile/<str:username>/', views.profile, name='user_profile'),
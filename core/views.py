@@ -1,16 +1,19 @@
 from django.shortcuts import render, redirect, get_object_or_404
+from django.template.loader import render_to_string
 from django.contrib.auth.decorators import login_required
-from django.http import JsonResponse, HttpResponse, Http404
+from django.http import JsonResponse, Http404
 from django.contrib import messages
 from django.urls import reverse
 from django.conf import settings
 from django.views.decorators.http import require_POST
 from django.core.paginator import Paginator
+from django.db import IntegrityError, transaction
 from django.db.models import Q, Count
 from django.utils import timezone
 from datetime import timedelta
 import json
 import os
+from concurrent.futures import ThreadPoolExecutor
 import mimetypes
 from urllib.parse import quote
 import random # Add this import
@@ -19,37 +22,46 @@ import random # Add this import
 import qrcode
 from io import BytesIO
 import base64
-from PIL import Image
+from PIL import Image, ImageFont
 
-from .models import CustomUser, Post, GeneratedImage, StylePreset, Like, Comment
+from .models import CustomUser, Post, GeneratedImage, GenerationJob, StylePreset, Like, Comment, Hashtag
 from .forms import (
     CustomUserCreationForm, ProfileUpdateForm, ImageGenerationForm, CommentForm, PostForm
 )
 from .hashtag_generator import HashtagGenerator
+from .generation_jobs import generation_queue
+from .circuit_breaker import circuit_breaker
+from .generation_cache import generation_cache
+from .http_client import provider_http
+from .media_ingest import ingest_response
+from .gradient_renderer import vertical_gradient_image
+from .file_serving import serve_file
+from .image_deletion import delete_images
+from .feed import FEED_PAGE_SIZE, InvalidCursor, get_feed_page, get_popular_hashtags, hashtag_feed_queryset
+from .homepage_cache import get_active_style_presets, get_fragment_ttl, get_homepage_stats
+from .search import SEARCH_PAGE_SIZE, parse_query, search_images
 
-import requests # Ensure this is imported at the top of the file
 from requests.exceptions import RequestException, Timeout, HTTPError # Add these imports
 
+GALLERY_PAGE_SIZE = 24
+
 def home(request):
     """Homepage with trending posts and interactive features"""
-    # Get recent posts with images
-    posts = GeneratedImage.objects.filter(is_public=True).order_by('-created_at')[:12]
-
-    # Get some stats
-    total_users = CustomUser.objects.count()
-    total_images = GeneratedImage.objects.count()
-    total_posts = GeneratedImage.objects.filter(is_public=True).count()
+    # Recent posts; lazy, so it only runs when the cached fragment has expired
+    posts = GeneratedImage.objects.filter(is_public=True).select_related('user').order_by('-created_at')[:12]
 
-    # Get active style presets for the styles modal
-    style_presets = StylePreset.objects.filter(is_active=True)
+    # Site stats and style presets come from the homepage cache
+    stats = get_homepage_stats()
 
     context = {
         'page_title': 'AI Social Media Platform',
         'posts': posts,
-        'total_users': total_users,
-        'total_images': total_images,
-        'total_posts': total_posts,
-        'style_presets': style_presets,
+        'recent_posts_ttl': get_fragment_ttl(),
+        'total_users': stats['total_users'],
+        'total_images': stats['total_images'],
+        'total_posts': stats['total_posts'],
+        'total_styles': stats['total_styles'],
+        'style_presets': get_active_style_presets(),
     }
     return render(request, 'core/home.html', context)
 
@@ -57,6 +69,7 @@ def home(request):
 def generate_image_view(request):
     """AI image generation page with style preselection and hashtag generation"""
     form = ImageGenerationForm() # Initialize form for GET requests or invalid POST
+    is_ajax = request.headers.get('x-requested-with') == 'XMLHttpRequest'
 
     if request.method == 'POST':
         form = ImageGenerationForm(request.POST)
@@ -69,85 +82,41 @@ def generate_image_view(request):
                 height = int(form.cleaned_data.get('height', 512))
                 seed = form.cleaned_data.get('seed')
                 
-                # Get style suffix
-                style_suffix = ""
-                if style_preset:
-                    style_suffix = style_preset.prompt_suffix
-                
                 print(f"🎯 Form data - Prompt: {prompt}, Style: {style_preset}")
                 
-                # Show loading message
-                messages.info(request, 'Generating your AI image... This may take a few moments.')
+                # Queue the generation; the provider fallback chain runs in a worker
+                job = generation_queue.enqueue(
+                    user=request.user,
+                    prompt=prompt,
+                    style_preset=style_preset,
+                    seed=seed,
+                    width=width,
+                    height=height
+                )
+                print(f"📥 Queued generation job {job.id}")
                 
-                # Clear previous API errors from session
-                request.session.pop('hf_error', None)
-                request.session.pop('pollinations_error', None)
-
-                # Try multiple free services in order and track which one works
-                image_content, source, metadata = generate_image_free_services_with_tracking(request, prompt, style_suffix) # Pass request object
+                status_url = reverse('generation_job_status', kwargs={'job_id': job.id})
+                if is_ajax:
+                    return JsonResponse({
+                        'success': True,
+                        'job_id': str(job.id),
+                        'status': job.status,
+                        'status_url': status_url,
+                        'timeout': settings.GENERATION_JOB_TIMEOUT
+                    }, status=202)
                 
-                if image_content:
-                    # Create GeneratedImage record with source tracking
-                    generated_image = GeneratedImage.objects.create(
-                        user=request.user,
-                        prompt=prompt,
-                        style_preset=style_preset,
-                        seed=seed,
-                        width=width,
-                        height=height,
-                        is_public=True,
-                        generation_source=source,
-                        generation_metadata=metadata
-                    )
-                    
-                    # Save the image file
-                    generated_image.image.save(
-                        f'generated_{generated_image.id}.png',
-                        image_content,
-                        save=True
-                    )
-                    
-                    # Generate hashtags
-                    try:
-                        hashtags = HashtagGenerator.generate_hashtags(
-                            prompt=prompt,
-                            style_preset=style_preset.name if style_preset else None,
-                            max_hashtags=15
-                        )
-                        
-                        # Save hashtags to the model
-                        generated_image.set_hashtags_list(hashtags)
-                        generated_image.save(update_fields=['hashtags'])
-                        
-                        print(f"✅ Generated {len(hashtags)} hashtags for image")
-                    except Exception as hashtag_error:
-                        print(f"⚠️ Hashtag generation failed: {hashtag_error}")
-                        # Continue without hashtags if generation fails
-                        
-                    print(f"💾 Saved image from {source} to database with ID: {generated_image.id}")
-                    service_name = metadata.get('service_name', source)
-                    
-                    # Show different messages based on service used
-                    if source == 'mock':
-                        messages.warning(request, f'Image generated using fallback generator. External AI services may be temporarily unavailable.')
-                        # Add specific API errors if they occurred
-                        if request.session.get('hf_error'):
-                            messages.error(request, f"Hugging Face API failed: {request.session.pop('hf_error')}")
-                        if request.session.get('pollinations_error'):
-                            messages.error(request, f"Pollinations AI failed: {request.session.pop('pollinations_error')}")
-                    else:
-                        messages.success(request, f'Image generated successfully using {service_name}! 🎨')
-                    
-                    return redirect('post_detail', pk=generated_image.id)
-                else:
-                    print("❌ Image generation returned None")
-                    messages.error(request, 'Failed to generate image. Please try again.')
+                messages.info(request, 'Generating your AI image... It will appear in your gallery in a few moments.')
+                return redirect('gallery')
             
             except Exception as e:
                 print(f"💥 Exception in generate_image_view: {e}")
+                if is_ajax:
+                    return JsonResponse({'success': False, 'error': str(e)}, status=500)
                 messages.error(request, f'Error generating image: {str(e)}')
                 # The function will now fall through to render the form again with the error message
         else:
+            if is_ajax:
+                return JsonResponse({'success': False, 'errors': form.errors}, status=400)
             # Form is not valid, messages will be handled by Django's form rendering
             messages.error(request, 'Please correct the errors in the form.')
             # The function will now fall through to render the form again with validation errors
@@ -164,58 +133,198 @@ def generate_image_view(request):
     }
     return render(request, 'core/generate.html', context)
 
-def generate_image_free_services_with_tracking(request, prompt, style_suffix=""):
-    """Try multiple free AI image generation services with source tracking"""
-    full_prompt = f"{prompt}{style_suffix}" if style_suffix else prompt
+@login_required
+def generation_job_status(request, job_id):
+    """Poll endpoint for a queued image generation job"""
+    # After a restart, the first poll starts the sweep that picks up stranded jobs
+    generation_queue.start_sweeper()
+
+    job = get_object_or_404(
+        GenerationJob.objects.select_related('generated_image'),
+        id=job_id,
+        user=request.user
+    )
+
+    data = {
+        'job_id': str(job.id),
+        'status': job.status,
+        'created_at': job.created_at.isoformat(),
+        'started_at': job.started_at.isoformat() if job.started_at else None,
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+    }
 
-    print(f"🎨 Starting free image generation for: {full_prompt}")
+    if job.status == 'succeeded' and job.generated_image:
+        image = job.generated_image
+        source = image.generation_source
+        service_name = image.generation_metadata.get('service_name', source)
+        data.update({
+            'image_id': str(image.id),
+            'source': source,
+            'service_name': service_name,
+            'result_url': reverse('post_detail', kwargs={'pk': image.id}),
+        })
 
-    # PRIORITY 1: Hugging Face Spaces (Free)
-    try:
-        print("🤗 Trying Hugging Face Spaces (Priority 1)...")
-        image_content = generate_with_hf_spaces_improved(full_prompt)
-        if image_content:
-            metadata = {
+        # Queue the flash messages the synchronous flow used to show on the result page
+        if request.GET.get('final') == '1':
+            if source == 'mock':
+                messages.warning(request, 'Image generated using fallback generator. External AI services may be temporarily unavailable.')
+                if job.provider_errors.get('huggingface'):
+                    messages.error(request, f"Hugging Face API failed: {job.provider_errors['huggingface']}")
+                if job.provider_errors.get('pollinations'):
+                    messages.error(request, f"Pollinations AI failed: {job.provider_errors['pollinations']}")
+            else:
+                messages.success(request, f'Image generated successfully using {service_name}! 🎨')
+    elif job.status == 'failed':
+        data['error'] = job.error or 'Failed to generate image. Please try again.'
+
+    return JsonResponse(data)
+
+# Shared by all hedged races in this process (settings.IMAGE_PROVIDER_RACE_WORKERS)
+_provider_race_executor = ThreadPoolExecutor(
+    max_workers=getattr(settings, 'IMAGE_PROVIDER_RACE_WORKERS', 8),
+    thread_name_prefix='image-provider'
+)
+
+def get_image_providers():
+    """External image providers in fallback order (the mock generator is always last)"""
+    return [
+        {
+            'source': 'huggingface',
+            'label': '🤗 Hugging Face Spaces',
+            'generate': generate_with_hf_spaces_improved,
+            'session_key': 'hf_error',
+            'metadata': {
                 "service_name": "Hugging Face Spaces",
                 "service_url": "https://huggingface.co/",
                 "cost": "Free",
                 "model": "runwayml/stable-diffusion-v1-5",
-                "prompt": full_prompt,
-                "timestamp": timezone.now().isoformat(),
                 "reliability": "High",
                 "priority": 1
             }
-            print("✅ Hugging Face image generated successfully!")
-            return image_content, 'huggingface', metadata
-    except Exception as e:
-        error_message = f"Hugging Face failed: {e}"
-        print(f"❌ {error_message}")
-        # Store the specific error for later use in messages
-        request.session['hf_error'] = str(e) # Use request.session to pass error
-
-    # PRIORITY 2: Pollinations AI (Fallback)
-    try:
-        print("🌸 Trying Pollinations AI (Fallback)...")
-        image_content = generate_with_pollinations(full_prompt)
-        if image_content:
-            metadata = {
+        },
+        {
+            'source': 'pollinations',
+            'label': '🌸 Pollinations AI',
+            'generate': generate_with_pollinations,
+            'session_key': 'pollinations_error',
+            'metadata': {
                 "service_name": "Pollinations AI",
                 "service_url": "https://pollinations.ai/",
                 "cost": "Free",
-                "prompt": full_prompt,
-                "timestamp": timezone.now().isoformat(),
                 "reliability": "Medium",
                 "priority": 2
             }
-            print("✅ Pollinations image generated successfully!")
-            return image_content, 'pollinations', metadata
-    except Exception as e:
-        error_message = f"Pollinations failed: {e}"
-        print(f"❌ {error_message}")
-        # Store the specific error for later use in messages
-        request.session['pollinations_error'] = str(e) # Use request.session to pass error
+        },
+    ]
+
+def generate_image_free_services_with_tracking(request, prompt, style_suffix="", style_preset=None,
+                                               width=512, height=512, seed=None, use_cache=True):
+    """Try multiple free AI image generation services with source tracking.
+
+    `request` may be None when called from a generation worker; provider
+    errors are then only reported through the mock metadata.
+
+    Results from deterministic providers (settings.GENERATION_CACHE_PROVIDERS)
+    are served from the generation cache when the same prompt, style, size
+    and seed were generated before. A provider's cache entry is only checked
+    when its turn comes, so a cached fallback never preempts a provider with
+    higher priority. Pass use_cache=False to always call upstream (health checks).
+
+    settings.IMAGE_PROVIDER_STRATEGY picks how the providers are tried:
+    'sequential' waits for each provider to fail before starting the next,
+    'race' starts the next provider after IMAGE_PROVIDER_HEDGE_DELAY seconds
+    (or as soon as one fails) and keeps the first image that comes back.
+    """
+    full_prompt = f"{prompt}{style_suffix}" if style_suffix else prompt
+    provider_errors = {}
+    providers = get_image_providers()
+    strategy = getattr(settings, 'IMAGE_PROVIDER_STRATEGY', 'sequential')
+
+    print(f"🎨 Starting free image generation ({strategy}) for: {full_prompt}")
+
+    cache_params = {'style_preset': style_preset, 'width': width, 'height': height, 'seed': seed}
+    # Metadata of cache hits by source; any lookup without a hit counts one miss
+    cache_hits = {}
+    cache_lookups = []
+
+    def cache_key_for(source):
+        if use_cache and generation_cache.is_cacheable(source):
+            return generation_cache.make_key(full_prompt, source, **cache_params)
+        return None
+
+    def lookup_cache(source, cache_key):
+        cache_lookups.append(source)
+        cached = generation_cache.get(cache_key, count_miss=False)
+        if not cached:
+            return None
+        image_content, metadata = cached
+        metadata.update({"timestamp": timezone.now().isoformat(), "cache_hit": True})
+        cache_hits[source] = metadata
+        return image_content
+
+    def with_cache_lookup(provider, cache_key):
+        generate = provider['generate']
+
+        def generate_or_reuse(full_prompt):
+            # Serve a previous result for this exact request without calling upstream
+            return lookup_cache(provider['source'], cache_key) or generate(full_prompt)
+        return dict(provider, generate=generate_or_reuse)
+
+    def count_cache_miss():
+        if cache_lookups and not cache_hits:
+            generation_cache.count_miss()
+
+    for index, provider in enumerate(providers):
+        cache_key = cache_key_for(provider['source'])
+        if cache_key:
+            providers[index] = with_cache_lookup(provider, cache_key)
+
+    if strategy == 'race':
+        result = race_image_providers(providers, full_prompt, provider_errors)
+    else:
+        result = run_image_providers_in_order(providers, full_prompt, provider_errors)
+
+    # Store the specific errors for later use in messages
+    if request is not None:
+        for provider in providers:
+            if provider['source'] in provider_errors:
+                request.session[provider['session_key']] = provider_errors[provider['source']]
+
+    if result:
+        provider, image_content, launched = result
+        count_cache_miss()
+        if provider['source'] in cache_hits:
+            metadata = cache_hits[provider['source']]
+            if provider_errors:
+                metadata["provider_errors"] = provider_errors
+            return image_content, provider['source'], metadata
+
+        metadata = dict(provider['metadata'])
+        metadata.update({
+            "prompt": full_prompt,
+            "timestamp": timezone.now().isoformat(),
+            "strategy": strategy,
+        })
+        if strategy == 'race':
+            metadata["providers_launched"] = launched
+        if provider_errors:
+            metadata["provider_errors"] = provider_errors
+        cache_key = cache_key_for(provider['source'])
+        if cache_key:
+            generation_cache.put(cache_key, provider['source'], image_content, metadata)
+        return image_content, provider['source'], metadata
 
     # FINAL FALLBACK: Enhanced Mock Generator
+    # The mock is deterministic per prompt, so its renders are cached too
+    mock_cache_key = cache_key_for('mock')
+    if mock_cache_key:
+        image_content = lookup_cache('mock', mock_cache_key)
+        if image_content:
+            metadata = cache_hits['mock']
+            metadata["provider_errors"] = provider_errors
+            return image_content, 'mock', metadata
+    count_cache_miss()
+
     print("🎭 Using enhanced mock generator...")
     image_content = generate_enhanced_mock_image(full_prompt)
     metadata = {
@@ -226,14 +335,99 @@ def generate_image_free_services_with_tracking(request, prompt, style_suffix="")
         "prompt": full_prompt,
         "timestamp": timezone.now().isoformat(),
         "reliability": "Fallback",
-        "priority": 3
+        "priority": len(providers) + 1,
+        "strategy": strategy,
+        "provider_errors": provider_errors
     }
+    if mock_cache_key:
+        generation_cache.put(mock_cache_key, 'mock', image_content, metadata)
     return image_content, 'mock', metadata
 
+def run_image_providers_in_order(providers, full_prompt, provider_errors):
+    """Try each provider in turn; return (provider, image_content, launched) or None"""
+    launched = []
+    for provider in providers:
+        try:
+            print(f"Trying {provider['label']} (Priority {provider['metadata']['priority']})...")
+            launched.append(provider['source'])
+            image_content = provider['generate'](full_prompt)
+            if image_content:
+                print(f"✅ {provider['label']} image generated successfully!")
+                return provider, image_content, launched
+        except Exception as e:
+            print(f"❌ {provider['label']} failed: {e}")
+            provider_errors[provider['source']] = str(e)
+    return None
+
+def _close_losing_result(future):
+    """Done-callback for providers that lost the race: release their downloaded file"""
+    if future.cancelled() or future.exception() is not None:
+        return
+    image_content = future.result()
+    if image_content is not None and hasattr(image_content, 'close'):
+        image_content.close()
+
+def race_image_providers(providers, full_prompt, provider_errors):
+    """Hedged provider race; return (provider, image_content, launched) or None.
+
+    The primary starts immediately, each further provider starts after the
+    hedge delay or as soon as a running provider fails. The first valid image
+    wins; providers that have not started are cancelled, and the results of
+    those still running are closed (deleting their temp files) when they finish.
+    """
+    from concurrent.futures import wait, FIRST_COMPLETED
+
+    hedge_delay = getattr(settings, 'IMAGE_PROVIDER_HEDGE_DELAY', 5.0)
+    pending = {}
+    launched = []
+
+    def launch_next():
+        provider = providers[len(launched)]
+        print(f"🏁 Launching {provider['label']}...")
+        launched.append(provider['source'])
+        pending[_provider_race_executor.submit(provider['generate'], full_prompt)] = provider
+
+    try:
+        launch_next()
+        while hedge_delay <= 0 and len(launched) < len(providers):
+            launch_next()
+
+        while pending:
+            timeout = hedge_delay if len(launched) < len(providers) else None
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+
+            if not done:
+                # Hedge: the running providers are slow, start the next one too
+                launch_next()
+                continue
+
+            for future in done:
+                provider = pending.pop(future)
+                try:
+                    image_content = future.result()
+                    if image_content:
+                        print(f"✅ {provider['label']} won the race!")
+                        return provider, image_content, launched
+                    provider_errors[provider['source']] = "No image content returned"
+                except Exception as e:
+                    print(f"❌ {provider['label']} failed: {e}")
+                    provider_errors[provider['source']] = str(e)
+
+                # Replace the failed provider right away instead of waiting out the hedge delay
+                if len(launched) < len(providers):
+                    launch_next()
+        return None
+    finally:
+        # Losers, including any that finished alongside the winner
+        for future in pending:
+            if not future.cancel():
+                future.add_done_callback(_close_losing_result)
+
+# Two 90 s requests with a 10 s wait between them
+@circuit_breaker('huggingface_spaces', max_call_time=200)
 def generate_with_hf_spaces_improved(prompt):
     """IMPROVED Hugging Face Spaces generation with better error handling"""
     try:
-        from django.core.files.base import ContentFile
         import time
 
         print("🤗 Trying IMPROVED Hugging Face Spaces...")
@@ -261,11 +455,13 @@ def generate_with_hf_spaces_improved(prompt):
             }
         }
 
-        response = requests.post(
+        response = provider_http.post(
             api_url,
+            provider='huggingface',
             headers=headers,
             json=payload,
-            timeout=90
+            timeout=90,
+            stream=True
         )
 
         print(f"📡 HF Response status: {response.status_code}")
@@ -273,7 +469,7 @@ def generate_with_hf_spaces_improved(prompt):
         if response.status_code == 200:
             content_type = response.headers.get('content-type', '')
             if 'image' in content_type:
-                image_content = ContentFile(response.content, name=f'hf_{prompt[:20]}.png')
+                image_content = ingest_response(response, name=f'hf_{prompt[:20]}.png')
                 print("✅ Hugging Face image generated successfully!")
                 return image_content
             else:
@@ -281,12 +477,14 @@ def generate_with_hf_spaces_improved(prompt):
                 raise Exception(f"Hugging Face returned non-image content or empty response: {error_detail}")
 
         elif response.status_code == 503:
+            # Give the huggingface slot back before waiting on the model
+            response.close()
             print("⏳ HF Model loading, waiting 10 seconds...")
             time.sleep(10)
             # Retry once
-            response = requests.post(api_url, headers=headers, json=payload, timeout=90)
+            response = provider_http.post(api_url, provider='huggingface', headers=headers, json=payload, timeout=90, stream=True)
             if response.status_code == 200 and 'image' in response.headers.get('content-type', ''):
-                image_content = ContentFile(response.content, name=f'hf_{prompt[:20]}.png')
+                image_content = ingest_response(response, name=f'hf_{prompt[:20]}.png')
                 print("✅ Hugging Face image generated successfully on retry!")
                 return image_content
             else:
@@ -306,11 +504,10 @@ def generate_with_hf_spaces_improved(prompt):
     except Exception as e:
         raise Exception(f"Hugging Face Spaces failed: {str(e)}")
 
+@circuit_breaker('pollinations')
 def generate_with_pollinations(prompt):
     """Generate image using Pollinations AI (Free)"""
     try:
-        import requests
-        from django.core.files.base import ContentFile
         import urllib.parse
 
         print("🌸 Trying Pollinations AI...")
@@ -321,14 +518,17 @@ def generate_with_pollinations(prompt):
 
         print(f"📡 Calling: {url}")
 
-        response = requests.get(url, timeout=30)
+        response = provider_http.get(url, provider='pollinations', timeout=30, stream=True)
+        if not response.ok:
+            response.close()
         response.raise_for_status() # Raise HTTPError for bad responses (4xx or 5xx)
 
-        if response.content:
-            image_content = ContentFile(response.content, name=f'pollinations_{prompt[:20]}.png')
+        image_content = ingest_response(response, name=f'pollinations_{prompt[:20]}.png')
+        if image_content.size:
             print("✅ Pollinations image generated successfully!")
             return image_content
         else:
+            image_content.close()
             raise Exception("Pollinations API returned no image content.")
 
     except Timeout:
@@ -343,7 +543,7 @@ def generate_with_pollinations(prompt):
 def generate_enhanced_mock_image(prompt):
     """Generate an enhanced mock image with better design"""
     try:
-        from PIL import Image, ImageDraw, ImageFont
+        from PIL import ImageDraw
         from django.core.files.base import ContentFile
         import io
         import random
@@ -355,16 +555,13 @@ def generate_enhanced_mock_image(prompt):
         seed = int(hashlib.md5(prompt.encode()).hexdigest()[:8], 16)
         random.seed(seed)
 
-        # Create image
-        width, height = 512, 512
-        image = Image.new('RGB', (width, height))
-        draw = ImageDraw.Draw(image)
-
         # Generate theme-based colors based on prompt keywords
+        width, height = 512, 512
         colors = get_theme_colors(prompt)
 
-        # Create artistic background
-        create_artistic_background(draw, width, height, colors)
+        # Create image on an artistic background
+        image = create_artistic_background(width, height, colors)
+        draw = ImageDraw.Draw(image)
 
         # Add decorative elements
         add_decorative_elements(draw, width, height, colors, prompt)
@@ -386,7 +583,6 @@ def generate_enhanced_mock_image(prompt):
     except Exception as e:
         print(f"Mock generation error: {e}")
         # Return simple fallback
-        from PIL import Image
         import io
         image = Image.new('RGB', (512, 512), color=(100, 150, 200))
         img_io = io.BytesIO()
@@ -409,21 +605,9 @@ def get_theme_colors(prompt):
     else:
         return [(255, 107, 107), (78, 205, 196), (69, 183, 209)]  # Default
 
-def create_artistic_background(draw, width, height, colors):
-    """Create an artistic gradient background"""
-    for y in range(height):
-        # Create a complex gradient
-        ratio = y / height
-        color_index = int(ratio * (len(colors) - 1))
-        next_index = min(color_index + 1, len(colors) - 1)
-        
-        local_ratio = (ratio * (len(colors) - 1)) - color_index
-        
-        r = int(colors[color_index][0] * (1 - local_ratio) + colors[next_index][0] * local_ratio)
-        g = int(colors[color_index][1] * (1 - local_ratio) + colors[next_index][1] * local_ratio)
-        b = int(colors[color_index][2] * (1 - local_ratio) + colors[next_index][2] * local_ratio)
-        
-        draw.line([(0, y), (width, y)], fill=(r, g, b))
+def create_artistic_background(width, height, colors):
+    """Create an artistic multi-stop gradient background image"""
+    return vertical_gradient_image(width, height, colors)
 
 def add_decorative_elements(draw, width, height, colors, prompt):
     """Add decorative elements based on prompt"""
@@ -543,16 +727,10 @@ def download_image(request, image_id):
         if not content_type:
             content_type = 'image/png'
         
-        # Read the file
-        with open(file_path, 'rb') as f:
-            file_data = f.read()
-        
-        # Create HTTP response with proper headers
-        response = HttpResponse(file_data, content_type=content_type)
-        response['Content-Disposition'] = f'attachment; filename="{file_name}"'
-        response['Content-Length'] = len(file_data)
+        # Streamed (or handed to the front-end server) with 304/Range support
+        response = serve_file(request, file_path, file_name, content_type)
         
-        print(f"📥 User {request.user.username} downloaded image {image.id}")
+        print(f"📥 User {request.user.username} downloaded image {image.id} ({response.status_code})")
         return response
         
     except Exception as e:
@@ -569,16 +747,8 @@ def delete_image(request, image_id):
         if request.method == 'POST':
             prompt = image.prompt[:50]
             
-            # Delete the image file from filesystem
-            if image.image and os.path.exists(image.image.path):
-                try:
-                    os.remove(image.image.path)
-                    print(f"🗑️ Deleted image file: {image.image.path}")
-                except Exception as e:
-                    print(f"⚠️ Could not delete file: {e}")
-            
-            # Delete the database record
-            image.delete()
+            # Delete the record; its files are removed in the background after commit
+            delete_images(GeneratedImage.objects.filter(pk=image.pk))
             
             messages.success(request, f'Image "{prompt}..." has been deleted successfully.')
             print(f"🗑️ User {request.user.username} deleted image {image_id}")
@@ -755,21 +925,12 @@ def bulk_delete_images(request):
             messages.error(request, "No valid images found for deletion.")
             return redirect('gallery')
         
-        deleted_count = 0
-        for image in images:
-            # Delete file from filesystem
-            if image.image and os.path.exists(image.image.path):
-                try:
-                    os.remove(image.image.path)
-                except Exception as e:
-                    print(f"⚠️ Could not delete file: {e}")
-            
-            # Delete database record
-            image.delete()
-            deleted_count += 1
+        # One transaction for all rows; files are removed in the background after commit
+        result = delete_images(images)
+        deleted_count = result['images']
         
         messages.success(request, f'Successfully deleted {deleted_count} image(s).')
-        print(f"🗑️ User {request.user.username} bulk deleted {deleted_count} images")
+        print(f"🗑️ User {request.user.username} bulk deleted {deleted_count} images ({result['files']} files queued for cleanup)")
         
         return redirect('gallery')
         
@@ -839,46 +1000,138 @@ def post_detail(request, pk):
 def gallery(request):
     """User's personal gallery with source information"""
     # Get user's generated images
-    images = GeneratedImage.objects.filter(user=request.user).order_by('-created_at')
-
-    # Calculate stats
-    total_images = images.count()
+    images = (
+        GeneratedImage.objects.filter(user=request.user)
+        .defer('generation_metadata')
+        .order_by('-created_at', '-id')
+    )
+
+    # Total, public and per-service counts in one grouped query
+    stats = GeneratedImage.get_service_stats(images)
     total_views = 0  # We'll implement view tracking later
     total_likes = 0  # We'll implement this when we add the Like system
-    public_posts = images.filter(is_public=True).count()
 
-    # Add service stats
-    service_stats = {}
-    for image in images:
-        source = image.generation_source
-        if source not in service_stats:
-            service_stats[source] = {
-                'count': 0,
-                'display_name': image.get_service_display_name()
-            }
-        service_stats[source]['count'] += 1
+    paginator = Paginator(images, GALLERY_PAGE_SIZE)
+    paginator.count = stats['total']  # already counted above, skip Paginator's COUNT query
+    page_obj = paginator.get_page(request.GET.get('page'))
 
     context = {
-        'images': images,
-        'total_images': total_images,
+        'images': page_obj,
+        'page_obj': page_obj,
+        'total_images': stats['total'],
         'total_views': total_views,
         'total_likes': total_likes,
-        'public_posts': public_posts,
-        'service_stats': service_stats,
+        'public_posts': stats['public'],
+        'service_stats': stats['services'],
         'page_title': 'My Gallery'
     }
     return render(request, 'core/gallery.html', context)
 
 def explore(request):
-    """Explore page"""
-    posts = GeneratedImage.objects.filter(is_public=True).order_by('-created_at')
+    """Explore page (first page of the public feed; later pages come from explore_feed)"""
+    try:
+        posts, next_cursor = get_feed_page(request.GET.get('cursor'))
+    except InvalidCursor:
+        posts, next_cursor = get_feed_page()
 
     context = {
         'page_title': 'Explore',
-        'posts': posts
+        'posts': posts,
+        'next_cursor': next_cursor,
+        'feed_url': reverse('explore_feed'),
+        'popular_tags': get_popular_hashtags(),
+    }
+    return render(request, 'core/explore.html', context)
+
+def feed_page_response(request, queryset=None):
+    """JSON page of a feed queryset for infinite scroll"""
+    try:
+        page_size = int(request.GET.get('page_size', FEED_PAGE_SIZE))
+        posts, next_cursor = get_feed_page(request.GET.get('cursor'), page_size, queryset)
+    except (InvalidCursor, ValueError) as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    items = [{
+        'id': str(post.id),
+        'image_url': post.image.url if post.image else None,
+        'prompt': post.prompt,
+        'username': post.user.username,
+        'style_preset': post.style_preset.name if post.style_preset else None,
+        'generation_source': post.generation_source,
+        'hashtags': post.get_hashtags_list(),
+        'created_at': post.created_at.isoformat(),
+        'url': reverse('post_detail', kwargs={'pk': post.id}),
+    } for post in posts]
+
+    html = ''.join(
+        render_to_string('core/explore_card.html', {'post': post}, request=request)
+        for post in posts
+    )
+
+    return JsonResponse({
+        'items': items,
+        'html': html,
+        'next_cursor': next_cursor,
+        'has_more': next_cursor is not None,
+    })
+
+def explore_feed(request):
+    """JSON page of the public feed for infinite scroll"""
+    return feed_page_response(request)
+
+def get_hashtag_or_404(name):
+    """Look up a tag by any spelling of its name (#AIArt, aiart, ...)"""
+    return get_object_or_404(Hashtag, name=Hashtag.normalize(name))
+
+def tag_browse(request, name):
+    """Public images for one hashtag, read through the hashtag index"""
+    hashtag = get_hashtag_or_404(name)
+    if hashtag.name != name:
+        return redirect('tag_browse', name=hashtag.name)
+
+    queryset = hashtag_feed_queryset(hashtag)
+    try:
+        posts, next_cursor = get_feed_page(request.GET.get('cursor'), queryset=queryset)
+    except InvalidCursor:
+        posts, next_cursor = get_feed_page(queryset=queryset)
+
+    context = {
+        'page_title': f'#{hashtag.name}',
+        'hashtag': hashtag,
+        'posts': posts,
+        'next_cursor': next_cursor,
+        'feed_url': reverse('tag_feed', kwargs={'name': hashtag.name}),
+        'popular_tags': get_popular_hashtags(),
     }
     return render(request, 'core/explore.html', context)
 
+def tag_feed(request, name):
+    """JSON page of a hashtag's images for infinite scroll"""
+    return feed_page_response(request, hashtag_feed_queryset(get_hashtag_or_404(name)))
+
+def search(request):
+    """Ranked prompt search over public images; '#tag' words and ?tag= filter by hashtag"""
+    query = request.GET.get('q', '').strip()
+    tags = request.GET.getlist('tag')
+    try:
+        page = max(1, int(request.GET.get('page', 1)))
+    except ValueError:
+        page = 1
+
+    results, has_next = search_images(query, tags=tags, page=page, page_size=SEARCH_PAGE_SIZE)
+    _, tag_names = parse_query(query, tags)
+
+    context = {
+        'page_title': f'Search: {query}' if query else 'Search',
+        'query': query,
+        'tags': tag_names,
+        'posts': results,
+        'page': page,
+        'has_next': has_next,
+        'has_previous': page > 1,
+    }
+    return render(request, 'core/search.html', context)
+
 def about(request):
     """About page"""
     context = {
@@ -918,18 +1171,24 @@ def feedback(request):
 @require_POST
 def toggle_like(request, post_id):
     """Toggle like on a post"""
-    post = get_object_or_404(Post, id=post_id)
-    like, created = Like.objects.get_or_create(user=request.user, post=post)
+    post = get_object_or_404(Post.objects.only('id'), id=post_id)
 
-    if not created:
-        like.delete()
-        liked = False
-    else:
-        liked = True
+    # The Like row and the likes_count update (signal handlers) commit together
+    with transaction.atomic():
+        deleted, _ = Like.objects.filter(user=request.user, post=post).delete()
+        liked = not deleted
+        if liked:
+            try:
+                with transaction.atomic():
+                    Like.objects.create(user=request.user, post=post)
+            except IntegrityError:
+                pass  # a concurrent request already liked it
+
+    like_count = Post.objects.filter(id=post.id).values_list('likes_count', flat=True).first()
 
     return JsonResponse({
         'liked': liked,
-        'like_count': post.likes.count()
+        'like_count': like_count
     })
 
 def signup(request):
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Query benchmark for the GeneratedImage composite indexes (migration 0009)
+
+Seeds a throwaway SQLite database, migrated to just before the indexes, then
+prints the query plan and timing of each hot query before and after applying
+them. Seeding and queries go through the historical models of that migration
+state, since the current models carry columns added by later migrations.
+
+Run from the project root:
+    python scripts/benchmark_query_indexes.py --rows 1000000
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from datetime import timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ai_social_platform.settings')
+
+BEFORE_MIGRATION = '0008_post_counters'
+AFTER_MIGRATION = '0009_generatedimage_query_indexes'
+SOURCES = ['pollinations', 'huggingface', 'mock', 'replicate', 'deepai', 'unknown']
+
+
+def setup_django(db_path):
+    """Point the default database at the benchmark file before Django connects"""
+    from django.conf import settings
+    settings.DATABASES['default']['NAME'] = db_path
+
+    import django
+    django.setup()
+
+
+def historical_models():
+    """(CustomUser, GeneratedImage) as they were at BEFORE_MIGRATION"""
+    from django.db import connection
+    from django.db.migrations.executor import MigrationExecutor
+
+    apps = MigrationExecutor(connection).loader.project_state(('core', BEFORE_MIGRATION)).apps
+    return apps.get_model('core', 'CustomUser'), apps.get_model('core', 'GeneratedImage')
+
+
+def seed(rows, users):
+    from django.db import transaction
+    from django.utils import timezone
+
+    CustomUser, GeneratedImage = historical_models()
+
+    print(f"🌱 Seeding {users:,} users and {rows:,} images...")
+    started = time.time()
+
+    CustomUser.objects.bulk_create([
+        CustomUser(username=f'bench{i}', email=f'bench{i}@example.com', password='!')
+        for i in range(users)
+    ], batch_size=1000)
+    user_ids = list(CustomUser.objects.values_list('id', flat=True))
+
+    rng = random.Random(42)
+    now = timezone.now()
+    batch_size = 5000
+    for start in range(0, rows, batch_size):
+        with transaction.atomic():
+            GeneratedImage.objects.bulk_create([
+                GeneratedImage(
+                    id=uuid.UUID(int=rng.getrandbits(128)),
+                    user_id=rng.choice(user_ids),
+                    prompt=f'benchmark prompt {n}',
+                    image='generated_images/benchmark.png',
+                    is_public=rng.random() < 0.8,
+                    generation_source=rng.choice(SOURCES),
+                    hashtags='AIArt, Benchmark',
+                )
+                for n in range(start, min(start + batch_size, rows))
+            ], batch_size=batch_size)
+        if (start // batch_size) % 40 == 0:
+            print(f"  {min(start + batch_size, rows):>10,} rows")
+
+    # auto_now_add stamps everything with "now"; spread rows over a year instead
+    from django.db import connection
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "UPDATE core_generatedimage SET created_at = datetime(%s, '-' || (abs(random()) %% 31536000) || ' seconds')",
+            [now.strftime('%Y-%m-%d %H:%M:%S')]
+        )
+
+    print(f"  done in {time.time() - started:.1f}s")
+
+
+def feed_queryset():
+    """public_feed_queryset() on the historical model, minus columns it lacks"""
+    from core.feed import FEED_CARD_FIELDS
+
+    _, GeneratedImage = historical_models()
+    fields = [name for name in FEED_CARD_FIELDS if name != 'thumbnails']
+    return (
+        GeneratedImage.objects
+        .filter(is_public=True)
+        .select_related('user', 'style_preset')
+        .only(*fields)
+        .order_by('-created_at', '-id')
+    )
+
+
+def hot_queries(user_id, feed_cursor):
+    """The queries the views and dashboard run, as (label, callable)"""
+    from django.utils import timezone
+    from core.feed import get_feed_page
+    from core.models import GeneratedImage as CurrentImage
+
+    _, GeneratedImage = historical_models()
+    feed = feed_queryset()
+    user_images = GeneratedImage.objects.filter(user_id=user_id)
+    recent_mock = GeneratedImage.objects.filter(
+        generation_source='mock', created_at__gte=timezone.now() - timedelta(days=1)
+    )
+
+    return [
+        ('explore first page', lambda: get_feed_page(queryset=feed)),
+        ('explore deep keyset page', lambda: get_feed_page(feed_cursor, queryset=feed)),
+        ('gallery page', lambda: list(user_images.order_by('-created_at', '-id')[:24])),
+        ('gallery service stats', lambda: CurrentImage.get_service_stats(user_images)),
+        ('profile / related images', lambda: list(user_images.filter(is_public=True).order_by('-created_at')[:6])),
+        ('dashboard: source in last 24h', lambda: CurrentImage.get_service_stats(recent_mock)),
+    ]
+
+
+def query_plan(sql):
+    from django.db import connection
+    with connection.cursor() as cursor:
+        cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def run_queries(user_id, feed_cursor, repeat):
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    results = {}
+    for label, run in hot_queries(user_id, feed_cursor):
+        # Explain exactly the SQL the code under test ran
+        with CaptureQueriesContext(connection) as captured:
+            run()
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            run()
+            timings.append((time.perf_counter() - started) * 1000)
+        results[label] = {'ms': statistics.median(timings), 'plan': query_plan(captured[-1]['sql'])}
+    return results
+
+
+def report(phase, results):
+    print(f"\n📋 {phase}")
+    print("-" * 70)
+    for label, result in results.items():
+        print(f"{label:<32} {result['ms']:>10.2f} ms")
+        for line in result['plan']:
+            print(f"    {line}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1000000, help='GeneratedImage rows to seed')
+    parser.add_argument('--users', type=int, default=1000, help='Users to spread the rows over')
+    parser.add_argument('--repeat', type=int, default=5, help='Timed runs per query (median is shown)')
+    parser.add_argument('--keep', action='store_true', help='Keep the benchmark database file')
+    args = parser.parse_args()
+
+    db_path = os.path.join(tempfile.mkdtemp(prefix='query-bench-'), 'bench.sqlite3')
+    setup_django(db_path)
+
+    from django.core.management import call_command
+    from django.db import connection
+
+    print("🔍 GENERATEDIMAGE INDEX BENCHMARK")
+    print("=" * 70)
+    print(f"Database: {db_path}")
+
+    call_command('migrate', verbosity=0)
+    call_command('migrate', 'core', BEFORE_MIGRATION, verbosity=0)
+
+    seed(args.rows, args.users)
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+
+    from django.db.models import Count
+    from core.feed import encode_cursor
+
+    _, GeneratedImage = historical_models()
+
+    # The busiest user is the worst case for the gallery/profile queries, and
+    # the deep feed page starts halfway down the public feed
+    user_id = (
+        GeneratedImage.objects.values('user_id').annotate(n=Count('id')).order_by('-n').first()['user_id']
+    )
+    public_total = GeneratedImage.objects.filter(is_public=True).count()
+    feed_cursor = encode_cursor(feed_queryset()[public_total // 2])
+
+    before = run_queries(user_id, feed_cursor, args.repeat)
+    report(f"Before ({BEFORE_MIGRATION})", before)
+
+    started = time.time()
+    call_command('migrate', 'core', AFTER_MIGRATION, verbosity=0)
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+    print(f"\n🏗️ Built indexes in {time.time() - started:.1f}s")
+
+    after = run_queries(user_id, feed_cursor, args.repeat)
+    report(f"After ({AFTER_MIGRATION})", after)
+
+    print("\n⚡ SPEEDUP")
+    print("-" * 70)
+    for label in before:
+        speedup = before[label]['ms'] / after[label]['ms'] if after[label]['ms'] else float('inf')
+        print(f"{label:<32} {before[label]['ms']:>9.2f} -> {after[label]['ms']:>8.2f} ms  {speedup:>7.1f}x")
+
+    if not args.keep:
+        connection.close()
+        os.remove(db_path)
+        os.rmdir(os.path.dirname(db_path))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""
+FFmpeg capability registry.
+
+The ffmpeg binary is probed once per process, on first use: its path, version
+and the video encoders it was built with. The video pipeline uses this to skip
+the per-request `ffmpeg -version` spawn and to pick the best available
+encoder; the service_dashboard command prints it.
+"""
+
+import re
+import shutil
+import subprocess
+import threading
+
+from django.conf import settings
+
+# Encoders the mock video pipeline knows how to drive, best first
+KNOWN_ENCODERS = ['libx264', 'libvpx-vp9', 'libvpx', 'mpeg4', 'gif']
+
+
+class FFmpegCapabilities:
+    """Lazily probed, thread-safe view of what the local ffmpeg can do."""
+
+    def __init__(self):
+        self._probe = None
+        self._lock = threading.Lock()
+
+    def _run(self, path, *args):
+        result = subprocess.run(
+            [path, '-hide_banner', *args], capture_output=True, text=True, timeout=10
+        )
+        return result.stdout
+
+    def _detect(self):
+        probe = {'available': False, 'path': None, 'version': None, 'encoders': [], 'error': None}
+
+        path = shutil.which(getattr(settings, 'FFMPEG_BINARY', 'ffmpeg'))
+        if not path:
+            probe['error'] = 'ffmpeg not found'
+            return probe
+
+        try:
+            version_output = self._run(path, '-version')
+            match = re.match(r'ffmpeg version (\S+)', version_output)
+
+            # Encoder lines look like " V....D libx264   libx264 H.264 / AVC ..."
+            encoders = set()
+            for line in self._run(path, '-encoders').splitlines():
+                parts = line.split()
+                if len(parts) >= 2 and parts[0].startswith('V'):
+                    encoders.add(parts[1])
+        except (OSError, subprocess.SubprocessError) as e:
+            probe['error'] = str(e)
+            return probe
+
+        probe.update({
+            'available': True,
+            'path': path,
+            'version': match.group(1) if match else 'unknown',
+            'encoders': [name for name in KNOWN_ENCODERS if name in encoders],
+        })
+        return probe
+
+    def probe(self):
+        """Return the probe result, running ffmpeg only the first time."""
+        if self._probe is None:
+            with self._lock:
+                if self._probe is None:
+                    self._probe = self._detect()
+                    if self._probe['available']:
+                        print(f"🎞️ ffmpeg {self._probe['version']} at {self._probe['path']} "
+                              f"(encoders: {', '.join(self._probe['encoders']) or 'none'})")
+                    else:
+                        print(f"⚠️ ffmpeg unavailable: {self._probe['error']}")
+        return self._probe
+
+    def refresh(self):
+        """Forget the cached probe, e.g. after installing ffmpeg."""
+        with self._lock:
+            self._probe = None
+        return self.probe()
+
+    @property
+    def available(self):
+        return self.probe()['available']
+
+    @property
+    def path(self):
+        return self.probe()['path']
+
+    def has_encoder(self, name):
+        return name in self.probe()['encoders']
+
+
+# Global instance
+ffmpeg_capabilities = FFmpegCapabilities()
@@ -0,0 +1,474 @@
+"""
+Frame rendering engine for the animated mock videos.
+
+Everything that is the same for every frame of a video (theme colours,
+wrapped prompt lines, font metrics, the pre-rendered text blocks, the wave dot
+stamp) is computed once in build_frame_plan(). Frames are then rendered in batches: the moving gradient
+background, plus the ocean wave dots, is computed for a whole batch as one
+(frames, H, W, 3) NumPy array, and only the few shapes and text overlays are
+drawn with PIL. Batches run in a process pool, so a longer video costs more
+CPU but not proportionally more wall time.
+
+This module does not import Django, so spawned pool workers only pay for
+NumPy and PIL.
+"""
+
+import math
+import multiprocessing
+import os
+import random
+import threading
+from collections import deque
+from concurrent.futures import CancelledError, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+WAVE_ROWS = 5
+WAVE_STEP = 10
+WAVE_DOT_SIZE = 8
+
+
+def get_enhanced_theme_colors(prompt, seed):
+    """
+    Get enhanced theme colors based on prompt analysis
+    """
+    random.seed(seed)
+    prompt_lower = prompt.lower()
+
+    # Analyze prompt for color themes
+    if any(word in prompt_lower for word in ['cat', 'orange', 'warm']):
+        return [(255, 140, 0), (255, 165, 0), (255, 69, 0)]  # Orange theme
+    elif any(word in prompt_lower for word in ['ocean', 'blue', 'water', 'sky']):
+        return [(30, 144, 255), (0, 191, 255), (135, 206, 235)]  # Blue theme
+    elif any(word in prompt_lower for word in ['forest', 'green', 'nature', 'tree']):
+        return [(34, 139, 34), (0, 128, 0), (50, 205, 50)]  # Green theme
+    elif any(word in prompt_lower for word in ['fire', 'red', 'hot']):
+        return [(255, 69, 0), (255, 0, 0), (220, 20, 60)]  # Red theme
+    elif any(word in prompt_lower for word in ['space', 'galaxy', 'stars', 'night']):
+        return [(25, 25, 112), (72, 61, 139), (123, 104, 238)]  # Purple theme
+    else:
+        # Dynamic colors based on prompt hash
+        prompt_hash = hash(prompt) % 1000
+        random.seed(prompt_hash)
+        return [
+            (random.randint(100, 255), random.randint(100, 255), random.randint(100, 255))
+            for _ in range(3)
+        ]
+
+
+def get_prompt_element(prompt):
+    """Pick the animated element set for a prompt"""
+    prompt_lower = prompt.lower()
+
+    if 'cat' in prompt_lower:
+        return 'cat'
+    elif any(word in prompt_lower for word in ['bird', 'fly']):
+        return 'flying'
+    elif any(word in prompt_lower for word in ['ocean', 'wave']):
+        return 'wave'
+    elif 'fire' in prompt_lower:
+        return 'fire'
+    return 'generic'
+
+
+@lru_cache(maxsize=1)
+def get_overlay_font():
+    """The overlay font, loaded once per process"""
+    return ImageFont.load_default()
+
+
+@lru_cache(maxsize=1)
+def get_wave_dot_offsets():
+    """(dy, dx) offsets of the pixels PIL fills for one wave dot ellipse"""
+    stamp = Image.new('1', (WAVE_DOT_SIZE + 1, WAVE_DOT_SIZE + 1))
+    ImageDraw.Draw(stamp).ellipse([0, 0, WAVE_DOT_SIZE, WAVE_DOT_SIZE], fill=1)
+    dy, dx = np.nonzero(np.asarray(stamp))
+    return dy, dx
+
+
+GLOW_OFFSETS = [(-1, -1), (-1, 1), (1, -1), (1, 1)]
+
+
+def render_text_block(box, text, strokes):
+    """
+    Pre-render text on the black box it always sits on.
+
+    `strokes` is a list of ((x, y), fill) text draws in frame coordinates.
+    Returns the block as an (h, w, 3) array, or None if any glyph would
+    spill outside the box (then the text is drawn per frame instead).
+    """
+    font = get_overlay_font()
+    x0, y0, x1, y1 = box
+    block = Image.new('RGB', (x1 - x0, y1 - y0))
+    draw = ImageDraw.Draw(block)
+
+    for (x, y), fill in strokes:
+        left, top, right, bottom = draw.textbbox((x - x0, y - y0), text, font=font)
+        if left < 0 or top < 0 or right > x1 - x0 or bottom > y1 - y0:
+            return None
+        draw.text((x - x0, y - y0), text, fill=fill, font=font)
+
+    return np.asarray(block)
+
+
+def build_frame_plan(prompt, width, height, total_frames, seed):
+    """Precompute everything that does not change between frames of one video"""
+    # Colours are picked in the calling process: the fallback theme uses
+    # hash(prompt), which differs between interpreter processes
+    colors = get_enhanced_theme_colors(prompt, seed)
+
+    words = prompt.split()
+    if len(words) > 8:
+        text_lines = [' '.join(words[:8]), ' '.join(words[8:])]
+    else:
+        text_lines = [prompt]
+
+    font = get_overlay_font()
+    measure = ImageDraw.Draw(Image.new('RGB', (1, 1)))
+
+    def text_width(text):
+        bbox = measure.textbbox((0, 0), text, font=font)
+        return bbox[2] - bbox[0]
+
+    # The prompt lines sit on a black box whose width pulses by up to 10px
+    # each side; the part it always covers, text included, is identical in
+    # every frame, so it is rendered once here
+    lines = []
+    y_offset = height // 2 - len(text_lines) * 25
+    for line in text_lines:
+        line_width = text_width(line)
+        x = (width - line_width) // 2
+        box = (x - 15, y_offset - 15, x + line_width + 16, y_offset + 36)
+        strokes = [((x + dx, y_offset + dy), (100, 100, 100)) for dx, dy in GLOW_OFFSETS]
+        strokes.append(((x, y_offset), (255, 255, 255)))
+        lines.append({
+            'text': line,
+            'x': x,
+            'y': y_offset,
+            'width': line_width,
+            'block': render_text_block(box, line, strokes),
+        })
+        y_offset += 50
+
+    watermark = "ENHANCED AI MOCK VIDEO"
+    watermark_width = text_width(watermark)
+    watermark_box = (width - watermark_width - 30, 10, width - 9, 36)
+    watermark_pos = (width - watermark_width - 20, 15)
+
+    return {
+        'width': width,
+        'height': height,
+        'total_frames': total_frames,
+        'colors': [tuple(color) for color in colors],
+        'element': get_prompt_element(prompt),
+        'text_lines': lines,
+        'watermark': {
+            'text': watermark,
+            'box': watermark_box,
+            'pos': watermark_pos,
+            'block': render_text_block(watermark_box, watermark, [(watermark_pos, (255, 255, 255))]),
+        },
+    }
+
+
+def frame_progress(plan, frame_nums):
+    """Animation progress (0..1) for each frame number"""
+    return np.asarray(frame_nums, dtype=np.float64) / max(plan['total_frames'] - 1, 1)
+
+
+def animated_gradient_rows(colors, height, progress):
+    """Row colours of the moving gradient for a batch of frames: (frames, H, 3) uint8"""
+    stops = np.asarray(colors, dtype=np.float64)
+    segments = len(colors) - 1
+
+    y_ratio = (np.arange(height, dtype=np.float64) / height)[None, :]
+    progress = np.asarray(progress, dtype=np.float64)[:, None]
+
+    # Add wave motion to the gradient
+    wave_offset = np.sin((y_ratio * 4 + progress * 2) * math.pi) * 0.2
+    ratio = np.mod(y_ratio + wave_offset + progress * 0.3, 1.0)
+
+    position = ratio * segments
+    color_index = position.astype(np.intp)
+    next_index = (color_index + 1) % len(colors)
+    local_ratio = (position - color_index)[..., None]
+
+    rows = stops[color_index] * (1 - local_ratio) + stops[next_index] * local_ratio
+    return rows.astype(np.uint8)
+
+
+def add_wave_dots(frames, colors, progress):
+    """Stamp the ocean wave dots onto a (frames, H, W, 3) batch in place"""
+    count, height, width, _ = frames.shape
+    dy, dx = get_wave_dot_offsets()
+
+    xs = np.arange(0, width, WAVE_STEP)
+    frame_index = np.arange(count)[:, None, None]
+    progress = np.asarray(progress, dtype=np.float64)[:, None]
+
+    # Rows are stamped in order because neighbouring rows can overlap
+    for i in range(WAVE_ROWS):
+        wave_y = height * 0.6 + i * 20
+        wave_height = 10 * np.sin((xs[None, :] / 50 + progress * 2 + i) * math.pi)
+        ys = (wave_y + wave_height).astype(np.intp)
+
+        rows = ys[:, :, None] + dy
+        cols = np.broadcast_to(xs[None, :, None] + dx, rows.shape)
+        inside = (rows >= 0) & (rows < height) & (cols < width)
+
+        frames_at = np.broadcast_to(frame_index, rows.shape)
+        frames[frames_at[inside], rows[inside], cols[inside]] = colors[i % len(colors)]
+
+
+def render_backgrounds(plan, frame_nums):
+    """Gradient (and wave) backgrounds for a batch of frames: (frames, H, W, 3) uint8"""
+    width, height = plan['width'], plan['height']
+    progress = frame_progress(plan, frame_nums)
+
+    rows = animated_gradient_rows(plan['colors'], height, progress)
+    frames = np.repeat(rows[:, :, None, :], width, axis=2)
+
+    if plan['element'] == 'wave':
+        add_wave_dots(frames, plan['colors'], progress)
+    return frames
+
+
+def add_cat_elements(draw, width, height, colors, progress):
+    """Add cat-themed animated elements"""
+    # Animated cat silhouette
+    cat_x = int(width * 0.2 + (width * 0.6) * progress)
+    cat_y = int(height * 0.7)
+
+    # Simple cat shape
+    # Body
+    draw.ellipse([cat_x, cat_y, cat_x + 60, cat_y + 30], fill=colors[0])
+    # Head
+    draw.ellipse([cat_x + 45, cat_y - 20, cat_x + 75, cat_y + 10], fill=colors[0])
+    # Ears
+    draw.polygon([(cat_x + 50, cat_y - 15), (cat_x + 55, cat_y - 25), (cat_x + 60, cat_y - 15)], fill=colors[0])
+    draw.polygon([(cat_x + 65, cat_y - 15), (cat_x + 70, cat_y - 25), (cat_x + 75, cat_y - 15)], fill=colors[0])
+    # Tail
+    tail_curve = int(10 * math.sin(progress * 4 * math.pi))
+    draw.ellipse([cat_x - 15, cat_y + 10 + tail_curve, cat_x + 5, cat_y + 20 + tail_curve], fill=colors[0])
+
+
+def add_flying_elements(draw, width, height, colors, progress):
+    """Add flying bird elements"""
+    # Multiple birds flying
+    for i in range(3):
+        bird_x = int((width * 0.1 + i * width * 0.3) + (width * 0.4) * progress)
+        bird_y = int(height * 0.3 + i * 50 + 20 * math.sin(progress * 3 * math.pi + i))
+
+        # Simple bird shape (V)
+        wing_span = 15 + int(5 * math.sin(progress * 8 * math.pi + i))
+        draw.line([(bird_x - wing_span, bird_y), (bird_x, bird_y - 10), (bird_x + wing_span, bird_y)],
+                 fill=colors[i % len(colors)], width=3)
+
+
+def add_fire_elements(draw, width, height, colors, progress):
+    """Add fire flame elements"""
+    # Animated flames
+    flame_base_y = int(height * 0.8)
+    for i in range(7):
+        flame_x = width * 0.3 + i * 20
+        flame_height = 40 + 20 * math.sin(progress * 6 * math.pi + i)
+        flame_y = flame_base_y - flame_height
+
+        # Flame shape
+        points = [
+            (flame_x, flame_base_y),
+            (flame_x - 8, flame_y + 20),
+            (flame_x, flame_y),
+            (flame_x + 8, flame_y + 20)
+        ]
+        draw.polygon(points, fill=colors[i % len(colors)])
+
+
+def add_generic_elements(draw, width, height, colors, progress):
+    """Add generic animated elements"""
+    # Floating particles
+    num_particles = 12
+    for i in range(num_particles):
+        angle = (i / num_particles) * 2 * math.pi + progress * 2 * math.pi
+        radius = 100 + 50 * math.sin(progress * 3 * math.pi + i)
+
+        x = int(width / 2 + radius * math.cos(angle))
+        y = int(height / 2 + radius * math.sin(angle))
+
+        size = 8 + int(4 * math.sin(progress * 4 * math.pi + i))
+        draw.ellipse([x - size, y - size, x + size, y + size], fill=colors[i % len(colors)])
+
+
+# The wave element is part of render_backgrounds()
+ELEMENT_DRAWERS = {
+    'cat': add_cat_elements,
+    'flying': add_flying_elements,
+    'fire': add_fire_elements,
+    'generic': add_generic_elements,
+}
+
+
+def add_text_overlay(image, draw, plan, frame_num, blocks):
+    """Prompt text, frame counter and watermark, pasting the pre-rendered text blocks"""
+    width, height = plan['width'], plan['height']
+    total_frames = plan['total_frames']
+    font = get_overlay_font()
+
+    for line, block in zip(plan['text_lines'], blocks['text_lines']):
+        x, y_offset, text_width = line['x'], line['y'], line['width']
+
+        # Animated background
+        bg_expand = int(10 * math.sin(frame_num / total_frames * 4 * math.pi))
+        draw.rectangle([x - 25 - bg_expand, y_offset - 15,
+                      x + text_width + 25 + bg_expand, y_offset + 35],
+                     fill=(0, 0, 0, 180))
+
+        # Text with glow effect
+        if block:
+            image.paste(block, (x - 15, y_offset - 15))
+        else:
+            for offset in GLOW_OFFSETS:
+                draw.text((x + offset[0], y_offset + offset[1]), line['text'], fill=(100, 100, 100), font=font)
+            draw.text((x, y_offset), line['text'], fill='white', font=font)
+
+    # Frame counter
+    frame_text = f"Frame {frame_num + 1}/{total_frames}"
+    draw.text((20, height - 40), frame_text, fill='white', font=font)
+
+    # Enhanced watermark
+    watermark = plan['watermark']
+    if blocks['watermark']:
+        image.paste(blocks['watermark'], watermark['box'][:2])
+    else:
+        draw.rectangle([watermark['box'][0], 10, width - 10, 35], fill=(0, 0, 0, 150))
+        draw.text(watermark['pos'], watermark['text'], fill='white', font=font)
+
+
+def render_frame_batch(plan, start, stop):
+    """Render frames [start, stop) of a video: (frames, H, W, 3) uint8"""
+    frame_nums = range(start, stop)
+    frames = render_backgrounds(plan, frame_nums)
+    progress = frame_progress(plan, frame_nums)
+    draw_elements = ELEMENT_DRAWERS.get(plan['element'])
+
+    def as_image(block):
+        return Image.fromarray(block, 'RGB') if block is not None else None
+
+    blocks = {
+        'text_lines': [as_image(line['block']) for line in plan['text_lines']],
+        'watermark': as_image(plan['watermark']['block']),
+    }
+
+    for k, frame_num in enumerate(frame_nums):
+        image = Image.fromarray(frames[k], 'RGB')
+        draw = ImageDraw.Draw(image)
+        if draw_elements:
+            draw_elements(draw, plan['width'], plan['height'], plan['colors'], float(progress[k]))
+        add_text_overlay(image, draw, plan, frame_num, blocks)
+        frames[k] = np.asarray(image)
+
+    return frames
+
+
+def render_gif_frame_batch(plan, start, stop):
+    """Render frames [start, stop) as palette images ready for the GIF encoder"""
+    # Quantizing is most of the cost of writing a GIF, so it runs in the workers too
+    return [
+        Image.fromarray(frame, 'RGB').convert('P', palette=Image.ADAPTIVE)
+        for frame in render_frame_batch(plan, start, stop)
+    ]
+
+
+class FrameRenderPool:
+    """
+    Lazily started process pool shared by all mock video renders in a process.
+
+    The pool is sized once, by the first render, and is only replaced when it
+    breaks: concurrent renders share it, so shutting it down for one render
+    would cancel the others' batches.
+    """
+
+    def __init__(self):
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def get_executor(self, workers):
+        with self._lock:
+            if self._executor is None:
+                # spawn, not fork: the callers run inside threaded web and job workers
+                context = multiprocessing.get_context('spawn')
+                self._executor = ProcessPoolExecutor(max_workers=workers, mp_context=context)
+            return self._executor
+
+    def reset(self, executor=None):
+        """Drop the pool (only if it is still `executor`, when given) so the next render starts a new one."""
+        with self._lock:
+            if self._executor is None or (executor is not None and self._executor is not executor):
+                return
+            # A broken pool has already failed its futures; nothing is cancelled here
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def iter_frames(self, plan, workers=None, batch_size=8, render=render_frame_batch):
+        """
+        Yield frames in order: (H, W, 3) uint8 arrays from render_frame_batch,
+        or whatever the given batch `render` function returns per frame.
+
+        Batches are rendered in the pool with at most two batches per worker in
+        flight, so memory stays bounded however long the video is. Short videos
+        and workers <= 1 render inline, and so does the rest of a video whose
+        pool breaks or is shut down underneath it.
+        """
+        total_frames = plan['total_frames']
+        workers = workers or os.cpu_count() or 1
+        batch_size = max(1, batch_size)
+        batches = [(start, min(start + batch_size, total_frames))
+                   for start in range(0, total_frames, batch_size)]
+
+        if workers <= 1 or len(batches) <= 1:
+            for start, stop in batches:
+                yield from render(plan, start, stop)
+            return
+
+        rendered = 0
+        executor = None
+        pending = deque()
+        try:
+            executor = self.get_executor(workers)
+            # A short video only keeps as many batches in flight as it has
+            max_pending = 2 * min(workers, len(batches))
+            queued = iter(batches)
+            for start, stop in (next(queued) for _ in range(min(max_pending, len(batches)))):
+                pending.append(executor.submit(render, plan, start, stop))
+
+            while pending:
+                frames = pending.popleft().result()
+                next_batch = next(queued, None)
+                if next_batch:
+                    pending.append(executor.submit(render, plan, *next_batch))
+                for frame in frames:
+                    yield frame
+                    rendered += 1
+        except (BrokenProcessPool, CancelledError, RuntimeError, OSError) as e:
+            # BrokenProcessPool is a RuntimeError; the plain one comes from submitting
+            # to a pool that was shut down, CancelledError from its cancelled batches.
+            # Finish inline from the first frame that was not yielded
+            print(f"⚠️ Frame render pool failed, rendering inline: {e}")
+            if isinstance(e, (BrokenProcessPool, OSError)):
+                self.reset(executor)
+            for future in pending:
+                future.cancel()
+            pending.clear()
+            for start in range(rendered, total_frames, batch_size):
+                yield from render(plan, start, min(start + batch_size, total_frames))
+        finally:
+            # A consumer that stops early leaves nothing queued in the shared pool
+            for future in pending:
+                future.cancel()
+
+
+# Global instance
+frame_render_pool = FrameRenderPool()
@@ -13,6 +13,10 @@ from django.utils import timezone
 from io import BytesIO
 import json
 
+from core.circuit_breaker import circuit_breaker
+from core.http_client import provider_http
+from core.media_ingest import ingest_response
+
 def generate_real_ai_video(prompt, duration=5, quality='standard', fps=24, seed=None):
     """
     Generate REAL AI video using working free services
@@ -40,8 +44,7 @@ def generate_real_ai_video(prompt, duration=5, quality='standard', fps=24, seed=
             if result and result[0]:  # If video was generated
                 video_file, thumbnail_file, metadata = result
                 print(f"✅ SUCCESS! Real video generated with {service_name}")
-                print(f"📁 Video size: {len(video_file.read())} bytes")
-                video_file.seek(0)  # Reset file pointer
+                print(f"📁 Video size: {video_file.size} bytes")
                 return video_file, thumbnail_file, service_name, metadata
             
         except Exception as e:
@@ -51,6 +54,8 @@ def generate_real_ai_video(prompt, duration=5, quality='standard', fps=24, seed=
     print("\n❌ All real AI services failed - this shouldn't happen!")
     return None, None, 'failed', {'error': 'All real services failed'}
 
+# Up to four models, each two 300 s requests with a wait between them
+@circuit_breaker('huggingface_video', max_call_time=2700)
 def try_huggingface_video_real(prompt, duration, quality, fps, seed):
     """
     Try Hugging Face with WORKING video models
@@ -114,8 +119,9 @@ def try_huggingface_video_real(prompt, duration, quality, fps, seed):
             print(f"  🔗 URL: {model['url']}")
             
             # Make request with longer timeout
-            response = requests.post(
+            response = provider_http.post(
                 model['url'],
+                provider='huggingface',
                 headers=headers,
                 json=payload,
                 timeout=300  # 5 minutes
@@ -175,7 +181,7 @@ def try_huggingface_video_real(prompt, duration, quality, fps, seed):
                 print(f"  ⏳ Model loading, waiting 20 seconds...")
                 time.sleep(20)
                 # Retry once
-                response = requests.post(model['url'], headers=headers, json=payload, timeout=300)
+                response = provider_http.post(model['url'], provider='huggingface', headers=headers, json=payload, timeout=300)
                 if response.status_code == 200 and len(response.content) > 50000:
                     video_file = ContentFile(response.content, name=f'hf_retry_{int(time.time())}.mp4')
                     thumbnail_file = create_simple_thumbnail(prompt)
@@ -200,6 +206,8 @@ def try_huggingface_video_real(prompt, duration, quality, fps, seed):
     
     raise Exception("All Hugging Face models failed")
 
+# Submit, poll for up to 300 s, then download
+@circuit_breaker('replicate_video', max_call_time=480)
 def try_replicate_video_real(prompt, duration, quality, fps, seed):
     """
     Try Replicate with working free models
@@ -245,7 +253,7 @@ def try_replicate_video_real(prompt, duration, quality, fps, seed):
             }
             
             print(f"  📡 Making prediction request...")
-            response = requests.post(url, headers=headers, json=payload, timeout=30)
+            response = provider_http.post(url, provider='replicate', headers=headers, json=payload, timeout=30)
             
             print(f"  📊 Response: {response.status_code}")
             
@@ -262,24 +270,27 @@ def try_replicate_video_real(prompt, duration, quality, fps, seed):
                     if video_url:
                         print(f"  📥 Downloading from: {video_url}")
                         
-                        # Download the video
-                        video_response = requests.get(video_url, timeout=120)
+                        # Stream the video to disk instead of buffering it
+                        video_response = provider_http.get(video_url, provider='replicate', timeout=120, stream=True)
+                        if not video_response.ok:
+                            video_response.close()
                         video_response.raise_for_status()
                         
-                        print(f"  ✅ Downloaded! Size: {len(video_response.content)} bytes")
-                        
-                        video_file = ContentFile(
-                            video_response.content,
+                        video_file = ingest_response(
+                            video_response,
                             name=f'replicate_real_{int(time.time())}.mp4'
                         )
                         
+                        print(f"  ✅ Downloaded! Size: {video_file.size} bytes")
+                        
                         thumbnail_file = create_simple_thumbnail(prompt)
                         
                         metadata = {
                             'service': 'Replicate (REAL)',
                             'model': model['name'],
                             'prediction_id': prediction_id,
-                            'file_size': len(video_response.content),
+                            'file_size': video_file.size,
+                            'sha256': video_file.sha256,
                             'timestamp': timezone.now().isoformat()
                         }
                         
@@ -301,6 +312,7 @@ def try_replicate_video_real(prompt, duration, quality, fps, seed):
     
     raise Exception("All Replicate models failed")
 
+@circuit_breaker('fal_ai_video')
 def try_fal_ai_video(prompt, duration, quality, fps, seed):
     """
     Try Fal.ai - another free AI service
@@ -324,7 +336,7 @@ def try_fal_ai_video(prompt, duration, quality, fps, seed):
         }
         
         print(f"  📡 Requesting video from Fal.ai...")
-        response = requests.post(url, headers=headers, json=payload, timeout=180)
+        response = provider_http.post(url, provider='fal_ai', headers=headers, json=payload, timeout=180)
         
         print(f"  📊 Response: {response.status_code}")
         
@@ -334,10 +346,13 @@ def try_fal_ai_video(prompt, duration, quality, fps, seed):
             
             if video_url:
                 print(f"  📥 Downloading from Fal.ai...")
-                video_response = requests.get(video_url, timeout=120)
+                video_response = provider_http.get(video_url, provider='fal_ai', timeout=120, stream=True)
+                if not video_response.ok:
+                    video_response.close()
+                video_response.raise_for_status()
                 
-                video_file = ContentFile(
-                    video_response.content,
+                video_file = ingest_response(
+                    video_response,
                     name=f'fal_ai_video_{int(time.time())}.mp4'
                 )
                 
@@ -345,7 +360,8 @@ def try_fal_ai_video(prompt, duration, quality, fps, seed):
                 
                 metadata = {
                     'service': 'Fal.ai (REAL)',
-                    'file_size': len(video_response.content),
+                    'file_size': video_file.size,
+                    'sha256': video_file.sha256,
                     'timestamp': timezone.now().isoformat()
                 }
                 
@@ -356,6 +372,7 @@ def try_fal_ai_video(prompt, duration, quality, fps, seed):
     
     raise Exception("Fal.ai not available")
 
+@circuit_breaker('pollinations_video')
 def try_pollinations_real(prompt, duration, quality, fps, seed):
     """
     Try Pollinations with real video endpoints
@@ -378,7 +395,7 @@ def try_pollinations_real(prompt, duration, quality, fps, seed):
             try:
                 print(f"  📡 Trying: {endpoint}")
                 
-                response = requests.get(endpoint, timeout=120)
+                response = provider_http.get(endpoint, provider='pollinations', timeout=120)
                 
                 print(f"  📊 Response: {response.status_code}")
                 print(f"  📦 Content-Type: {response.headers.get('content-type', 'unknown')}")
@@ -444,7 +461,7 @@ def poll_replicate_real(prediction_id, api_key, max_wait=300):
     start_time = time.time()
     while time.time() - start_time < max_wait:
         try:
-            response = requests.get(url, headers=headers, timeout=30)
+            response = provider_http.get(url, provider='replicate', headers=headers, timeout=30)
             
             if response.status_code == 200:
                 data = response.json()
@@ -14,12 +14,15 @@ import json
 import time
 import random
 from io import BytesIO
-from PIL import Image, ImageDraw, ImageFont
+from PIL import Image
 import hashlib
-import math
 
 # Import the working video generator
 from .working_video_generator import generate_working_ai_video
+from .ffmpeg_capabilities import ffmpeg_capabilities
+from .frame_renderer import (
+    build_frame_plan, frame_render_pool, render_frame_batch, render_gif_frame_batch
+)
 
 class VideoHashtagGenerator:
     """Generate hashtags for videos"""
@@ -161,6 +164,148 @@ def generate_enhanced_mock_video(prompt, duration, quality, fps, seed):
         print(f"❌ Enhanced mock generation failed: {e}")
         return generate_simple_mock_video(prompt, duration, quality, fps, seed)
 
+# ffmpeg encoders for mock videos, fastest first within each container
+FFMPEG_ENCODERS = [
+    {
+        'format': 'mp4',
+        'encoder': 'libx264',
+        'args': ['-c:v', 'libx264', '-preset', 'veryfast', '-crf', '23',
+                 '-pix_fmt', 'yuv420p', '-movflags', '+faststart'],
+    },
+    {
+        'format': 'webm',
+        'encoder': 'libvpx-vp9',
+        'args': ['-c:v', 'libvpx-vp9', '-b:v', '0', '-crf', '33',
+                 '-deadline', 'realtime', '-cpu-used', '8', '-pix_fmt', 'yuv420p'],
+    },
+    {
+        'format': 'webm',
+        'encoder': 'libvpx',
+        'args': ['-c:v', 'libvpx', '-b:v', '1M', '-crf', '10',
+                 '-deadline', 'realtime', '-cpu-used', '8', '-pix_fmt', 'yuv420p'],
+    },
+    {
+        'format': 'mp4',
+        'encoder': 'mpeg4',
+        'args': ['-c:v', 'mpeg4', '-q:v', '5', '-pix_fmt', 'yuv420p', '-movflags', '+faststart'],
+    },
+]
+
+def select_ffmpeg_encoder():
+    """Pick an encoder for VIDEO_MOCK_FORMAT, else any usable one, else None"""
+    usable = [entry for entry in FFMPEG_ENCODERS if ffmpeg_capabilities.has_encoder(entry['encoder'])]
+    preferred = getattr(settings, 'VIDEO_MOCK_FORMAT', 'mp4')
+    for entry in usable:
+        if entry['format'] == preferred:
+            return entry
+    return usable[0] if usable else None
+
+def generate_ffmpeg_enhanced_mock(prompt, duration, quality, fps, seed):
+    """
+    Generate an animated mock video encoded by FFmpeg (MP4 or WebM)
+
+    Frames are piped to ffmpeg as raw RGB as soon as they are rendered, so
+    only the batches in flight are ever held in memory.
+    """
+    print("🎬 Creating FFmpeg mock video...")
+
+    from core.media_ingest import IngestedFile
+
+    encoder = select_ffmpeg_encoder()
+    video_file = None
+
+    try:
+        if not encoder:
+            raise RuntimeError("ffmpeg has none of the supported video encoders")
+        output_format = encoder['format']
+
+        if not seed:
+            seed = random.randint(1, 1000000)
+
+        size_map = {
+            'draft': (480, 360),
+            'standard': (640, 480),
+            'high': (1280, 720)
+        }
+        width, height = size_map.get(quality, (640, 480))
+
+        max_frames = getattr(settings, 'VIDEO_MOCK_MAX_FRAMES', 240)
+        frame_count = max(1, min(int(duration * fps), max_frames))
+
+        print(f"  🎞️ Encoding {frame_count} frames at {width}x{height} ({output_format}, {encoder['encoder']})")
+
+        # ffmpeg writes straight into the spooled temp file, which storage then moves into place
+        video_file = IngestedFile(f"enhanced_mock_{prompt[:20]}.{output_format}")
+        command = [
+            ffmpeg_capabilities.path, '-hide_banner', '-loglevel', 'error', '-y',
+            '-f', 'rawvideo', '-pix_fmt', 'rgb24', '-s', f'{width}x{height}', '-r', str(fps),
+            '-i', '-',
+            *encoder['args'],
+            '-f', output_format,
+            video_file.temporary_file_path()
+        ]
+
+        started = time.time()
+        plan = build_frame_plan(prompt, width, height, frame_count, seed)
+        thumbnail_frame = None
+
+        with tempfile.TemporaryFile() as ffmpeg_log:
+            process = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=ffmpeg_log)
+            try:
+                for frame in frame_render_pool.iter_frames(
+                    plan,
+                    workers=getattr(settings, 'VIDEO_RENDER_WORKERS', 2),
+                    batch_size=getattr(settings, 'VIDEO_RENDER_BATCH_SIZE', 8)
+                ):
+                    if thumbnail_frame is None:
+                        thumbnail_frame = frame.copy()
+                    process.stdin.write(frame.tobytes())
+                process.stdin.close()
+                return_code = process.wait(timeout=120)
+            except BrokenPipeError:
+                return_code = process.wait(timeout=120)
+            except BaseException:
+                process.kill()
+                process.wait()
+                raise
+
+            if return_code != 0:
+                ffmpeg_log.seek(0)
+                error = ffmpeg_log.read().decode('utf-8', errors='replace').strip()
+                raise RuntimeError(f"ffmpeg exited with {return_code}: {error[-500:]}")
+
+        video_file.seek(0)
+        video_file.size = os.path.getsize(video_file.temporary_file_path())
+        print(f"  ⏱️ Rendered and encoded {frame_count} frames in {time.time() - started:.2f}s")
+
+        thumb_io = BytesIO()
+        Image.fromarray(thumbnail_frame, 'RGB').save(thumb_io, format='JPEG', quality=85)
+        thumbnail_file = ContentFile(thumb_io.getvalue(), name=f'enhanced_thumb_{prompt[:20]}.jpg')
+
+        metadata = {
+            'service': 'Enhanced Mock Generator (FFmpeg)',
+            'quality': quality,
+            'duration': duration,
+            'fps': fps,
+            'resolution': f'{width}x{height}',
+            'frames': frame_count,
+            'format': output_format.upper(),
+            'encoder': encoder['encoder'],
+            'file_size': video_file.size,
+            'seed': seed,
+            'note': 'This is an enhanced animated mock video. Get API keys for real AI videos.'
+        }
+
+        print(f"  ✅ FFmpeg mock video created! Size: {video_file.size} bytes")
+
+        return video_file, thumbnail_file, metadata
+
+    except Exception as e:
+        print(f"❌ FFmpeg mock failed, falling back to GIF: {e}")
+        if video_file:
+            video_file.close()
+        return generate_animated_mock_video(prompt, duration, quality, fps, seed)
+
 def generate_animated_mock_video(prompt, duration, quality, fps, seed):
     """
     Generate an animated mock video (multiple frames as GIF)
@@ -168,8 +313,6 @@ def generate_animated_mock_video(prompt, duration, quality, fps, seed):
     print("🎨 Creating animated mock video...")
     
     try:
-        from PIL import Image, ImageDraw, ImageFont
-        
         # Set up parameters
         if seed:
             random.seed(seed)
@@ -185,14 +328,20 @@ def generate_animated_mock_video(prompt, duration, quality, fps, seed):
         width, height = size_map.get(quality, (640, 480))
         
         # Create multiple frames for animation
-        frame_count = min(duration * fps, 30)  # Max 30 frames
-        frames = []
+        max_frames = getattr(settings, 'VIDEO_GIF_MAX_FRAMES', 30)
+        frame_count = max(1, min(int(duration * fps), max_frames))
         
         print(f"  🎞️ Creating {frame_count} frames at {width}x{height}")
         
-        for i in range(frame_count):
-            frame = create_enhanced_animated_frame(prompt, i, frame_count, width, height, seed)
-            frames.append(frame)
+        started = time.time()
+        plan = build_frame_plan(prompt, width, height, frame_count, seed)
+        frames = list(frame_render_pool.iter_frames(
+            plan,
+            workers=getattr(settings, 'VIDEO_RENDER_WORKERS', 2),
+            batch_size=getattr(settings, 'VIDEO_RENDER_BATCH_SIZE', 8),
+            render=render_gif_frame_batch
+        ))
+        print(f"  ⏱️ Rendered {frame_count} frames in {time.time() - started:.2f}s")
         
         # Save as animated GIF
         gif_io = BytesIO()
@@ -207,9 +356,9 @@ def generate_animated_mock_video(prompt, duration, quality, fps, seed):
         
         video_file = ContentFile(gif_io.getvalue(), name=f'enhanced_mock_{prompt[:20]}.gif')
         
-        # Create thumbnail from first frame
+        # Create thumbnail from first frame (full colour, not the GIF palette)
         thumb_io = BytesIO()
-        frames[0].save(thumb_io, format='JPEG', quality=85)
+        Image.fromarray(render_frame_batch(plan, 0, 1)[0], 'RGB').save(thumb_io, format='JPEG', quality=85)
         thumbnail_file = ContentFile(thumb_io.getvalue(), name=f'enhanced_thumb_{prompt[:20]}.jpg')
         
         metadata = {
@@ -237,220 +386,12 @@ def create_enhanced_animated_frame(prompt, frame_num, total_frames, width, heigh
     """
     Create an enhanced animated frame with better visuals
     """
-    # Create base image
-    image = Image.new('RGB', (width, height))
-    draw = ImageDraw.Draw(image)
-    
-    # Animation progress
-    progress = frame_num / max(total_frames - 1, 1)
-    
-    # Generate theme colors based on prompt
-    colors = get_enhanced_theme_colors(prompt, seed)
-    
-    # Create animated background
-    create_enhanced_animated_background(draw, width, height, colors, progress)
-    
-    # Add animated elements based on prompt
-    add_prompt_based_elements(draw, width, height, colors, progress, prompt)
-    
-    # Add text overlay
-    add_enhanced_text_overlay(draw, width, height, prompt, frame_num, total_frames)
-    
-    return image
-
-def get_enhanced_theme_colors(prompt, seed):
-    """
-    Get enhanced theme colors based on prompt analysis
-    """
-    random.seed(seed)
-    prompt_lower = prompt.lower()
-    
-    # Analyze prompt for color themes
-    if any(word in prompt_lower for word in ['cat', 'orange', 'warm']):
-        return [(255, 140, 0), (255, 165, 0), (255, 69, 0)]  # Orange theme
-    elif any(word in prompt_lower for word in ['ocean', 'blue', 'water', 'sky']):
-        return [(30, 144, 255), (0, 191, 255), (135, 206, 235)]  # Blue theme
-    elif any(word in prompt_lower for word in ['forest', 'green', 'nature', 'tree']):
-        return [(34, 139, 34), (0, 128, 0), (50, 205, 50)]  # Green theme
-    elif any(word in prompt_lower for word in ['fire', 'red', 'hot']):
-        return [(255, 69, 0), (255, 0, 0), (220, 20, 60)]  # Red theme
-    elif any(word in prompt_lower for word in ['space', 'galaxy', 'stars', 'night']):
-        return [(25, 25, 112), (72, 61, 139), (123, 104, 238)]  # Purple theme
-    else:
-        # Dynamic colors based on prompt hash
-        prompt_hash = hash(prompt) % 1000
-        random.seed(prompt_hash)
-        return [
-            (random.randint(100, 255), random.randint(100, 255), random.randint(100, 255))
-            for _ in range(3)
-        ]
-
-def create_enhanced_animated_background(draw, width, height, colors, progress):
-    """
-    Create an enhanced animated background with gradients and movement
-    """
-    # Create moving gradient
-    for y in range(height):
-        # Add wave motion to the gradient
-        wave_offset = math.sin((y / height * 4 + progress * 2) * math.pi) * 0.2
-        ratio = (y / height + wave_offset + progress * 0.3) % 1.0
-        
-        # Interpolate between colors
-        color_index = int(ratio * (len(colors) - 1))
-        next_index = (color_index + 1) % len(colors)
-        local_ratio = (ratio * (len(colors) - 1)) - color_index
-        
-        r = int(colors[color_index][0] * (1 - local_ratio) + colors[next_index][0] * local_ratio)
-        g = int(colors[color_index][1] * (1 - local_ratio) + colors[next_index][1] * local_ratio)
-        b = int(colors[color_index][2] * (1 - local_ratio) + colors[next_index][2] * local_ratio)
-        
-        draw.line([(0, y), (width, y)], fill=(r, g, b))
-
-def add_prompt_based_elements(draw, width, height, colors, progress, prompt):
-    """
-    Add animated elements based on the prompt content
-    """
-    prompt_lower = prompt.lower()
-    
-    # Add different elements based on prompt
-    if 'cat' in prompt_lower:
-        add_cat_elements(draw, width, height, colors, progress)
-    elif any(word in prompt_lower for word in ['bird', 'fly']):
-        add_flying_elements(draw, width, height, colors, progress)
-    elif any(word in prompt_lower for word in ['ocean', 'wave']):
-        add_wave_elements(draw, width, height, colors, progress)
-    elif 'fire' in prompt_lower:
-        add_fire_elements(draw, width, height, colors, progress)
-    else:
-        add_generic_elements(draw, width, height, colors, progress)
-
-def add_cat_elements(draw, width, height, colors, progress):
-    """Add cat-themed animated elements"""
-    # Animated cat silhouette
-    cat_x = int(width * 0.2 + (width * 0.6) * progress)
-    cat_y = int(height * 0.7)
-    
-    # Simple cat shape
-    # Body
-    draw.ellipse([cat_x, cat_y, cat_x + 60, cat_y + 30], fill=colors[0])
-    # Head
-    draw.ellipse([cat_x + 45, cat_y - 20, cat_x + 75, cat_y + 10], fill=colors[0])
-    # Ears
-    draw.polygon([(cat_x + 50, cat_y - 15), (cat_x + 55, cat_y - 25), (cat_x + 60, cat_y - 15)], fill=colors[0])
-    draw.polygon([(cat_x + 65, cat_y - 15), (cat_x + 70, cat_y - 25), (cat_x + 75, cat_y - 15)], fill=colors[0])
-    # Tail
-    tail_curve = int(10 * math.sin(progress * 4 * math.pi))
-    draw.ellipse([cat_x - 15, cat_y + 10 + tail_curve, cat_x + 5, cat_y + 20 + tail_curve], fill=colors[0])
-
-def add_flying_elements(draw, width, height, colors, progress):
-    """Add flying bird elements"""
-    # Multiple birds flying
-    for i in range(3):
-        bird_x = int((width * 0.1 + i * width * 0.3) + (width * 0.4) * progress)
-        bird_y = int(height * 0.3 + i * 50 + 20 * math.sin(progress * 3 * math.pi + i))
-        
-        # Simple bird shape (V)
-        wing_span = 15 + int(5 * math.sin(progress * 8 * math.pi + i))
-        draw.line([(bird_x - wing_span, bird_y), (bird_x, bird_y - 10), (bird_x + wing_span, bird_y)], 
-                 fill=colors[i % len(colors)], width=3)
-
-def add_wave_elements(draw, width, height, colors, progress):
-    """Add ocean wave elements"""
-    # Animated waves
-    for i in range(5):
-        wave_y = height * 0.6 + i * 20
-        for x in range(0, width, 10):
-            wave_height = 10 * math.sin((x / 50 + progress * 2 + i) * math.pi)
-            y = int(wave_y + wave_height)
-            draw.ellipse([x, y, x + 8, y + 8], fill=colors[i % len(colors)])
-
-def add_fire_elements(draw, width, height, colors, progress):
-    """Add fire flame elements"""
-    # Animated flames
-    flame_base_y = int(height * 0.8)
-    for i in range(7):
-        flame_x = width * 0.3 + i * 20
-        flame_height = 40 + 20 * math.sin(progress * 6 * math.pi + i)
-        flame_y = flame_base_y - flame_height
-        
-        # Flame shape
-        points = [
-            (flame_x, flame_base_y),
-            (flame_x - 8, flame_y + 20),
-            (flame_x, flame_y),
-            (flame_x + 8, flame_y + 20)
-        ]
-        draw.polygon(points, fill=colors[i % len(colors)])
-
-def add_generic_elements(draw, width, height, colors, progress):
-    """Add generic animated elements"""
-    # Floating particles
-    num_particles = 12
-    for i in range(num_particles):
-        angle = (i / num_particles) * 2 * math.pi + progress * 2 * math.pi
-        radius = 100 + 50 * math.sin(progress * 3 * math.pi + i)
-        
-        x = int(width / 2 + radius * math.cos(angle))
-        y = int(height / 2 + radius * math.sin(angle))
-        
-        size = 8 + int(4 * math.sin(progress * 4 * math.pi + i))
-        draw.ellipse([x - size, y - size, x + size, y + size], fill=colors[i % len(colors)])
-
-def add_enhanced_text_overlay(draw, width, height, prompt, frame_num, total_frames):
-    """Add enhanced text overlay with animation"""
-    try:
-        font = ImageFont.load_default()
-        
-        # Main prompt text with animation
-        words = prompt.split()
-        if len(words) > 8:
-            text_lines = [' '.join(words[:8]), ' '.join(words[8:])]
-        else:
-            text_lines = [prompt]
-        
-        # Animated text position
-        text_alpha = int(200 + 55 * math.sin(frame_num / total_frames * 2 * math.pi))
-        
-        y_offset = height // 2 - len(text_lines) * 25
-        for line in text_lines:
-            bbox = draw.textbbox((0, 0), line, font=font)
-            text_width = bbox[2] - bbox[0]
-            x = (width - text_width) // 2
-            
-            # Animated background
-            bg_expand = int(10 * math.sin(frame_num / total_frames * 4 * math.pi))
-            draw.rectangle([x - 25 - bg_expand, y_offset - 15, 
-                          x + text_width + 25 + bg_expand, y_offset + 35], 
-                         fill=(0, 0, 0, 180))
-            
-            # Text with glow effect
-            for offset in [(-1, -1), (-1, 1), (1, -1), (1, 1)]:
-                draw.text((x + offset[0], y_offset + offset[1]), line, fill=(100, 100, 100), font=font)
-            draw.text((x, y_offset), line, fill='white', font=font)
-            
-            y_offset += 50
-        
-        # Frame counter
-        frame_text = f"Frame {frame_num + 1}/{total_frames}"
-        draw.text((20, height - 40), frame_text, fill='white', font=font)
-        
-        # Enhanced watermark
-        watermark = "ENHANCED AI MOCK VIDEO"
-        bbox = draw.textbbox((0, 0), watermark, font=font)
-        watermark_width = bbox[2] - bbox[0]
-        draw.rectangle([width - watermark_width - 30, 10, width - 10, 35], fill=(0, 0, 0, 150))
-        draw.text((width - watermark_width - 20, 15), watermark, fill='white', font=font)
-        
-    except Exception as e:
-        print(f"⚠️ Enhanced text overlay failed: {e}")
+    plan = build_frame_plan(prompt, width, height, total_frames, seed)
+    return Image.fromarray(render_frame_batch(plan, frame_num, frame_num + 1)[0], 'RGB')
 
 def check_ffmpeg():
-    """Check if FFmpeg is available"""
-    try:
-        subprocess.run(['ffmpeg', '-version'], capture_output=True, timeout=5)
-        return True
-    except:
-        return False
+    """Check if FFmpeg is available (probed once per process)"""
+    return ffmpeg_capabilities.available
 
 def generate_simple_mock_video(prompt, duration, quality, fps, seed):
     """Fallback simple mock video"""
@@ -14,6 +14,8 @@ from io import BytesIO
 import json
 import base64
 
+from core.http_client import provider_http
+
 def generate_working_ai_video(prompt, duration=5, quality='standard', fps=24, seed=None):
     """
     Generate REAL AI video using WORKING services with fixed authentication
@@ -41,8 +43,7 @@ def generate_working_ai_video(prompt, duration=5, quality='standard', fps=24, se
             if result and result[0]:  # If video was generated
                 video_file, thumbnail_file, metadata = result
                 print(f"✅ SUCCESS! Real video generated with {service_name}")
-                print(f"📁 Video size: {len(video_file.read())} bytes")
-                video_file.seek(0)  # Reset file pointer
+                print(f"📁 Video size: {video_file.size} bytes")
                 return video_file, thumbnail_file, service_name, metadata
             
         except Exception as e:
@@ -128,8 +129,9 @@ def try_huggingface_fixed(prompt, duration, quality, fps, seed):
             print(f"  📊 Frames: {num_frames}, FPS: {min(fps, 8)}")
             
             # Make request with longer timeout
-            response = requests.post(
+            response = provider_http.post(
                 model['url'],
+                provider='huggingface',
                 headers=headers,
                 json=payload,
                 timeout=300  # 5 minutes
@@ -186,7 +188,7 @@ def try_huggingface_fixed(prompt, duration, quality, fps, seed):
                                 print(f"  ⏳ Model loading, waiting 30 seconds...")
                                 time.sleep(30)
                                 # Retry once
-                                retry_response = requests.post(model['url'], headers=headers, json=payload, timeout=300)
+                                retry_response = provider_http.post(model['url'], provider='huggingface', headers=headers, json=payload, timeout=300)
                                 if retry_response.status_code == 200 and len(retry_response.content) > 100000:
                                     video_file = ContentFile(retry_response.content, name=f'hf_retry_{int(time.time())}.mp4')
                                     thumbnail_file = create_video_thumbnail(prompt)
@@ -210,7 +212,7 @@ def try_huggingface_fixed(prompt, duration, quality, fps, seed):
                     print(f"  🔄 Retrying without auth...")
                     # Retry without auth header
                     headers_no_auth = {k: v for k, v in headers.items() if k != 'Authorization'}
-                    retry_response = requests.post(model['url'], headers=headers_no_auth, json=payload, timeout=300)
+                    retry_response = provider_http.post(model['url'], provider='huggingface', headers=headers_no_auth, json=payload, timeout=300)
                     if retry_response.status_code == 200 and len(retry_response.content) > 100000:
                         video_file = ContentFile(retry_response.content, name=f'hf_noauth_{int(time.time())}.mp4')
                         thumbnail_file = create_video_thumbnail(prompt)
@@ -308,7 +310,7 @@ def try_pollinations_video_fixed(prompt, duration, quality, fps, seed):
             try:
                 print(f"  📡 Trying endpoint {i}/3: {endpoint}")
                 
-                response = requests.get(endpoint, timeout=120)
+                response = provider_http.get(endpoint, provider='pollinations', timeout=120)
                 
                 print(f"  📊 Response: {response.status_code}")
                 print(f"  📦 Content-Type: {response.headers.get('content-type', 'unknown')}")